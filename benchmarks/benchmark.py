@@ -0,0 +1,303 @@
+"""
+Scaling benchmark of the optimization stages, on random instances of
+model.randinp.RandomWorkbook.
+
+Every instance size of SIZES is generated from a fixed seed, so every run
+measures the same workloads. Each stage is timed (best wall time of
+--repeat runs) and its peak memory is measured with tracemalloc, then the
+results are saved as JSON and compared against a stored baseline:
+
+    python benchmarks/benchmark.py                   # compare to baseline
+    python benchmarks/benchmark.py --save-baseline   # store a new baseline
+    python benchmarks/benchmark.py --threshold 0.5 --sizes small medium
+    python benchmarks/benchmark.py --end-to-end --sizes huge
+    python benchmarks/benchmark.py --option solver=ipm --option threads=4
+
+The solver stages run on the first year of the instance. With
+--end-to-end, the instance is also written to an input Excel file and
+program.execute runs on it over every year, so the Excel parse, the
+preprocessing and the export are measured on the same data.
+
+The run fails (exit code 1) when a stage is slower, or needs more memory,
+than the baseline by more than the threshold (0.25 = 25% by default).
+Stages faster than --floor seconds are not compared on time, since they
+are within the noise of the timer.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+LOCATION = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(LOCATION))
+
+from model import instrument
+from model.data import Model, ModelResults
+from model.preprocessing import preprocess
+from model.program import execute
+from model.__main__ import parse_option
+from model.randinp import RandomWorkbook
+from model.solvers import solve
+from model.colgen import column_generation
+from model.optimization import generate_objective_vector
+from model.optimization import generate_demand_matrix
+from model.optimization import generate_combination_matrices
+from model.optimization import generate_capacity_matrix
+from model.optimization import generate_supply_matrix
+from model.optimization import generate_constraints_matrix
+from model.optimization import generate_constraints_vector
+
+# Instance sizes, keyword arguments of RandomWorkbook
+SIZES = {
+    'small': dict(no_products=3, no_factories=5, no_customers=100,
+                  no_years=2, no_capacity_constraints=2,
+                  no_supply_constraints=1),
+    'medium': dict(no_products=10, no_factories=20, no_customers=2000,
+                   no_years=3, no_capacity_constraints=5,
+                   no_supply_constraints=3),
+    'large': dict(no_products=20, no_factories=30, no_customers=10_000,
+                  no_years=3, no_capacity_constraints=10,
+                  no_supply_constraints=5),
+    'huge': dict(no_products=20, no_factories=30, no_customers=50_000,
+                 no_years=10, no_capacity_constraints=10,
+                 no_supply_constraints=5)}
+
+# Sizes run by default, huge takes minutes to write and parse as Excel
+DEFAULT_SIZES = ['small', 'medium', 'large']
+
+# Top-level spans of program.execute, measured by --end-to-end
+RUN_STAGES = ['load_inputs', 'preprocess', 'optimize', 'postprocess',
+              'export']
+
+
+def _solve(data=None):
+    """Solve the assembled linear program with the model's solver backend,
+    as optimization.optimize"""
+
+    result = solve(data.objective_vector, data.constraints_matrix,
+                   data.constraints_vector, data.solver, data.solver_options)
+
+    assert result.optimal, result.status
+
+
+# Stages of the pipeline, in order, each building on the ones before.
+# Column generation solves the same program again from the objective
+# vector, to compare against building the full matrix and solving it.
+STAGES = [
+    ('objective vector', generate_objective_vector),
+    ('demand matrix', generate_demand_matrix),
+    ('combination matrices', generate_combination_matrices),
+    ('capacity matrix', generate_capacity_matrix),
+    ('supply matrix', generate_supply_matrix),
+    ('constraints matrix', generate_constraints_matrix),
+    ('constraints vector', generate_constraints_vector),
+    ('solve', _solve),
+    ('column generation', column_generation)]
+
+
+def workbook(size, seed=0):
+    """Random input workbook of a size, the same for a given seed"""
+
+    return RandomWorkbook(seed=seed, **SIZES[size])
+
+
+def instance(size, seed=0, settings=None):
+    """Model of the first year of workbook(size, seed), preprocessed from
+    its sheets without going through Excel, with the settings of the model
+    (e.g. solver and solver_options)"""
+
+    inputs = workbook(size, seed)
+
+    data = Model(**(settings or {}))
+    data.inputs = inputs.inputs()
+    data.year = inputs.start_year
+    preprocess(data=data)
+
+    return data
+
+
+def _measure(data, traced):
+    """Wall time (untraced) or peak memory (traced) of every stage"""
+
+    measures = {}
+
+    for stage, function in STAGES:
+        if traced:
+            tracemalloc.start()
+            function(data=data)
+            measures[stage] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            start = time.perf_counter()
+            function(data=data)
+            measures[stage] = time.perf_counter() - start
+
+    return measures
+
+
+def _measure_run(location, traced, settings=None):
+    """Wall time (untraced) or peak memory (traced) of every top-level
+    step of program.execute on an input file, summed over the years"""
+
+    data = Model(**(settings or {}))
+    data.filepath = location
+    data.cache_location = None
+
+    results = ModelResults()
+    results.save_location = os.path.join(os.path.dirname(location),
+                                         'Outputs.xlsx')
+
+    with instrument.recording(memory=traced) as records:
+        execute(data=data, results=results)
+
+    measures = dict.fromkeys(RUN_STAGES, 0)
+
+    for record in records:
+        if record['parent'] is None:
+            measures[record['name']] = max(
+                measures[record['name']], record['peak memory']) \
+                if traced else measures[record['name']] + record['time']
+
+    return {f'run {stage}': measure for stage, measure in measures.items()}
+
+
+def run(sizes, repeat=5, end_to_end=False, settings=None):
+    """
+    Time and measure every stage on every size. Stages are timed without
+    tracemalloc, which slows them down, then measured once with it. With
+    end_to_end, the top-level steps of program.execute are measured too,
+    as "run <step>". The settings are set on every model, see instance.
+
+    Returns
+    -------
+    dict
+        {size: {stage: {'time': seconds, 'peak memory': bytes}}}
+    """
+
+    results = {}
+
+    for size in sizes:
+        times = [_measure(instance(size, settings=settings), False)
+                 for _ in range(repeat)]
+        peaks = _measure(instance(size, settings=settings), True)
+
+        if end_to_end:
+            with tempfile.TemporaryDirectory() as directory:
+                location = os.path.join(directory, 'Inputs.xlsx')
+                workbook(size).write_workbook(location)
+
+                for run_times in times:
+                    run_times.update(
+                        _measure_run(location, False, settings))
+                peaks.update(_measure_run(location, True, settings))
+
+        # Best time of all runs
+        results[size] = {
+            stage: {'time': min(run_times[stage] for run_times in times),
+                    'peak memory': peaks[stage]}
+            for stage in peaks}
+
+    return results
+
+
+def compare(results, baseline, threshold=0.25, floor=0.01):
+    """
+    Regressions of the results against the baseline.
+
+    Returns
+    -------
+    list
+        (size, stage, measure, baseline, result) of every measure above
+        (1 + threshold) times its baseline
+    """
+
+    regressions = []
+
+    for size, stages in results.items():
+        for stage, measures in stages.items():
+            before = baseline.get(size, {}).get(stage)
+            if before is None:
+                continue
+
+            for measure, value in measures.items():
+                if measure == 'time' and before[measure] < floor:
+                    continue
+                if value > (1 + threshold) * before[measure]:
+                    regressions.append(
+                        (size, stage, measure, before[measure], value))
+
+    return regressions
+
+
+def main(arguments=None):
+    """Command line entry point, returns the exit code"""
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES),
+                        default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Relative regression allowed (default 0.25)')
+    parser.add_argument('--floor', type=float, default=0.01,
+                        help='Stages faster than this (seconds) are not '
+                             'compared on time')
+    parser.add_argument('--baseline',
+                        default=os.path.join(LOCATION, 'baseline.json'))
+    parser.add_argument('--output',
+                        default=os.path.join(LOCATION, 'results.json'))
+    parser.add_argument('--solver', choices=['highspy', 'scipy'],
+                        help='Solver backend (default highspy if installed)')
+    parser.add_argument('--option', action='append', default=[],
+                        metavar='NAME=VALUE',
+                        help='HiGHS option of the solves, repeatable')
+    parser.add_argument('--end-to-end', action='store_true',
+                        help='Also run program.execute on the instances '
+                             'written as input Excel files')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Store the results as the new baseline')
+    arguments = parser.parse_args(arguments)
+
+    settings = {'solver': arguments.solver,
+                'solver_options': dict(parse_option(option)
+                                       for option in arguments.option)}
+
+    results = run(arguments.sizes, arguments.repeat, arguments.end_to_end,
+                  settings)
+
+    for size, stages in results.items():
+        print(size)
+        for stage, measures in stages.items():
+            print(f'    {stage:<22} {measures["time"]:10.4f} s '
+                  f'{measures["peak memory"] / 1024 ** 2:10.2f} MiB')
+
+    with open(arguments.output, 'w') as file:
+        json.dump(results, file, indent=2)
+
+    if arguments.save_baseline:
+        with open(arguments.baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+        return 0
+
+    if not os.path.exists(arguments.baseline):
+        print(f'No baseline at {arguments.baseline}, run --save-baseline')
+        return 0
+
+    with open(arguments.baseline) as file:
+        baseline = json.load(file)
+
+    regressions = compare(results, baseline, arguments.threshold,
+                          arguments.floor)
+
+    for size, stage, measure, before, after in regressions:
+        print(f'Regression: {size} {stage} {measure} '
+              f'{before:.4g} -> {after:.4g} ({after / before - 1:+.0%})')
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,15 +7,72 @@ Excel sheets.
 - postprocessing.py, file for calculating post-optimization metrics 
 and arranging the output data back into Excel.
 - program.py, file for running the entire program from start to finish.
+- __main__.py, file for running the program from the command line
+(python -m model).
 - data.py, file for storing all the important program data.
+- cache.py, file for caching the parsed inputs and the sidecar files on disk.
+- network.py, file for solving the linear program as a min-cost flow.
+- colgen.py, file for solving the linear program by column generation.
+- presolve.py, file for removing the rows and columns of the linear program
+that cannot change its optimal solution.
+- scenarios.py, file for solving what-if variants of a preprocessed year.
+- sink.py, file for writing every year's results to disk, as (index, value)
+pairs, and reading them back.
+- export.py, file for saving the results to Excel, CSV, Parquet or Arrow.
+- instrument.py, file for timing and measuring every step of a run.
+- validation.py, file for the validation levels and the checks shared by
+the engines.
+- solvers.py, file for the solver backends (highspy and scipy) and their
+options.
+- server.py, file for the local job server that keeps the preprocessed
+models in memory.
 - ui.py, file for hosting the user interface for interacting with the full
 optimization program.
 
 """
 
+import importlib
+import importlib.util
 import numpy as np
-from scipy.linalg import block_diag
-from scipy.optimize import linprog
 from functools import reduce
-import pandas as pd
-import gc
\ No newline at end of file
+
+
+class LazyModule:
+
+    """
+    Module imported on the first access to one of its attributes, so that
+    importing the model does not pay for pandas and scipy until a function
+    uses them, e.g. pd = LazyModule('pandas') then pd.DataFrame(...)
+    """
+
+    __slots__ = ('_name', '_module')
+
+    def __init__(self, name):
+        self._name, self._module = name, None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return f'LazyModule({self._name!r})'
+
+
+def optional_module(name):
+    """LazyModule of an optional dependency, None when it is not
+    installed"""
+
+    return None if importlib.util.find_spec(name) is None \
+        else LazyModule(name)
+
+
+def linprog(*args, **kwargs):
+    """scipy.optimize.linprog, imported on the first call"""
+
+    return _optimize.linprog(*args, **kwargs)
+
+
+_optimize = LazyModule('scipy.optimize')
+sparse = LazyModule('scipy.sparse')
+pd = LazyModule('pandas')
@@ -0,0 +1,137 @@
+"""
+Run the Optimizer from the command line, without a notebook:
+
+    python -m model "Inputs.xlsm" -o Outputs.xlsx
+    python -m model "Inputs.xlsm" -o results.parquet --years 2023 2024
+    python -m model "Inputs.xlsm" --workers 4 --solver highspy
+    python -m model "Inputs.xlsm" --engine colgen --option threads=1
+
+The input workbook is solved by program.execute, and the extension of
+the output file picks its format (see export.exporters).
+"""
+
+from model.data import Model, ModelResults
+from model.program import execute
+from model.instrument import recording
+from contextlib import nullcontext
+import argparse
+import sys
+import time
+
+
+def parse_option(option):
+    """(name, value) of a NAME=VALUE option, the value as a number when it
+    is one"""
+
+    name, value = option.split('=', 1)
+
+    for parse in (int, float):
+        try:
+            return name, parse(value)
+        except ValueError:
+            pass
+
+    return name, value
+
+
+def parser():
+    """Parser of the command line arguments"""
+
+    parser = argparse.ArgumentParser(
+        prog='python -m model', description=__doc__.split('\n\n')[0])
+
+    parser.add_argument('input', help='Input Excel workbook')
+    parser.add_argument('-o', '--output', default='Outputs.xlsx',
+                        help='Output file, its extension picks the format '
+                             '(default Outputs.xlsx)')
+    parser.add_argument('--years', nargs='+', type=int, metavar='YEAR',
+                        help='Years to solve (default every year of the '
+                             'timeframe)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes solving the years in '
+                             'parallel, 0 for every core (default 1)')
+    parser.add_argument('--engine', choices=['highs', 'network', 'colgen'],
+                        default='highs')
+    parser.add_argument('--decompose', action='store_true',
+                        help='Solve the independent product groups in '
+                             'parallel (needs --workers 1)')
+    parser.add_argument('--warm-start', action='store_true',
+                        help="Start from the year before's basis (needs "
+                             "--workers 1)")
+    parser.add_argument('--no-presolve', dest='presolve',
+                        action='store_false')
+    parser.add_argument('--sensitivity', action='store_true',
+                        help='Save the sensitivity sheets')
+    parser.add_argument('--solver', choices=['highspy', 'scipy'],
+                        help='Solver backend (default highspy if installed)')
+    parser.add_argument('--option', action='append', default=[],
+                        metavar='NAME=VALUE',
+                        help='HiGHS option of the solves, repeatable')
+    parser.add_argument('--validation', choices=['off', 'cheap', 'full'],
+                        default='cheap')
+    parser.add_argument('--route-cost-limit', type=float,
+                        help='Routes above this outbound cost are removed')
+    parser.add_argument('--colgen-routes', type=int, default=3,
+                        help='Routes per customer of --engine colgen '
+                             '(default 3)')
+    parser.add_argument('--cache-location',
+                        help='Directory of the parsed input cache, a '
+                             'trusted one as it holds pickles (default no '
+                             'cache)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Parse the workbook without the cache, even '
+                             'with --cache-location')
+    parser.add_argument('--sidecar-location',
+                        help='Directory of the memory-mapped sidecar files')
+    parser.add_argument('--timings', action='store_true',
+                        help='Print the time of every step of the run')
+
+    return parser
+
+
+def main(arguments=None):
+    """Command line entry point, returns the exit code"""
+
+    arguments = parser().parse_args(arguments)
+
+    data = Model(filepath=arguments.input,
+                 validation=arguments.validation,
+                 solver=arguments.solver,
+                 solver_options=dict(parse_option(option)
+                                     for option in arguments.option),
+                 colgen_routes=arguments.colgen_routes,
+                 sidecar_location=arguments.sidecar_location)
+
+    if arguments.route_cost_limit is not None:
+        data.route_cost_limit = arguments.route_cost_limit
+    if arguments.cache_location is not None:
+        data.cache_location = arguments.cache_location
+    if arguments.no_cache:
+        data.cache_location = None
+
+    results = ModelResults()
+    results.save_location = arguments.output
+
+    start = time.perf_counter()
+
+    # Spans only record with --timings
+    with recording() if arguments.timings else nullcontext([]) as records:
+        execute(arguments.workers or None, arguments.warm_start,
+                arguments.engine, arguments.decompose, arguments.presolve,
+                arguments.sensitivity, arguments.years, data=data,
+                results=results)
+
+    if arguments.timings:
+        for record in records:
+            if record['parent'] is None:
+                print(f'{record["name"]:<16} {record["time"]:10.4f} s')
+
+    print(f'Solved {", ".join(map(str, results.years))} in '
+          f'{time.perf_counter() - start:.2f} s, saved to '
+          f'{arguments.output}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
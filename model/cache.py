@@ -0,0 +1,161 @@
+from model import *
+import hashlib
+import os
+import pickle
+import tempfile
+
+
+def cache_key(filepath, version):
+    """
+    Key of a cache entry: SHA-256 of the file content and the version of
+    the parser that produced the entry, so that editing the file or
+    changing the parser invalidates the entry automatically.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the file to hash
+    version: int
+        Version of the parser whose output is cached
+
+    Returns
+    -------
+    str
+        Hexadecimal key of the entry
+    """
+
+    digest = hashlib.sha256()
+
+    with open(filepath, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+
+    return f'{digest.hexdigest()}-v{version}'
+
+
+def read_cache(location, key):
+    """
+    Load a cache entry, or return None on a cache miss.
+
+    A hit refreshes the modification time of the entry, which is the
+    least recently used order followed by write_cache when evicting.
+
+    Entries are pickles, and unpickling runs code: the location must be a
+    directory that only trusted users can write to.
+    """
+
+    path = os.path.join(location, key + '.pkl')
+
+    try:
+        with open(path, 'rb') as file:
+            entry = pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+    os.utime(path)
+
+    return entry
+
+
+def write_cache(location, key, entry, limit):
+    """
+    Store a cache entry, then evict the least recently used entries until
+    the cache directory is at most limit bytes (the new entry is kept).
+
+    The entry is written to a temporary file of its own first and moved in
+    place, so an interrupted run never leaves a truncated entry behind and
+    processes writing the same key at the same time do not write into one
+    another's file.
+    """
+
+    os.makedirs(location, exist_ok=True)
+    path = os.path.join(location, key + '.pkl')
+
+    handle, temporary = tempfile.mkstemp(dir=location, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+    # (modification time, size, path) of every entry, least recently used
+    # first. Another process may evict an entry meanwhile, which is then
+    # skipped.
+    others = []
+    for name in os.listdir(location):
+        if name.endswith('.pkl'):
+            other = os.path.join(location, name)
+            try:
+                stat = os.stat(other)
+            except FileNotFoundError:
+                continue
+            others.append((stat.st_mtime, stat.st_size, other))
+
+    others.sort()
+    size = sum(other_size for _, other_size, _ in others)
+
+    for _, other_size, other in others:
+        if size <= limit:
+            break
+        if other != path:
+            size -= other_size
+            try:
+                os.remove(other)
+            except FileNotFoundError:
+                pass
+
+
+def sidecar_array(location, key, sizes, build):
+    """
+    Array stored in a binary .npy sidecar file, memory-mapped read-only so
+    that it is read zero-copy from the page cache, which the processes of
+    a run share. The file is written on the first call for a key, block by
+    block straight into the mapped file, and reused by later calls and
+    runs.
+
+    Parameters
+    ----------
+    location: str
+        Directory of the sidecar files
+    key: str
+        Name of the file, e.g. the cache key of the input file, the year
+        and the name of the array
+    sizes: list
+        Size of every block of the array
+    build: function
+        Called without arguments on a miss, returns the blocks (1-D arrays
+        of the sizes) in order
+
+    Returns
+    -------
+    numpy.memmap
+        1-D float64 array of the blocks end to end
+    """
+
+    path = os.path.join(location, key + '.npy')
+
+    if not os.path.exists(path):
+        os.makedirs(location, exist_ok=True)
+
+        # Written to a temporary file of its own first, as write_cache
+        handle, temporary = tempfile.mkstemp(dir=location, suffix='.tmp')
+        os.close(handle)
+        try:
+            array = np.lib.format.open_memmap(temporary, mode='w+',
+                                              dtype=np.float64,
+                                              shape=(sum(sizes),))
+            offset = 0
+            for block in build():
+                array[offset:offset + block.size] = block
+                offset += block.size
+
+            array.flush()
+            del array
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    return np.load(path, mmap_mode='r')
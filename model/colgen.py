@@ -0,0 +1,315 @@
+from model import *
+from model.data import Data
+from model.instrument import span
+from model.validation import validating, check, check_constraints
+from model.solvers import default_backend, highs_model, run_highs, solve
+
+# Cost of the artificial demand columns, in units of the largest cost,
+# raised by the same factor while they are still used at the optimum
+_PENALTY = 1e3
+
+# Escalations of the penalty before the program is called infeasible
+_ESCALATIONS = 3
+
+# Reduced cost below which a route is priced in, in units of the largest
+# cost
+_TOLERANCE = 1e-9
+
+
+def pattern_rows(data=Data):
+    """
+    Capacity and supply rows of every (product, factory) pattern, i.e. of
+    its inbound column and of any of its outbound routes, which only
+    differ from one another by their demand row. The rows are those of
+    generate_capacity_matrix and generate_supply_matrix, in the same
+    order, without building a column per route.
+
+    Inputs from data.py
+    -------------------
+    Data.product_list, Data.efficiency_per_product, Data.capacity_constraints,
+    Data.supply_constraints, Data.dimF
+
+    Data.column_index: numpy.ndarray
+        Codes of every column, see preprocessing.index_columns
+
+    Outputs to data.py
+    ------------------
+    Data.capacity_rows, Data.supply_rows: int
+        Number of capacity and supply rows
+
+    Returns
+    -------
+    inbound, outbound: scipy.sparse.csc_matrix
+        Capacity then supply rows of the inbound column and of an outbound
+        route of every pattern, one column per pattern in the order of the
+        inbound columns
+    """
+
+    codes = data.column_index[:data.dimF]
+    efficiency = np.hstack([np.ravel(data.efficiency_per_product[prod])
+                            for prod in data.product_list])
+
+    # As in generate_combination_matrices, the k-th inbound column of a
+    # product sits in the row of its k-th factory in Data.factory_list order
+    factory = codes['factory'][np.lexsort((codes['factory'],
+                                           codes['product']))]
+
+    def rows(constraints, start):
+        # Pattern and row of every pattern of a constraint, one row per
+        # factory of the constraint in Data.factory_list order
+        patterns, rows = [], []
+        for cons in constraints:
+            pattern = np.flatnonzero(np.isin(
+                codes['product'],
+                [data.product_list.index(prod) for prod in cons]))
+            factories = np.unique(factory[pattern])
+
+            patterns.append(pattern)
+            rows.append(start + np.searchsorted(factories,
+                                                factory[pattern]))
+            start += factories.size
+
+        return np.hstack(patterns), np.hstack(rows), start
+
+    capacity_patterns, capacity, data.capacity_rows = rows(
+        data.capacity_constraints, 0)
+    supply_patterns, supply, end = rows(data.supply_constraints,
+                                        data.capacity_rows)
+    data.supply_rows = end - data.capacity_rows
+
+    shape = (end, data.dimF)
+    inbound = sparse.csc_matrix(
+        (-efficiency[supply_patterns], (supply, supply_patterns)),
+        shape=shape)
+    outbound = sparse.csc_matrix(
+        (np.ones(capacity.size + supply.size),
+         (np.hstack([capacity, supply]),
+          np.hstack([capacity_patterns, supply_patterns]))), shape=shape)
+
+    return inbound, outbound
+
+
+def _cheapest(routes, cost, customer, limit):
+    """The routes (sorted) among the limit cheapest of their customer"""
+
+    order = routes[np.lexsort((cost, customer[routes]))]
+    first = np.searchsorted(customer[order], customer[order])
+    rank = np.arange(order.size) - first
+
+    return np.sort(order[rank < limit])
+
+
+def _route_columns(routes, pattern, customer, outbound, dimC):
+    """Columns of the routes: -1 in the demand row of their customer, and
+    the capacity and supply rows of their pattern"""
+
+    demand = sparse.csc_matrix(
+        (-np.ones(routes.size), (customer[routes], np.arange(routes.size))),
+        shape=(dimC, routes.size))
+
+    return sparse.vstack([demand, outbound[:, pattern[routes]]],
+                         format='csc')
+
+
+def column_generation(data=Data):
+    """
+    Solve the linear program by column generation, without building the
+    constraints matrix of every route.
+
+    The restricted program starts with every inbound column, the
+    Data.colgen_routes cheapest routes of every customer, and an
+    artificial column per demand row that serves the demand at a penalty
+    cost, so that it is always feasible. After every solve, the duals
+    price the routes left out (reduced cost = cost - column . duals) and
+    up to Data.colgen_routes routes of negative reduced cost per customer
+    join the program. With highspy, they are added to the same HiGHS
+    instance, which starts again from its optimal basis.
+
+    Once no route has a negative reduced cost and no artificial column is
+    used, the duals are feasible for the full linear program and the
+    solution is optimal for it (the same objective value for a feasible
+    solution of the primal and the dual). Artificial columns still used at
+    that point get a larger penalty, the program is infeasible when they
+    stay in use.
+
+    The constraints matrix then grows with the routes that are priced in
+    rather than Σ|FxC|, pricing is a single pass over the objective vector.
+    Routes without cost or above Data.route_cost_limit are never priced in.
+
+    Inputs from data.py
+    -------------------
+    Data.objective_vector: numpy.ndarray
+        Objective vector to minimize function value.
+
+    Data.column_index, Data.demand_volume, Data.capacity_volume,
+    Data.dimF, Data.dimC, Data.dimFC
+        See preprocessing.preprocess
+
+    Data.colgen_routes: int
+        Routes of every customer in the first restricted program, and
+        routes per customer priced in after every solve
+
+    Outputs to data.py
+    ------------------
+    Data.linear_program: numpy.ndarray
+        Optimal solution of the full linear program (zero on the routes
+        that are never priced in)
+
+    Data.constraints_vector: numpy.ndarray
+        Vector of the demand, capacity and supply rows, as in
+        generate_constraints_vector
+
+    Data.solve_result: solvers.SolveResult
+        Result of the last solve, with the solution and the iterations and
+        time of every solve
+
+    Data.colgen_summary: dict
+        'rounds' (solves), 'routes' (routes priced in) and 'available'
+        (routes with a cost within Data.route_cost_limit)
+    """
+
+    check(data.colgen_routes >= 1,
+          'Column generation needs at least one route per customer')
+
+    # The checks of the constraints matrix of the other engines, on the
+    # constraints it would be built from
+    if validating('cheap', data):
+        check_constraints(data.capacity_constraints, 'Capacity', data=data)
+        check_constraints(data.supply_constraints, 'Supply', data=data)
+
+        # The inbound columns of a product in no supply constraint would be
+        # all zeros, see generate_constraints_matrix
+        check(set().union(*data.supply_constraints).issuperset(
+            data.product_list),
+            'Constraints matrix contains columns or rows with all zeros')
+
+    dimF, dimC = data.dimF, data.dimC
+    cost = data.objective_vector
+    inbound, outbound = pattern_rows(data=data)
+
+    # Pattern (inbound column) and customer of every route
+    codes = data.column_index
+    lookup = np.full((len(data.product_list), len(data.factory_list)), -1,
+                     dtype=np.int32)
+    lookup[codes['product'][:dimF], codes['factory'][:dimF]] = \
+        np.arange(dimF, dtype=np.int32)
+    pattern = lookup[codes['product'][dimF:], codes['factory'][dimF:]]
+    customer = codes['customer'][dimF:]
+
+    route_cost = cost[dimF:]
+    available = route_cost <= data.route_cost_limit  # False when NaN
+
+    scale = 1 + np.max(np.abs(np.hstack([cost[:dimF],
+                                         route_cost[available]])))
+    tolerance = _TOLERANCE * scale
+    penalty = _PENALTY * scale
+    volume = 1 + np.max(data.demand_volume, initial=0)
+
+    data.constraints_vector = np.vstack([
+        -data.demand_volume, data.capacity_volume,
+        np.zeros((data.supply_rows, 1))])
+    bound = data.constraints_vector.flatten()
+
+    if validating('cheap', data):
+        check(np.all(data.demand_volume >= 0),
+              'Demand volume cannot be negative')
+        check(data.capacity_volume.size == data.capacity_rows,
+              'Capacity volume has to match the capacity rows')
+
+    # Restricted program: inbound, artificial, then the routes priced in
+    active = _cheapest(np.flatnonzero(available), route_cost[available],
+                       customer, data.colgen_routes)
+    matrix = sparse.hstack([
+        sparse.vstack([sparse.csc_matrix((dimC, dimF)), inbound]),
+        sparse.vstack([-sparse.identity(dimC),
+                       sparse.csc_matrix((inbound.shape[0], dimC))]),
+        _route_columns(active, pattern, customer, outbound, dimC)],
+        format='csc')
+    costs = np.concatenate([cost[:dimF], np.full(dimC, penalty),
+                            route_cost[active]])
+
+    backend = data.solver or default_backend()
+    highs = highs_model(costs, matrix, bound, data.solver_options) \
+        if backend == 'highspy' else None
+
+    rounds, escalations, iterations, elapsed = 0, 0, 0, 0.
+    with span('column_generation') as step:
+        while True:
+            rounds += 1
+            if highs is not None:
+                result = run_highs(highs, round=rounds)
+            else:
+                result = solve(costs, matrix, bound, backend,
+                               data.solver_options)
+            check(result.optimal, result.status)
+
+            iterations += result.iterations
+            elapsed += result.time
+
+            # Price the routes left out
+            candidates = np.ones(data.dimFC, dtype=bool)
+            candidates[active] = False
+            candidates = np.flatnonzero(candidates & available)
+
+            dual = result.row_dual
+            pattern_dual = outbound.T @ dual[dimC:]
+            reduced = route_cost[candidates] + \
+                dual[customer[candidates]] - \
+                pattern_dual[pattern[candidates]]
+
+            priced = reduced < -tolerance
+            if np.any(priced):
+                new = _cheapest(candidates[priced], reduced[priced],
+                                customer, data.colgen_routes)
+                columns = _route_columns(new, pattern, customer, outbound,
+                                         dimC)
+                active = np.concatenate([active, new])
+
+                if highs is not None:
+                    highs.addCols(new.size, route_cost[new],
+                                  np.zeros(new.size),
+                                  np.full(new.size, np.inf),
+                                  columns.nnz,
+                                  columns.indptr[:-1].astype(np.int32),
+                                  columns.indices.astype(np.int32),
+                                  columns.data)
+                else:
+                    matrix = sparse.hstack([matrix, columns], format='csc')
+                    costs = np.concatenate([costs, route_cost[new]])
+                continue
+
+            # Optimal, unless some demand is only served by the artificial
+            # columns
+            if not np.any(result.solution[dimF:dimF + dimC] >
+                          _TOLERANCE * volume):
+                break
+
+            escalations += 1
+            check(escalations <= _ESCALATIONS, 'Infeasible')
+
+            penalty *= _PENALTY
+            costs[dimF:dimF + dimC] = penalty
+            if highs is not None:
+                highs.changeColsCost(dimC,
+                                     np.arange(dimF, dimF + dimC,
+                                               dtype=np.int32),
+                                     np.full(dimC, penalty))
+
+        step.set(rounds=rounds, routes=active.size,
+                 available=int(available.sum()))
+
+    data.linear_program = np.zeros(dimF + data.dimFC)
+    data.linear_program[:dimF] = result.solution[:dimF]
+    data.linear_program[dimF + active] = result.solution[dimF + dimC:]
+    # Round-off of the solver can leave volumes just below zero
+    np.maximum(data.linear_program, 0, out=data.linear_program)
+
+    result.solution = data.linear_program
+    result.objective = float(
+        cost[:dimF] @ data.linear_program[:dimF] +
+        route_cost[active] @ data.linear_program[dimF + active])
+    result.iterations, result.time = iterations, elapsed
+    data.solve_result = result
+
+    data.colgen_summary = {'rounds': rounds, 'routes': int(active.size),
+                           'available': int(available.sum())}
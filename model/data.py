@@ -1,22 +1,82 @@
 from model import *
 
-print("Define a file path to the Excel input file")
-print("Define a file path to save the Excel output file")
-print("\nData.filepath = \nResults.save_location = ")
 
-
-class Data:
+class Model:
 
     """
-    Class to store preprocessing and optimization data
+    Class to store preprocessing and optimization data of a model
+
+    Every preprocessing, optimization and postprocessing function takes
+    the model it works on (data=...), defaulting to the module-level Data.
+    Separate models can then be built and solved side by side, e.g. one
+    per year or per workbook in different threads.
 
     Documentation of the attributes stored:
     Local: Optimizer.docs.Attributes.txt
     Online: www.github.com/MontyMinh/Optimizer/blob/main/docs/Attributes.txt
     """
 
+    __slots__ = (
+        # User inputs
+        'filepath', 'cache_location', 'cache_limit', 'route_cost_limit',
+        'validation', 'solver', 'solver_options', 'sidecar_location',
+        'colgen_routes',
+        # Preprocessing
+        'inputs', 'input_key', 'timeframe', 'year', 'product_list',
+        'factory_list', 'factory_names', 'customer_names',
+        'customer_provinces',
+        'inbound_cost_per_product', 'outbound_cost_per_product',
+        'outbound_rates', 'customer_rate_rows', 'outbound_adjustment',
+        'efficiency_per_product', 'demand_volume', 'capacity_constraints',
+        'supply_constraints', 'capacity_volume', 'factory_sizes',
+        'customer_sizes', 'dimF', 'dimC', 'dimFC', 'column_index',
+        # Optimization
+        'objective_vector', 'demand_matrix', 'inbound_combination_matrices',
+        'outbound_combination_matrices', 'capacity_matrix', 'capacity_rows',
+        'supply_matrix', 'supply_rows', 'constraints_matrix',
+        'constraints_vector', 'linear_program', 'basis', 'presolve',
+        'presolve_summary', 'row_dual', 'slack', 'reduced_cost',
+        'cost_ranging', 'bound_ranging', 'scenario_status', 'scenario_results',
+        'solve_result', 'colgen_summary')
+
+    def __init__(self, **attributes):
+        """Model with the default user inputs, then the given attributes"""
+
+        # Parsed input cache, off (None) unless given a directory. Its
+        # entries are pickles, only point it at a trusted directory
+        self.cache_location = None
+        self.cache_limit = 2 * 1024 ** 3
+
+        # Memory-mapped outbound cost and demand files, None keeps them in
+        # memory (see preprocessing.raw_inputs)
+        self.sidecar_location = None
+
+        # Presolve removes the routes above this outbound cost
+        self.route_cost_limit = np.inf
+
+        # Checks of the inputs and of the linear program, 'off', 'cheap' or
+        # 'full' (see validation.validating)
+        self.validation = 'cheap'
+
+        # Solver backend, 'highspy' or 'scipy' (None picks highspy when it
+        # is installed), and its HiGHS options (see solvers.solve)
+        self.solver = None
+        self.solver_options = {}
+
+        # Routes of every customer to start column generation from, and
+        # to price in per round (see colgen.column_generation)
+        self.colgen_routes = 3
 
-class Results:
+        for attr, value in attributes.items():
+            setattr(self, attr, value)
+
+
+# User settings of a model, copied to the models of the worker processes
+SETTINGS = ('route_cost_limit', 'validation', 'solver', 'solver_options',
+            'sidecar_location', 'colgen_routes')
+
+
+class ModelResults:
 
     """
     Class to store postprocessing data in-order to free up memory
@@ -27,4 +87,18 @@ class Results:
 
     """
 
-    volume, cost = [], []
+    __slots__ = ('years', 'presolve', 'sensitivity', 'split',
+                 'save_location', 'location')
+
+    def __init__(self):
+        """Empty results, one entry per optimization instance"""
+
+        self.years, self.presolve, self.sensitivity = [], [], []
+
+        # Per-year result files, None puts them next to the output file
+        self.location = None
+
+
+# Module-level model and results, used by default
+Data = Model()
+Results = ModelResults()
@@ -0,0 +1,198 @@
+from model import *
+from model.data import Data, Results
+from model.sink import label_years, read_table
+from model.postprocessing import decode
+from model.validation import check
+import os
+
+# Imported on the first export, pyarrow is optional
+openpyxl = LazyModule('openpyxl')
+pyarrow = optional_module('pyarrow')
+feather, parquet = LazyModule('pyarrow.feather'), \
+    LazyModule('pyarrow.parquet')
+
+
+def result_tables(data=Data, results=Results):
+    """
+    Tables of the output file, one at a time, so only one of them is ever
+    in memory. The rows are labelled by a gather against Data.column_index
+    with the customers and provinces cached by preprocessing (see
+    preprocessing.raw_inputs).
+
+    Inputs from data.py
+    -------------------
+    Data.column_index, Data.product_list, Data.factory_list,
+    Data.customer_names, Data.customer_provinces
+        Labels of the last year solved
+
+    Results.years, Results.split: list, int
+        Years in the result directory, see sink.label_years
+
+    Results.sensitivity: list
+        Whether every year has sensitivity tables, read back from the
+        result directory (see sink.read_table)
+
+    Yields
+    ------
+    str, pandas.DataFrame
+        Name of the table (sheet of the Excel file) and the table
+    """
+
+    index = data.column_index
+    inbound, outbound = index[:results.split], index[results.split:]
+
+    inbound_prefix = pd.DataFrame({
+        'Factory': decode(data.factory_list, inbound['factory']),
+        'Product': decode(data.product_list, inbound['product'])})
+
+    outbound_prefix = pd.DataFrame({
+        'ID': decode(np.hstack([data.customer_names[prod]
+                                for prod in data.product_list]),
+                     outbound['customer']),
+        'Product': decode(data.product_list, outbound['product']),
+        'Province': decode(np.hstack([data.customer_provinces[prod]
+                                      for prod in data.product_list]),
+                           outbound['customer']),
+        'Factory': decode(data.factory_list, outbound['factory'])})
+
+    # Inbound Cost, only the factories with some cost
+    yield 'Inbound Cost Per Factory', label_years(
+        'cost', inbound_prefix, 0, results=results)
+
+    # Outbound Cost, only the routes with some cost
+    yield 'Outbound Cost Per Customer', label_years(
+        'cost', outbound_prefix, results.split, results=results)
+
+    # Outbound Volume, only the routes with some volume
+    yield 'Outbound Volume Per Customer', label_years(
+        'volume', outbound_prefix, results.split, results=results)
+
+    # Sensitivity, one block of rows per year, read one table at a time
+    years = [year for year, kept in zip(results.years, results.sensitivity)
+             if kept]
+    for key, name in [('constraints', 'Constraint Sensitivity'),
+                      ('variables', 'Route Sensitivity')]:
+        if years:
+            yield name, pd.concat(
+                [read_table(year, key, results=results).assign(Year=year)
+                 for year in years], ignore_index=True)
+
+
+def _cells(df):
+    """Rows of a table as Excel cells: missing values are empty and
+    infinite values are 'inf' / '-inf', as pandas.DataFrame.to_excel"""
+
+    columns = []
+    for _, column in df.items():
+        values = column.to_numpy(dtype=object)
+        values[column.isna().to_numpy()] = None
+
+        if column.dtype.kind == 'f':
+            values[np.isposinf(column.to_numpy())] = 'inf'
+            values[np.isneginf(column.to_numpy())] = '-inf'
+
+        columns.append(values)
+
+    return zip(*columns)
+
+
+def write_xlsx(tables, location):
+    """Write the tables to the sheets of an Excel file. The workbook is
+    write-only, its rows are streamed to disk as they are appended."""
+
+    workbook = openpyxl.Workbook(write_only=True)
+
+    for name, df in tables:
+        sheet = workbook.create_sheet(name)
+        sheet.append(list(df.columns))
+        for row in _cells(df):
+            sheet.append(row)
+
+    workbook.save(location)
+
+
+def _table_location(location, name, extension):
+    """One file per table: "<location without extension> - <name>.ext" """
+
+    return f'{os.path.splitext(location)[0]} - {name}{extension}'
+
+
+def write_csv(tables, location):
+    """Write every table to its own CSV file, see _table_location"""
+
+    for name, df in tables:
+        df.to_csv(_table_location(location, name, '.csv'), index=False)
+
+
+def _arrow_table(df):
+    """Table in Arrow format, whose column names have to be strings"""
+
+    return pyarrow.Table.from_pandas(df.rename(columns=str),
+                                     preserve_index=False)
+
+
+def write_parquet(tables, location):
+    """Write every table to its own Parquet file (needs pyarrow)"""
+
+    check(pyarrow is not None, 'Parquet export needs pyarrow installed')
+
+    for name, df in tables:
+        parquet.write_table(
+            _arrow_table(df), _table_location(location, name, '.parquet'))
+
+
+def write_arrow(tables, location):
+    """Write every table to its own Arrow (Feather) file (needs pyarrow)"""
+
+    check(pyarrow is not None, 'Arrow export needs pyarrow installed')
+
+    for name, df in tables:
+        feather.write_feather(
+            _arrow_table(df), _table_location(location, name, '.arrow'))
+
+
+# Writer of every output format, add a writer(tables, location) here to
+# support another format
+exporters = {'xlsx': write_xlsx, 'xlsm': write_xlsx, 'csv': write_csv,
+             'parquet': write_parquet, 'arrow': write_arrow,
+             'feather': write_arrow}
+
+
+def export(location=None, output_format=None, data=Data, results=Results):
+    """
+    Save the results to the output file(s), see result_tables.
+
+    Parameters
+    ----------
+    location: str (filepath)
+        Path of the output file, Results.save_location by default
+    output_format: str
+        Key of exporters (e.g. 'xlsx', 'csv', 'parquet', 'arrow'), the
+        extension of location by default. The formats other than Excel
+        write one file per table next to location.
+    """
+
+    location = location or results.save_location
+    output_format = output_format or \
+        os.path.splitext(location)[1].lstrip('.').lower()
+
+    check(output_format in exporters,
+          f'Unknown output format {output_format!r}, one of {list(exporters)}')
+
+    exporters[output_format](result_tables(data=data, results=results),
+                             location)
+
+
+def save_to_excel(data=Data, results=Results):
+    """
+    Method to save volume and cost data to Excel file
+
+    Inputs from data.py
+    -------------------
+    Results.save_location: str (filepath)
+        Path to save output Excel file
+
+    The tables are those of result_tables.
+    """
+
+    export(results.save_location, 'xlsx', data=data, results=results)
@@ -0,0 +1,178 @@
+from model import *
+from contextlib import contextmanager
+import threading
+import time
+import tracemalloc
+
+# Callbacks of the spans, see add_hook
+hooks = []
+
+# Spans open in every thread, innermost last, see _open
+_spans = threading.local()
+
+
+def _open():
+    """Spans open in the current thread, so that the spans of threads
+    running side by side (e.g. the job server) do not nest in one another"""
+
+    if not hasattr(_spans, 'open'):
+        _spans.open = []
+
+    return _spans.open
+
+
+class Span:
+
+    """
+    Step of a run (e.g. a generate_* function, the solve or the export),
+    used as a context manager. On exit, its record goes to every hook:
+
+    - 'name': name of the step
+    - 'parent': name of the span it is nested in (None at the top)
+    - 'time': wall time in seconds
+    - 'peak memory': peak of the memory allocated in the step, in bytes,
+      only while tracemalloc is tracing (see recording). tracemalloc
+      traces the whole process, so the peak of a span also counts what
+      other threads allocate meanwhile: it is only the step's own in a
+      single-threaded run
+    - 'failed': True when the step raised an exception
+    - the info of span(name, **info) and Span.set, e.g. 'year', 'shape',
+      'nonzeros' or 'iterations'
+    """
+
+    __slots__ = ('record', 'start', 'memory', 'peak')
+
+    def __init__(self, name, info):
+        spans = _open()
+        self.record = {'name': name,
+                       'parent': spans[-1].record['name'] if spans else None,
+                       **info}
+
+    def set(self, **info):
+        """Add info to the record of the span"""
+
+        self.record.update(info)
+
+    def matrix(self, matrix):
+        """Add the shape and number of non-zeros of a matrix or vector"""
+
+        self.record['shape'] = matrix.shape
+        self.record['nonzeros'] = matrix.nnz if sparse.issparse(matrix) \
+            else int(np.count_nonzero(matrix))
+
+    def __enter__(self):
+        spans = _open()
+        self.memory = None
+
+        if tracemalloc.is_tracing():
+            # The enclosing span keeps the peak it has reached so far
+            self.memory, peak = tracemalloc.get_traced_memory()
+            if spans:
+                spans[-1].peak = max(spans[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.peak = 0
+
+        spans.append(self)
+        self.start = time.perf_counter()
+
+        return self
+
+    def __exit__(self, error, *_):
+        self.record['time'] = time.perf_counter() - self.start
+        self.record['failed'] = error is not None
+        spans = _open()
+        spans.pop()
+
+        if self.memory is not None and tracemalloc.is_tracing():
+            peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            self.record['peak memory'] = peak - self.memory
+            if spans:
+                spans[-1].peak = max(spans[-1].peak, peak)
+
+        for hook in hooks:
+            hook(self.record)
+
+
+class _NullSpan:
+
+    """Span used while no hook is registered, which does nothing"""
+
+    __slots__ = ()
+
+    def set(self, **info):
+        pass
+
+    def matrix(self, matrix):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+
+_null_span = _NullSpan()
+
+
+def span(name, **info):
+    """
+    Span of a step, to use as "with span('step', year=2022) as step:".
+    While no hook is registered it is a shared span that does nothing, so
+    instrumentation costs next to nothing when it is off.
+    """
+
+    return Span(name, info) if hooks else _null_span
+
+
+def add_hook(hook):
+    """Call hook(record) at the end of every span, see Span"""
+
+    hooks.append(hook)
+
+
+def remove_hook(hook):
+    """Stop calling a hook added by add_hook"""
+
+    hooks.remove(hook)
+
+
+@contextmanager
+def recording(memory=False):
+    """
+    Record every span of a block, e.g. from a notebook:
+
+        with recording(memory=True) as records:
+            execute()
+        pd.DataFrame(records)
+
+    Only the spans of this process are recorded, not those of the worker
+    processes (execute(workers=...), optimize(decompose=True)). The spans
+    of every thread are recorded, each nested in the spans of its own
+    thread, but the peak memory is that of the whole process (see Span).
+
+    Parameters
+    ----------
+    memory: bool
+        Trace the memory with tracemalloc during the block, which slows
+        it down, to get the peak memory of every span
+
+    Yields
+    ------
+    list
+        Records of the spans, in the order they end
+    """
+
+    records = []
+    trace = memory and not tracemalloc.is_tracing()
+
+    if trace:
+        tracemalloc.start()
+    add_hook(records.append)
+
+    try:
+        yield records
+    finally:
+        remove_hook(records.append)
+        if trace:
+            tracemalloc.stop()
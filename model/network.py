@@ -0,0 +1,331 @@
+from model import *
+from model.data import Data
+import heapq
+
+
+def transportation_problem(data=Data):
+    """
+    Reduce the linear program to a transportation problem, when its
+    constraints are network representable.
+
+    That is the case when every outbound column sits in exactly one
+    demand row and in at most one capacity and one supply row, and
+    every inbound column feeds at most one supply row, i.e. when each
+    product belongs to at most one capacity and one supply constraint.
+    Inbound is then never worth more than the cheapest unit cost
+    (cost / efficiency) of the supply row it feeds, so it is folded into
+    the cost of the outbound columns of that row. What is left is a
+    transportation problem from capacity rows (sources) to demand rows
+    (sinks).
+
+    Inputs from data.py
+    -------------------
+    Data.objective_vector: numpy.ndarray
+        Objective vector to minimize function value.
+
+    Data.constraints_matrix: scipy.sparse.csr_matrix
+        Constraints matrix to implement demand, capacity, supply constraints.
+
+    Data.constraints_vector: numpy.ndarray
+        Vector associated with the constraints matrix.
+
+    Data.dimF, Data.dimC, Data.capacity_rows, Data.supply_rows: int
+        Dimensions of the blocks of the constraints matrix
+
+    Data.route_cost_limit: float
+        Routes above this outbound cost (or without cost) get no arc, as
+        presolve removes them
+
+    Returns
+    -------
+    dict or None
+        Arrays describing the transportation problem (see optimize),
+        None if the constraints are not network representable.
+    """
+
+    matrix = data.constraints_matrix.tocsc()
+    cost = data.objective_vector
+    bound = data.constraints_vector.flatten()
+    supply_start = data.dimC + data.capacity_rows
+
+    rows, values = matrix.indices, matrix.data
+    columns = np.repeat(np.arange(matrix.shape[1]), np.diff(matrix.indptr))
+
+    # Block of every non-zero: 0 demand, 1 capacity, 2 supply
+    block = np.searchsorted([data.dimC, supply_start], rows, side='right')
+    inbound = columns < data.dimF
+
+    counts = np.zeros((matrix.shape[1], 3), dtype=int)
+    np.add.at(counts, (columns, block), 1)
+
+    # Verify the network structure
+    if not (np.all(counts[:data.dimF, :2] == 0)
+            and np.all(counts[:data.dimF, 2] <= 1)
+            and np.all(counts[data.dimF:, 0] == 1)
+            and np.all(counts[data.dimF:, 1:] <= 1)
+            and np.all(values[block == 0] == -1)
+            and np.all(values[~inbound & (block > 0)] == 1)
+            and np.all(values[inbound] < 0)):
+        return None
+
+    # Sink, source and supply row of every outbound column, where the
+    # source Data.capacity_rows gathers the columns without capacity row
+    outbound = columns - data.dimF
+    sink = np.empty(data.dimFC, dtype=int)
+    source = np.full(data.dimFC, data.capacity_rows)
+    supply = np.full(data.dimFC, -1)
+
+    select = block == 0
+    sink[outbound[select]] = rows[select]
+    select = block == 1
+    source[outbound[select]] = rows[select] - data.dimC
+    select = ~inbound & (block == 2)
+    supply[outbound[select]] = rows[select] - supply_start
+
+    # Cheapest inbound column feeding every supply row
+    select = inbound & (block == 2)
+    feed_rows, feed_columns = rows[select] - supply_start, columns[select]
+    efficiency = -values[select]
+    unit_cost = cost[feed_columns] / efficiency
+
+    order = np.lexsort((unit_cost, feed_rows))
+    first = order[np.unique(feed_rows[order], return_index=True)[1]]
+
+    supply_cost = np.full(data.supply_rows, np.inf)
+    supply_cost[feed_rows[first]] = unit_cost[first]
+    supply_column = np.full(data.supply_rows, -1)
+    supply_column[feed_rows[first]] = feed_columns[first]
+    supply_efficiency = np.ones(data.supply_rows)
+    supply_efficiency[feed_rows[first]] = efficiency[first]
+
+    # Outbound cost plus the unit cost of the inbound it needs. Columns of
+    # a supply row that nothing feeds cannot carry any volume.
+    arc_cost = cost[data.dimF:] + np.where(
+        supply >= 0, supply_cost[np.maximum(supply, 0)], 0)
+    arc_cost[~(cost[data.dimF:] <= data.route_cost_limit)] = np.inf
+
+    return {'source': source, 'sink': sink, 'supply': supply,
+            'cost': arc_cost,
+            'capacity': np.append(bound[data.dimC:supply_start], np.inf),
+            'demand': -bound[:data.dimC],
+            'supply_column': supply_column,
+            'supply_efficiency': supply_efficiency}
+
+
+def _shortest_paths(weight, origin):
+    """
+    Bellman-Ford on a dense weight matrix (np.inf where there is no edge),
+    from every node of the boolean mask origin at once. Returns the
+    distances and the previous node on the shortest paths (-1 at origins).
+    """
+
+    distance = np.where(origin, 0., np.inf)
+    previous = np.full(weight.shape[0], -1)
+    nodes = np.arange(weight.shape[0])
+
+    # Unreachable nodes are compared as inf - inf
+    with np.errstate(invalid='ignore'):
+        for _ in nodes:
+            candidate = distance[:, np.newaxis] + weight
+            best = np.argmin(candidate, axis=0)
+            candidate = candidate[best, nodes]
+
+            shorter = distance - candidate > 1e-12 * (1 + np.abs(candidate))
+
+            if not np.any(shorter):
+                break
+
+            distance[shorter] = candidate[shorter]
+            previous[shorter] = best[shorter]
+
+    return distance, previous
+
+
+def min_cost_flow(source, sink, cost, capacity, demand):
+    """
+    Solve a transportation problem with few sources and many sinks by
+    successive shortest paths.
+
+    Every sink first takes its cheapest arc, which meets all demand at
+    minimum cost but may overload some sources. The overload is then
+    shipped out along shortest paths of transfers, a transfer a -> b
+    moving part of a sink served by source a onto its arc from source b,
+    until every source is within capacity. Paths only visit sources, so
+    each shortest path is a Bellman-Ford on a (#sources x #sources)
+    matrix, whose entries are kept up to date from lazy heaps of the
+    candidate transfers.
+
+    Parameters
+    ----------
+    source, sink: numpy.ndarray
+        Source and sink of every arc
+    cost: numpy.ndarray
+        Unit cost of every arc (np.inf for unusable arcs)
+    capacity: numpy.ndarray
+        Capacity of every source (np.inf for unbounded)
+    demand: numpy.ndarray
+        Demand of every sink
+
+    Returns
+    -------
+    numpy.ndarray or None
+        Optimal flow on every arc, None when the problem is infeasible
+    """
+
+    no_sources = capacity.size
+    tolerance = 1e-9 * max(demand.max(initial=0), 1)
+
+    # Arcs grouped by sink, cheapest first
+    usable = np.flatnonzero(np.isfinite(cost))
+    by_sink = usable[np.lexsort((cost[usable], sink[usable]))]
+    starts = np.searchsorted(sink[by_sink], np.arange(demand.size + 1))
+
+    if np.any(np.diff(starts) == 0):
+        return None  # Some sink has no usable arc
+
+    flow = np.zeros(cost.size)
+    cheapest = by_sink[starts[:-1]]
+    flow[cheapest] = demand
+
+    excess = np.bincount(source, weights=flow,
+                         minlength=no_sources) - capacity
+
+    # Candidate transfers (delta cost, arc losing, arc gaining), sorted
+    # per pair of sources. They become stale once the losing arc empties.
+    losing, gaining = cheapest[sink[by_sink]], by_sink
+    select = source[losing] != source[gaining]
+    losing, gaining = losing[select], gaining[select]
+
+    delta = cost[gaining] - cost[losing]
+    pair = source[losing] * no_sources + source[gaining]
+
+    order = np.lexsort((delta, pair))
+    delta, losing, gaining = delta[order], losing[order], gaining[order]
+    bounds = np.searchsorted(pair[order], np.arange(no_sources ** 2 + 1))
+    pointer = bounds[:-1].copy()
+    heaps = [[] for _ in range(no_sources ** 2)]
+
+    def best_transfer(key):
+        """Cheapest valid transfer of a pair of sources"""
+
+        while pointer[key] < bounds[key + 1] and \
+                flow[losing[pointer[key]]] <= tolerance:
+            pointer[key] += 1
+        while heaps[key] and flow[heaps[key][0][1]] <= tolerance:
+            heapq.heappop(heaps[key])
+
+        candidates = []
+        if pointer[key] < bounds[key + 1]:
+            index = pointer[key]
+            candidates.append((delta[index], losing[index], gaining[index]))
+        if heaps[key]:
+            candidates.append(heaps[key][0])
+
+        return min(candidates) if candidates else (np.inf, -1, -1)
+
+    weight = np.full((no_sources, no_sources), np.inf)
+    transfer = np.full((no_sources, no_sources, 2), -1)
+    dirty = set(range(no_sources))
+
+    while np.any(excess > tolerance):
+
+        # Refresh the transfers out of the sources whose arcs changed
+        for a in dirty:
+            for b in range(no_sources):
+                if a != b:
+                    weight[a, b], arc_out, arc_in = best_transfer(
+                        a * no_sources + b)
+                    transfer[a, b] = arc_out, arc_in
+        dirty = set()
+
+        # Shortest paths from every overloaded source at once
+        distance, previous = _shortest_paths(weight, excess > tolerance)
+
+        # Closest source with spare capacity
+        reachable = (excess < -tolerance) & np.isfinite(distance)
+        if not np.any(reachable):
+            return None  # Not enough capacity
+
+        node = np.argmin(np.where(reachable, distance, np.inf))
+        end, path = node, []
+
+        while previous[node] != -1 and len(path) < no_sources:
+            path.append(transfer[previous[node], node])
+            node = previous[node]
+
+        if previous[node] != -1:
+            return None  # Numerical cycle, let HiGHS handle it
+
+        # Augment by the bottleneck of the path
+        amount = min([excess[node], -excess[end]] +
+                     [flow[arc] for arc, _ in path])
+
+        for arc_out, arc_in in path:
+            if flow[arc_in] <= tolerance:
+                # The arc starts carrying flow, so it can now hand it
+                # over to the other arcs of its sink
+                others = by_sink[starts[sink[arc_in]]:
+                                 starts[sink[arc_in] + 1]]
+                for other in others[source[others] != source[arc_in]]:
+                    heapq.heappush(
+                        heaps[source[arc_in] * no_sources + source[other]],
+                        (cost[other] - cost[arc_in], arc_in, other))
+                dirty.add(source[arc_in])
+
+            flow[arc_out] -= amount
+            flow[arc_in] += amount
+
+            if flow[arc_out] <= tolerance:
+                dirty.add(source[arc_out])
+
+        excess[node] -= amount
+        excess[end] += amount
+
+    return flow
+
+
+def network_solve(data=Data):
+    """
+    Solve the linear program as a min-cost flow, see transportation_problem
+    and min_cost_flow.
+
+    Inputs to data.py
+    -----------------
+    Same as transportation_problem
+
+    Output to data.py
+    -----------------
+    Data.linear_program: numpy.ndarray
+        Optimal solution of the linear program, in the same variable order
+        as the objective vector
+
+    Returns
+    -------
+    bool
+        False when the constraints are not network representable or the
+        flow is infeasible, in which case Data.linear_program is not set
+        and the caller should fall back to HiGHS.
+    """
+
+    problem = transportation_problem(data=data)
+    if problem is None:
+        return False
+
+    flow = min_cost_flow(problem['source'], problem['sink'], problem['cost'],
+                         problem['capacity'], problem['demand'])
+    if flow is None:
+        return False
+
+    # Outbound volumes are the flow, inbound volumes feed the outbound
+    # volume of every supply row from its cheapest inbound column
+    supply = problem['supply']
+    load = np.bincount(supply[supply >= 0], weights=flow[supply >= 0],
+                       minlength=data.supply_rows)
+    fed = load > 0
+
+    data.linear_program = np.zeros(data.dimF + data.dimFC)
+    data.linear_program[data.dimF:] = flow
+    data.linear_program[problem['supply_column'][fed]] = \
+        load[fed] / problem['supply_efficiency'][fed]
+
+    return True
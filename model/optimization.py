@@ -1,8 +1,26 @@
 from model import *
-from model.data import Data
+from model.data import Data, Model, SETTINGS
+from model.network import network_solve
+from model.colgen import column_generation
+from model.presolve import reduce_program, expand_solution
+from model.instrument import span
+from model.validation import validating, check, check_constraints
+from model.solvers import default_backend, highs_model, run_highs, solve
+from model.preprocessing import index_columns
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import hashlib
 
 
-def generate_objective_vector():
+def _strip_zero_rows(matrix):
+    """Remove the all-zero rows of a sparse CSR matrix"""
+
+    matrix.eliminate_zeros()
+
+    return matrix[np.diff(matrix.indptr) > 0]
+
+
+def generate_objective_vector(data=Data):
     """
     Inputs to data.py
     -----------------
@@ -11,7 +29,8 @@ def generate_objective_vector():
 
     Data.outbound_cost_per_product: dict
         Dictionary containing the outbound cost from factories to customer
-        for all products.
+        for all products, or None when Data.outbound_rates is given (see
+        expand_rates)
 
     Data.dimF: int
         Σ|F| (total number of factories across all products)
@@ -29,51 +48,94 @@ def generate_objective_vector():
 
     """
 
-    # Verify inputs
-    assert isinstance(Data.inbound_cost_per_product,
-                      dict), 'Inbound costs must be given in a dictionary'
-    assert isinstance(Data.outbound_cost_per_product,
-                      dict), 'Outbound costs must be given in a dictionary'
-
-    # Verify inputs dimension
-    assert (len(Data.inbound_cost_per_product) == len(Data.product_list)), \
-        'Number of products in Inbound cost per product is incorrect'
-    assert (len(Data.outbound_cost_per_product) == len(Data.product_list)), \
-        'Number of products in Outbound cost per product is incorrect'
-    assert np.all(np.array([Data.dimF, Data.dimC, Data.dimFC]) > 0), \
-        'Dimensions of constraints matrices must be positive'
-
-    # Reshape dictionary inputs into vectors
-    # Unpack inbound cost dictionary and stack into row vector
-    inbound_cost_vector = np.hstack(
-        list(Data.inbound_cost_per_product.values()))
-
-    # Unpack outbound cost dictionary in factory-then-customer major
-    outbound_cost_vector = np.hstack([
-        prod.flatten('F') for prod in Data.outbound_cost_per_product.values()
-    ])
+    rated = getattr(data, 'outbound_rates', None) is not None
+
+    if validating('cheap', data):
+        # Verify inputs
+        check(isinstance(data.inbound_cost_per_product, dict),
+              'Inbound costs must be given in a dictionary')
+        check(rated or isinstance(data.outbound_cost_per_product, dict),
+              'Outbound costs must be given in a dictionary')
+
+        # Verify inputs dimension
+        check(len(data.inbound_cost_per_product) == len(data.product_list),
+              'Number of products in Inbound cost per product is incorrect')
+        check(rated or
+              len(data.outbound_cost_per_product) == len(data.product_list),
+              'Number of products in Outbound cost per product is incorrect')
+        check(min(data.dimF, data.dimC, data.dimFC) > 0,
+              'Dimensions of constraints matrices must be positive')
+
+    # Unpack the cost dictionaries into blocks, the outbound ones in
+    # factory-then-customer major. ravel does not copy 1-D blocks, e.g. the
+    # memory-mapped ones of raw_inputs
+    inbound_blocks = [np.ravel(cost)
+                      for cost in data.inbound_cost_per_product.values()]
+    outbound_blocks = [expand_rates(data=data)] if rated else [
+        np.ravel(cost, 'F')
+        for cost in data.outbound_cost_per_product.values()]
+
+    if validating('cheap', data):
+        # Verify output dimension
+        # Inbound cost vector dimension = (∑|F|)
+        check(sum(block.size for block in inbound_blocks) == data.dimF,
+              'Dimension of the inbound cost vector is incorrect (∑|F|)')
+
+        # Outbound cost vector dimension = (∑|FxC|)
+        check(sum(block.size for block in outbound_blocks) == data.dimFC,
+              'Dimension of the outbound cost vector is incorrect (∑|FxC|)')
+
+    # Copy the inbound and outbound cost once, into the objective vector
+    data.objective_vector = np.concatenate(inbound_blocks + outbound_blocks,
+                                           dtype=np.float64)
+
+    # Verify positivity, a NaN outbound cost marks a route that cannot be
+    # used (removed by presolve)
+    if validating('cheap', data):
+        check(np.all(data.objective_vector[:data.dimF] > 0) and
+              not np.any(data.objective_vector[data.dimF:] <= 0),
+              'Objective vector must be positive')
+
+
+def expand_rates(data=Data):
+    """
+    Outbound cost of every outbound column from the rate of its customer's
+    province and its factory (see preprocessing.rate_inputs), gathered
+    through Data.column_index, in the order of generate_objective_vector.
 
-    # Verify output dimension
-    # Inbound cost vector dimension = (∑|F|)
-    assert inbound_cost_vector.shape == (
-        Data.dimF,
-    ), 'Dimension of the inbound cost vector is incorrect (∑|F|)'
+    Inputs from data.py
+    -------------------
+    Data.outbound_rates: numpy.ndarray
+        (province x factory) outbound rates
+
+    Data.customer_rate_rows: numpy.ndarray
+        Row of Data.outbound_rates of every customer
 
-    # Outbound cost vector dimension = (∑|FxC|)
-    assert outbound_cost_vector.shape == (
-        Data.dimFC,), 'Dimension of the outbound cost vector is incorrect (' \
-                      '∑|FxC|)'
+    Data.outbound_adjustment: numpy.ndarray
+        Factor of the cost of every customer (None for no adjustment)
+
+    Data.column_index: numpy.ndarray
+        Codes of the product, factory and customer of every column
+
+    Returns
+    -------
+    numpy.ndarray
+        Outbound cost vector, (Σ|FxC|)
+    """
 
-    # Horizontally stack inbound and outbound cost into row vectors
-    Data.objective_vector = np.hstack(
-        [inbound_cost_vector, outbound_cost_vector]).astype(np.float64)
+    outbound = data.column_index[data.dimF:]
+    customers = outbound['customer']
 
-    # Verify positivity
-    assert np.all(
-        Data.objective_vector > 0), 'Objective vector must be positive'
+    cost = data.outbound_rates[data.customer_rate_rows[customers],
+                               outbound['factory']]
 
+    if data.outbound_adjustment is not None:
+        cost *= data.outbound_adjustment[customers]
 
-def generate_demand_matrix():
+    return cost
+
+
+def generate_demand_matrix(data=Data):
     """
     Inputs from data.py
     -------------------
@@ -97,7 +159,7 @@ def generate_demand_matrix():
 
     Output to data.py
     -----------------
-    Data.demand_matrix: numpy.ndarray
+    Data.demand_matrix: scipy.sparse.csr_matrix
         Demand matrix to realize customers' demand, made by horizontally
         concatenate the inbound and outbound demand matrix.
         This matrix has to be negative to reflect the bigger than or equal to
@@ -105,60 +167,65 @@ def generate_demand_matrix():
 
     """
 
-    # Verify inputs type
-    assert isinstance(Data.customer_sizes,
-                      dict), 'Customer sizes must be given in a dictionary'
-    assert isinstance(sum(Data.customer_sizes.values()),
-                      int), 'Customer sizes values must be integers'
-    assert isinstance(Data.factory_sizes,
-                      dict), 'Factory sizes values must be a dictionary'
-    assert isinstance(sum(Data.factory_sizes.values()),
-                      int), 'Factory sizes values must be integers'
-    assert isinstance(Data.product_list,
-                      list), 'Product list must be given in a list (Duhh!?)'
-
-    # Verify inputs values
-    assert np.all(np.array(list(Data.customer_sizes.values())) > 0
-                  ), 'Customer sizes must be positive'
-
-    assert np.all(np.array(list(Data.factory_sizes.values())) > 0
-                  ), 'Factory sizes must be positive'
-
-    # Verify input length
-    assert len(Data.product_list) > 0, 'Number of products in list to ' \
-                                       'optimize must be positive'
-    assert (len(Data.customer_sizes) == len(Data.product_list)), \
-        'Number of products in customer sizes is incorrect'
-    assert (len(Data.factory_sizes) == len(Data.product_list)), \
-        'Number of products in factory sizes is incorrect'
-
-    # Reshape dictionary inputs into matrices
-    # Construct zero inbound cost matrix (Σ|C|, Σ|F|)
-    inbound_demand_matrix = np.zeros(
-        (Data.dimC, Data.dimF))  # Demand Inbound Block
-
-    # Construct block diagonal outbound cost matrix (Σ|C|, Σ|FxC|)
-    outbound_demand_matrix = block_diag(*[
-        np.tile(np.eye(Data.customer_sizes[product]),
-                reps=Data.factory_sizes[product])
-        for product in Data.product_list
-    ])  # Demand Outbound Block
+    if validating('cheap', data):
+        # Verify inputs type
+        check(isinstance(data.customer_sizes, dict),
+              'Customer sizes must be given in a dictionary')
+        check(isinstance(sum(data.customer_sizes.values()), int),
+              'Customer sizes values must be integers')
+        check(isinstance(data.factory_sizes, dict),
+              'Factory sizes values must be a dictionary')
+        check(isinstance(sum(data.factory_sizes.values()), int),
+              'Factory sizes values must be integers')
+        check(isinstance(data.product_list, list),
+              'Product list must be given in a list (Duhh!?)')
+
+        # Verify input length
+        check(len(data.product_list) > 0,
+              'Number of products in list to optimize must be positive')
+        check(len(data.customer_sizes) == len(data.product_list),
+              'Number of products in customer sizes is incorrect')
+        check(len(data.factory_sizes) == len(data.product_list),
+              'Number of products in factory sizes is incorrect')
+
+        # Verify inputs values
+        check(min(data.customer_sizes.values()) > 0,
+              'Customer sizes must be positive')
+        check(min(data.factory_sizes.values()) > 0,
+              'Factory sizes must be positive')
+
+    # Build the outbound block straight from its index arrays.
+    # Columns are factory-then-customer major per product, so the column
+    # of (factory f, customer c) of a product sits on the row of c
+    demand_rows, row_offset = [], 0
+    for product in data.product_list:
+        demand_rows.append(row_offset + np.tile(
+            np.arange(data.customer_sizes[product]),
+            reps=data.factory_sizes[product]))
+        row_offset += data.customer_sizes[product]
+
+    demand_rows = np.hstack(demand_rows)
 
     # Verify output dimension
     # Outbound demand matrix dimension = (Σ|C|, Σ|FxC|)
-    assert outbound_demand_matrix.shape == (Data.dimC, Data.dimFC), \
-        'Dimension of outbound demand matrix is incorrect (Σ|C|, Σ|FxC|)'
+    if validating('cheap', data):
+        check((row_offset, demand_rows.size) == (data.dimC, data.dimFC),
+              'Dimension of outbound demand matrix is incorrect '
+              '(Σ|C|, Σ|FxC|)')
 
-    # Horizontally stack inbound and outbound block into the full demand matrix
-    Data.demand_matrix = -np.hstack(
-        [inbound_demand_matrix, outbound_demand_matrix])
+    # The inbound block (Σ|C|, Σ|F|) is all zeros, so the outbound columns
+    # are shifted by Σ|F| in the full demand matrix
+    data.demand_matrix = sparse.csr_matrix(
+        (-np.ones(data.dimFC), (demand_rows, data.dimF + np.arange(
+            data.dimFC))), shape=(data.dimC, data.dimF + data.dimFC))
 
-    # Verify non-negative
-    assert np.all(
-        Data.demand_matrix <= 0), 'Demand matrix must be negative'
+    # Verify non-positive, true by construction
+    if validating('full', data):
+        check(np.all(data.demand_matrix.data <= 0),
+              'Demand matrix must be negative')
 
 
-def generate_combination_matrices():
+def generate_combination_matrices(data=Data):
     """
     Inputs to data.py
     -----------------
@@ -183,128 +250,118 @@ def generate_combination_matrices():
     Outputs to data.py
     ------------------
     Data.inbound_combination_matrices: dict
-        Dictionary of block diagonal matrices containing the production
-        efficiency of a factory {product: associated matrix}. Each
-        product corresponds to a matrix with:
+        Dictionary of sparse (CSR) block diagonal matrices containing the
+        production efficiency of a factory {product: associated matrix}.
+        Each product corresponds to a matrix with:
             - #Columns: ∑|F| (total number of factories across all products)
             - #Rows: # Factories (total number of factories)
 
     Data.outbound_combination_matrices: dict
-        Dictionary of block diagonal matrices to apply outbound constraints
-        on a per-factory basis. {product: associated matrix}. Each product
-        corresponds to a matrix with:
+        Dictionary of sparse (CSR) block diagonal matrices to apply outbound
+        constraints on a per-factory basis. {product: associated matrix}.
+        Each product corresponds to a matrix with:
             - #Column: ∑|FxC| (total number of factories x customers
             across all products)
             - #Rows: # Factories (total
             number of factories)
     """
 
-    # Verify inputs type
-    assert isinstance(
-        Data.efficiency_per_product,
-        dict), 'Efficiency per product must be given in a dictionary'
-    assert isinstance(Data.factory_names,
-                      dict), 'Factory names must be given in a dictionary'
-
-    # Verify inputs values
-    assert len(
-        Data.product_list) > 0, 'Number of products in list to ' \
-                                'optimize must be positive'
-    assert len(Data.factory_list
-               ) > 0, 'Number of factories in list to optimize must be ' \
-                      'positive'
-    assert np.all(np.hstack(list(Data.efficiency_per_product.values())) > 0
-                  ), 'Efficiency must be positive'
-    assert np.all(
-        np.array([len(prod) for prod in
-                  Data.factory_names.values()]) >= 0), 'There are no ' \
-                                                       'factories to ' \
-                                                       'optimize for some ' \
-                                                       'products!'
-    assert np.all(
-        np.array([len(prod) for prod in Data.factory_names.values()]) <= len(
-            Data.factory_list)), 'There are more factory names than allowed'
+    # Efficiency of every inbound column, checked and used below
+    efficiency = np.hstack(list(data.efficiency_per_product.values()))
+
+    if validating('cheap', data):
+        # Verify inputs type
+        check(isinstance(data.efficiency_per_product, dict),
+              'Efficiency per product must be given in a dictionary')
+        check(isinstance(data.factory_names, dict),
+              'Factory names must be given in a dictionary')
+
+        # Verify inputs values
+        check(len(data.product_list) > 0,
+              'Number of products in list to optimize must be positive')
+        check(len(data.factory_list) > 0,
+              'Number of factories in list to optimize must be positive')
+        check(np.all(efficiency > 0), 'Efficiency must be positive')
+        check(max(map(len, data.factory_names.values())) <=
+              len(data.factory_list),
+              'There are more factory names than allowed')
 
     # Build the combination matrix
     """
-    Starting from the inside out, we first 
-    iterate over all the product. 
-    For a given product "p", we put the 
-    corresponding efficiency value  
-    in the place of the factories that produce 
-    the product and [] in the 
-    place of factories that don't. Then, 
-    we form each product into a block 
-    using the block_diag function. After which, 
-    we build the matrix using 
-    block_diag on all the previous blocks. 
-    Lastly, add a negative sign per
-    the model.
+    Each product owns a block of #F rows (one per factory in
+    Data.factory_list). A factory that produces the product gets one
+    inbound column, holding minus its efficiency, and one outbound
+    column per customer of the product, holding a 1. Columns are handed
+    out in order, so we only need the row of every column to build both
+    matrices straight from their index arrays.
     """
 
-    # Generator to iterate over efficiency elements
-    efficiency_array = (
-        eff_arr
-        for eff_arr in np.hstack(list(Data.efficiency_per_product.values())))
-
-    inbound_combination_matrix = -block_diag(*[
-        block_diag(*block) for block in [[
-            next(efficiency_array)
-            if factory in Data.factory_names[product] else []
-            for factory in Data.factory_list
-        ] for product in Data.product_list]
-    ])
-    """
-    Starting from the inside out, we first iterate over all the product. 
-    For a given product "p", we put a list [1 * #customer buying "p"] 
-    in the place of the factories that product and [] in the place of 
-    factories that don't. Then, we form each product into a block using
-    the block_diag function. After which, we build the matrix using 
-    block_diag on all the previous blocks.
-    """
+    inbound_rows, outbound_rows = [], []
+    for index, product in enumerate(data.product_list):
+        # Rows of the factories that produce the product
+        rows = index * len(data.factory_list) + np.flatnonzero([
+            factory in data.factory_names[product]
+            for factory in data.factory_list
+        ])
 
-    outbound_combination_matrix = block_diag(*[
-        block_diag(*block)
-        for block in [
-            [
-                [1] * Data.customer_sizes[product]
-                if factory in Data.factory_names[product] else []
-                for factory in Data.factory_list]
-            for product in Data.product_list
-        ]
-    ])
+        inbound_rows.append(rows)
+        outbound_rows.append(
+            np.repeat(rows, repeats=data.customer_sizes[product]))
 
-    # Verify matrix dimension
-    # Inbound combination matrix dimension == (Σ#Fx#P, Σ|C|)
-    assert inbound_combination_matrix.shape == (
-        len(Data.factory_list) * len(Data.product_list), Data.dimF
-    ), 'Dimension of inbound combination matrix is incorrect (Σ#Fx#P, Σ|F|)'
+    inbound_rows, outbound_rows = np.hstack(inbound_rows), \
+        np.hstack(outbound_rows)
 
-    # Outbound combination matrix dimension == (Σ#Fx#P, Σ|FxC|)
-    assert outbound_combination_matrix.shape == (
-        len(Data.factory_list) * len(Data.product_list),
-        Data.dimFC), 'Dimension of combination matrix is incorrect (Σ#Fx#P, ' \
-                     'Σ|FxC|)'
+    if validating('cheap', data):
+        # Verify matrix dimension
+        # Inbound combination matrix dimension == (Σ#Fx#P, Σ|F|)
+        check(inbound_rows.size == data.dimF,
+              'Dimension of inbound combination matrix is incorrect '
+              '(Σ#Fx#P, Σ|F|)')
+
+        # Outbound combination matrix dimension == (Σ#Fx#P, Σ|FxC|)
+        check(outbound_rows.size == data.dimFC,
+              'Dimension of combination matrix is incorrect (Σ#Fx#P, Σ|FxC|)')
+
+    no_rows = len(data.factory_list) * len(data.product_list)
+
+    inbound_combination_matrix = sparse.csr_matrix(
+        (-efficiency, (inbound_rows, np.arange(data.dimF))),
+        shape=(no_rows, data.dimF))
+
+    outbound_combination_matrix = sparse.csr_matrix(
+        (np.ones(data.dimFC), (outbound_rows, np.arange(data.dimFC))),
+        shape=(no_rows, data.dimFC))
+
+    # Split the matrix into dictionary, one block of #F rows per product
+    blocks = [slice(index * len(data.factory_list),
+                    (index + 1) * len(data.factory_list))
+              for index in range(len(data.product_list))]
 
-    # Split the matrix into dictionary
     # Inbound combination dictionary
-    Data.inbound_combination_matrices = dict(
-        zip(
-            Data.product_list,
-            np.split(inbound_combination_matrix,
-                     len(Data.product_list),
-                     axis=0)))
+    data.inbound_combination_matrices = {
+        product: inbound_combination_matrix[block]
+        for product, block in zip(data.product_list, blocks)}
 
     # Outbound combination dictionary
-    Data.outbound_combination_matrices = dict(
-        zip(
-            Data.product_list,
-            np.split(outbound_combination_matrix,
-                     len(Data.product_list),
-                     axis=0)))
+    data.outbound_combination_matrices = {
+        product: outbound_combination_matrix[block]
+        for product, block in zip(data.product_list, blocks)}
+
 
+def _check_constraints(constraints, kind, data=Data):
+    """Checks of the capacity or supply constraints (kind) and of the
+    combination matrices they are built from, see
+    validation.check_constraints"""
 
-def generate_capacity_matrix():
+    check(isinstance(data.inbound_combination_matrices, dict),
+          'Inbound combination matrices must be in a dictionary')
+    check(isinstance(data.outbound_combination_matrices, dict),
+          'Outbound combination matrices must be in a dictionary')
+
+    check_constraints(constraints, kind, data=data)
+
+
+def generate_capacity_matrix(data=Data):
     """
     Inputs to data.py
     -----------------
@@ -325,7 +382,7 @@ def generate_capacity_matrix():
 
     Outputs to data.py
     ------------------
-    Data.capacity_matrix: numpy.ndarray
+    Data.capacity_matrix: scipy.sparse.csr_matrix
         Capacity matrix to realize the factories' production capacity,
         made by concatenating the inbound and outbound capacity matrix.
 
@@ -336,95 +393,50 @@ def generate_capacity_matrix():
 
     """
 
-    # Verify inputs types
-    assert isinstance(Data.capacity_constraints,
-                      list), 'Capacity constraints must be in a list'
-
-    assert isinstance(
-        Data.inbound_combination_matrices,
-        dict), 'Inbound combination matrices must be in a dictionary'
-
-    assert isinstance(
-        Data.outbound_combination_matrices,
-        dict), 'Outbound combination matrices must be in a dictionary'
-
-    # Verify for the case cap_cons = []
-    assert len(Data.capacity_constraints
-               ) > 0, 'At least one capacity constraints must be defined'
-
-    # Verify for the case cap_cons = [[1, 2], []] (The [] is not allowed)
-    assert np.all(
-        np.array([len(cons) for cons in Data.capacity_constraints]) > 0
-    ), 'Capacity constraints cannot be empty'
-
-    # Verify for the case cap_cons = [[1, 2], [1, 2]] (the [1, 2] cannot
-    # repeat)
-    # and also that order doesn't matter ([1, 2] is equivalent to [2, 1])
-    orderless_capacity_constraints = [
-        sorted(cons) for cons in Data.capacity_constraints
-    ]
-
-    assert len({
-        tuple(cons)
-        for cons in orderless_capacity_constraints
-    }) == len(orderless_capacity_constraints
-              ), 'Capacity constraints (in any order) cannot repeat'
-
-    # Verify for the case cap_cons = [[1, 2], [0, 0]] (the [0, 0] is not
-    # allowed)
-    assert np.all(
-        np.array([len(set(cons)) for cons in Data.capacity_constraints]) ==
-        np.array([len(cons) for cons in Data.capacity_constraints])
-    ), 'A single product combination cannot appear more than once in one ' \
-       'constraints'
-
-    # Verify that the capacity combinations are in the original product_list
-    assert set(reduce(lambda a, b: a + b, Data.capacity_constraints)).issubset(
-        set(Data.product_list)), (
-            'Capacity combinations list not valid. ' +
-            'Some products are not in the defined product list')
+    if validating('cheap', data):
+        _check_constraints(data.capacity_constraints, 'Capacity', data=data)
 
     # Build the capacity matrix
     # First build the outbound matrix by adding up all the capacity constraints
-    outbound_capacity_matrix = np.vstack([
-        np.sum(
-            [Data.outbound_combination_matrices[prod] for prod in combination],
-            axis=0) for combination in Data.capacity_constraints
-    ])
-    # Strip away all-zeros rows
-    outbound_capacity_matrix = outbound_capacity_matrix[
-        ~np.all(outbound_capacity_matrix == 0, axis=1)]
+    outbound_capacity_matrix = _strip_zero_rows(sparse.vstack([
+        reduce(lambda a, b: a + b, [
+            data.outbound_combination_matrices[prod] for prod in combination
+        ]) for combination in data.capacity_constraints
+    ], format='csr'))
 
     # Then we build the all zero inbound matrix with the same number of rows
     # as the outbound matrix
-    inbound_capacity_matrix = np.zeros(
-        (outbound_capacity_matrix.shape[0], Data.dimF))
+    inbound_capacity_matrix = sparse.csr_matrix(
+        (outbound_capacity_matrix.shape[0], data.dimF))
 
     # Verify output dimensions
     # Find the number of distinct factories over all the capacity constraints
-    Data.capacity_rows = sum([
+    data.capacity_rows = sum([
         len(
             reduce(lambda a, b: a.union(b),
-                   [set(Data.factory_names[prod]) for prod in cons]))
-        for cons in Data.capacity_constraints
+                   [set(data.factory_names[prod]) for prod in cons]))
+        for cons in data.capacity_constraints
     ])
 
     # Outbound capacity dimension == (Data.capacity_rows, Σ|FxC|)
-    assert outbound_capacity_matrix.shape == (
-        Data.capacity_rows, Data.dimFC
-    ), 'Dimension of outbound capacity matrix is incorrect (' \
-       'Data.capacity_rows, Σ|FxC|)'
+    if validating('cheap', data):
+        check(outbound_capacity_matrix.shape == (data.capacity_rows,
+                                                 data.dimFC),
+              'Dimension of outbound capacity matrix is incorrect '
+              '(Data.capacity_rows, Σ|FxC|)')
 
     # Horizontally stack the inbound and outbound section to form the full
     # capacity matrix
-    Data.capacity_matrix = np.hstack(
-        [inbound_capacity_matrix, outbound_capacity_matrix])
+    data.capacity_matrix = sparse.hstack(
+        [inbound_capacity_matrix, outbound_capacity_matrix], format='csr')
 
-    assert np.all(
-        Data.capacity_matrix >= 0), 'Capacity matrix must be non-negative'
+    # True by construction
+    if validating('full', data):
+        check(np.all(data.capacity_matrix.data >= 0),
+              'Capacity matrix must be non-negative')
 
 
-def generate_supply_matrix():
+def generate_supply_matrix(data=Data):
     """
     Inputs to data.py
     -----------------
@@ -445,7 +457,7 @@ def generate_supply_matrix():
 
     Outputs to data.py
     ------------------
-    Data.supply_matrix: numpy.ndarray
+    Data.supply_matrix: scipy.sparse.csr_matrix
         Supply matrix to realize the factories' production supply,
         made by concatenating the inbound and outbound supply matrix.
 
@@ -456,115 +468,63 @@ def generate_supply_matrix():
 
     """
 
-    # Verify inputs types
-    assert isinstance(
-        Data.inbound_combination_matrices,
-        dict), 'Inbound combination matrices must be in a dictionary'
-
-    assert isinstance(
-        Data.outbound_combination_matrices,
-        dict), 'Outbound combination matrices must be in a dictionary'
-
-    assert isinstance(Data.supply_constraints,
-                      list), 'Supply constraints must be in a list'
-
-    # Verify for the case sup_cons = []
-    assert len(Data.supply_constraints
-               ) > 0, 'At least one supply constraints must be defined'
-
-    # Verify for the case sup_cons = [[1, 2], []] (The [] is not allowed)
-    assert np.all(
-        np.array([len(cons) for cons in Data.supply_constraints]) > 0
-    ), 'Supply constraints cannot be empty'
-
-    # Verify for the case sup_cons = [[1, 2], [1, 2]] (the [1, 2] cannot
-    # repeat)
-    # and also that order doesn't matter ([1, 2] is equivalent to [2, 1])
-    orderless_supply_constraints = [
-        sorted(cons) for cons in Data.supply_constraints
-    ]
-
-    assert len({
-        tuple(cons)
-        for cons in orderless_supply_constraints
-    }) == len(orderless_supply_constraints
-              ), 'Supply constraints (in any order) cannot repeat'
-
-    # Verify for the case sup_cons = [[1, 2], [0, 0]] (the [0, 0] is not
-    # allowed)
-    assert np.all(
-        np.array([len(set(cons)) for cons in Data.supply_constraints]) ==
-        np.array([len(cons) for cons in Data.supply_constraints])
-    ), 'A single product combination cannot appear more than once in one ' \
-       'constraints'
-
-    # Verify that the supply combinations are in the original product_list
-    assert set(reduce(lambda a, b: a + b, Data.supply_constraints)).issubset(
-        set(Data.product_list)), (
-            'Supply combinations list not valid. ' +
-            'Some products are not in the defined product list')
+    if validating('cheap', data):
+        _check_constraints(data.supply_constraints, 'Supply', data=data)
 
     # Build the supply matrix
     # First build the inbound matrix by adding up all the supply constraints
-    inbound_supply_matrix = np.vstack([
-        np.sum(
-            [Data.inbound_combination_matrices[prod] for prod in combination],
-            axis=0) for combination in Data.supply_constraints
-    ])
-    # Strip away all-zeros rows
-    inbound_supply_matrix = inbound_supply_matrix[
-        ~np.all(inbound_supply_matrix == 0, axis=1)]
+    inbound_supply_matrix = _strip_zero_rows(sparse.vstack([
+        reduce(lambda a, b: a + b, [
+            data.inbound_combination_matrices[prod] for prod in combination
+        ]) for combination in data.supply_constraints
+    ], format='csr'))
 
     # Then build the outbound matrix by adding up all the supply constraints
-    outbound_supply_matrix = np.vstack([
-        np.sum(
-            [Data.outbound_combination_matrices[prod] for prod in combination],
-            axis=0) for combination in Data.supply_constraints
-    ])
-    # Strip away all-zeros rows
-    outbound_supply_matrix = outbound_supply_matrix[
-        ~np.all(outbound_supply_matrix == 0, axis=1)]
+    outbound_supply_matrix = _strip_zero_rows(sparse.vstack([
+        reduce(lambda a, b: a + b, [
+            data.outbound_combination_matrices[prod] for prod in combination
+        ]) for combination in data.supply_constraints
+    ], format='csr'))
 
     # Verify output dimensions
     # Find the number of distinct factories over all the supply constraints
-    Data.supply_rows = sum([
+    data.supply_rows = sum([
         len(
             reduce(lambda a, b: a.union(b),
-                   [set(Data.factory_names[prod]) for prod in cons]))
-        for cons in Data.supply_constraints
+                   [set(data.factory_names[prod]) for prod in cons]))
+        for cons in data.supply_constraints
     ])
 
-    # Inbound supply dimension == (Data.supply_rows, Σ|F|)
-    assert inbound_supply_matrix.shape == (
-        Data.supply_rows, Data.dimF
-    ), 'Dimension of inbound supply matrix is incorrect (Data.supply_rows, ' \
-       'Σ|F|)'
+    if validating('cheap', data):
+        # Inbound supply dimension == (Data.supply_rows, Σ|F|)
+        check(inbound_supply_matrix.shape == (data.supply_rows, data.dimF),
+              'Dimension of inbound supply matrix is incorrect '
+              '(Data.supply_rows, Σ|F|)')
 
-    # Outbound supply dimension == (Data.supply_rows, Σ|FxC|)
-    assert outbound_supply_matrix.shape == (
-        Data.supply_rows, Data.dimFC
-    ), 'Dimension of outbound supply matrix is incorrect (Data.supply_rows, ' \
-       'Σ|FxC|)'
+        # Outbound supply dimension == (Data.supply_rows, Σ|FxC|)
+        check(outbound_supply_matrix.shape == (data.supply_rows, data.dimFC),
+              'Dimension of outbound supply matrix is incorrect '
+              '(Data.supply_rows, Σ|FxC|)')
 
     # Horizontally stack the inbound and outbound section to form the full
     # supply matrix
-    Data.supply_matrix = np.hstack(
-        [inbound_supply_matrix, outbound_supply_matrix])
+    data.supply_matrix = sparse.hstack(
+        [inbound_supply_matrix, outbound_supply_matrix], format='csr')
 
 
-def generate_constraints_matrix():
+def generate_constraints_matrix(data=Data):
     """
     Inputs to data.py
     -----------------
-    Data.demand_matrix: numpy.ndarray
+    Data.demand_matrix: scipy.sparse.csr_matrix
         Demand matrix to realize customers' demand, made by horizontally
         concatenate the inbound and outbound demand matrix.
 
-    Data.capacity_matrix: numpy.ndarray
+    Data.capacity_matrix: scipy.sparse.csr_matrix
         Capacity matrix to realize the factories' production capacity,
         made by concatenating the inbound and outbound capacity matrix.
 
-    Data.supply_matrix: numpy.ndarray
+    Data.supply_matrix: scipy.sparse.csr_matrix
         Supply matrix to realize the factories' production supply,
         made by concatenating the inbound and outbound supply matrix.
 
@@ -589,37 +549,49 @@ def generate_constraints_matrix():
 
     Output to data.py
     ------------------
-    Data.constraints_matrix: numpy.ndarray
+    Data.constraints_matrix: scipy.sparse.csr_matrix
         Constraints matrix to implement demand, capacity, supply constraints
     """
 
-    Data.constraints_matrix = np.vstack([Data.demand_matrix,
-                                         Data.capacity_matrix,
-                                         Data.supply_matrix])
-
-    assert Data.constraints_matrix.shape == (Data.dimC + Data.capacity_rows
-                                             + Data.supply_rows, Data.dimF +
-                                             Data.dimFC), 'Constraints ' \
-                                                          'matrix dimension ' \
-                                                          'is incorrect, ' \
-                                                          '(Σ|C| + #cap_rows ' \
-                                                          '' \
-                                                          '' \
-                                                          '' \
-                                                          '' \
-                                                          '' \
-                                                          '+ # sup_rows, ' \
-                                                          'Σ|F| + Σ|FxC|)'
-
-    assert Data.constraints_matrix.shape == Data.constraints_matrix[
-                                            :, ~np.all(
-        Data.constraints_matrix == 0, axis=0)
-                                            ][
-        ~np.all(Data.constraints_matrix == 0, axis=1)
-    ].shape, 'Constraints matrix contains columns or rows with all zeros'
-
-
-def generate_constraints_vector():
+    data.constraints_matrix = sparse.vstack([data.demand_matrix,
+                                             data.capacity_matrix,
+                                             data.supply_matrix],
+                                            format='csr')
+
+    if not validating('cheap', data):
+        return
+
+    check(data.constraints_matrix.shape ==
+          (data.dimC + data.capacity_rows + data.supply_rows,
+           data.dimF + data.dimFC),
+          'Constraints matrix dimension is incorrect, (Σ|C| + #cap_rows + '
+          '#sup_rows, Σ|F| + Σ|FxC|)')
+
+    # Every row and column must hold at least one stored non-zero. Every
+    # outbound column is in one demand row and the inbound columns of a
+    # product are in the rows of its supply constraints, so only the rows
+    # and the products are checked, the columns are only scanned in full.
+    with span('zero rows and columns check'):
+        matrix = data.constraints_matrix
+
+        check(np.all(np.diff(matrix.indptr) > 0) and
+              set().union(*data.supply_constraints).issuperset(
+                  data.product_list),
+              'Constraints matrix contains columns or rows with all zeros')
+
+        if validating('full', data):
+            matrix.eliminate_zeros()
+
+            check(np.all(np.diff(matrix.indptr) > 0) and
+                  np.all(np.bincount(matrix.indices,
+                                     minlength=matrix.shape[1]) > 0),
+                  'Constraints matrix contains columns or rows with all '
+                  'zeros')
+            check(np.all(np.isfinite(matrix.data)),
+                  'Constraints matrix must be finite')
+
+
+def generate_constraints_vector(data=Data):
     """
     Inputs from data.py
     -------------------
@@ -659,56 +631,379 @@ def generate_constraints_vector():
 
     """
 
-    # Verify inputs type
-    assert isinstance(
-        Data.demand_volume,
-        np.ndarray), 'Demand constraints vector must be a numpy array'
+    if validating('cheap', data):
+        # Verify inputs type
+        check(isinstance(data.demand_volume, np.ndarray),
+              'Demand constraints vector must be a numpy array')
+        check(isinstance(data.capacity_volume, np.ndarray),
+              'Capacity constraints vector must be a numpy array')
+
+        # Verify inputs dimension
+        check(data.demand_volume.shape == (data.dimC, 1),
+              'Dimension of demand constraints vector is incorrect (∑|C|, 1)')
+        check(min(data.dimC, data.capacity_rows, data.supply_rows) > 0,
+              'Dimension of a section of the constraints vector must be '
+              'positive')
+        check(data.capacity_volume.shape == (data.capacity_rows, 1),
+              'Dimension of capacity constraints vector is incorrect '
+              '(#caps_rows, 1)')
+
+        # Verify inputs value
+        check(np.all(data.demand_volume >= 0),
+              'Demand volume cannot be negative')
+        check(np.all(data.capacity_volume > 0),
+              'Capacity volume has to be positive')
+
+    # Stack the subvectors into the full constraints vector
+    data.constraints_vector = np.vstack([
+        -data.demand_volume, data.capacity_volume,
+        np.zeros((data.supply_rows, 1))
+    ])
+
+    # Verify output dimension, true by construction
+    if validating('full', data):
+        check(data.constraints_vector.shape ==
+              (data.dimC + data.capacity_rows + data.supply_rows, 1),
+              'Constraints vector is incorrect (Σ|C| + #cap_rows + '
+              '#sup_rows)')
+
+
+def warm_start_solve(sensitivity=False, data=Data):
+    """
+    Solve the linear program with HiGHS (through highspy), starting the
+    simplex from the optimal basis of the previous solve when the
+    constraints matrix still has the same structure (same shape and
+    non-zero pattern). Otherwise, e.g. when a factory or a customer was
+    added, it falls back to a cold start.
 
-    assert isinstance(
-        Data.capacity_volume,
-        np.ndarray), 'Capacity constraints vector must be a numpy array'
+    Inputs to data.py
+    -----------------
+    Data.objective_vector: numpy.ndarray
+        Objective vector to minimize function value.
 
-    # Verify inputs dimension
-    assert Data.demand_volume.shape == (
-        Data.dimC,
-        1), 'Dimension of demand constraints vector is incorrect (∑|C|, 1)'
+    Data.constraints_matrix: scipy.sparse.csr_matrix
+        Constraints matrix to implement demand, capacity, supply constraints.
 
-    assert np.all(
-        np.array([Data.dimC, Data.capacity_rows, Data.supply_rows]) > 0
-    ), 'Dimension of a section of the constraints vector must be positive'
+    Data.constraints_vector: numpy.ndarray
+        Vector associated with the constraints matrix.
 
-    assert Data.capacity_volume.shape == (
-        Data.capacity_rows, 1
-    ), f'Dimension of capacity constraints vector is incorrect (#caps_rows, 1)'
+    Data.basis: tuple
+        (structure, highspy.HighsBasis) of the previous solve, if any
 
-    # Verify inputs value
-    assert np.all(Data.demand_volume > 0), 'Demand volume has to be positive'
+    Data.solver_options: dict
+        HiGHS options of the solve, see solvers.highs_model
 
-    assert np.all(
-        Data.capacity_volume > 0), 'Capacity volume has to be positive'
+    Output to data.py
+    -----------------
+    Data.linear_program: numpy.ndarray
+        Optimal solution of the linear program
 
-    # Stack the subvectors into the full constraints vector
-    Data.constraints_vector = np.vstack([
-        -Data.demand_volume, Data.capacity_volume,
-        np.zeros((Data.supply_rows, 1))
-    ])
+    Data.solve_result: solvers.SolveResult
+        Status, iterations and time of the solve
 
-    # Verify output dimension
-    assert Data.constraints_vector.shape == (
-        Data.dimC + Data.capacity_rows + Data.supply_rows,
-        1), 'Constraints vector is incorrect (Σ|C| + #cap_rows + #sup_rows)'
+    Data.basis: tuple
+        (structure, highspy.HighsBasis) of this solve, where structure
+        is a hash of the non-zero pattern of the constraints matrix
 
+    Data.row_dual: numpy.ndarray
+        Duals of the constraints, only with sensitivity
+
+    Data.cost_ranging, Data.bound_ranging: numpy.ndarray
+        (lower, upper) cost of every column and bound of every row over
+        which the optimal basis does not change, only with sensitivity
 
-def optimize():
+    """
+
+    matrix = data.constraints_matrix.tocsc()
+    structure = hashlib.sha256(np.hstack(
+        [matrix.shape, matrix.indptr, matrix.indices]).tobytes()).hexdigest()
+
+    highs = highs_model(data.objective_vector, matrix,
+                        data.constraints_vector, data.solver_options)
+
+    # Warm start only if the previous basis fits this model
+    basis = getattr(data, 'basis', None)
+    if basis is not None and basis[0] == structure:
+        highs.setBasis(basis[1])
+
+    data.solve_result = run_highs(highs, warm_start=basis is not None and
+                                  basis[0] == structure)
+    check(data.solve_result.optimal, data.solve_result.status)
+
+    data.linear_program = data.solve_result.solution
+    data.basis = (structure, highs.getBasis())
+
+    if sensitivity:
+        _, ranging = highs.getRanging()
+        no_rows, no_columns = matrix.shape
+
+        data.row_dual = data.solve_result.row_dual
+        data.cost_ranging = np.column_stack(
+            [ranging.col_cost_dn.value_[:no_columns],
+             ranging.col_cost_up.value_[:no_columns]])
+        data.bound_ranging = np.column_stack(
+            [ranging.row_bound_dn.value_[:no_rows],
+             ranging.row_bound_up.value_[:no_rows]])
+
+
+def product_components(data=Data):
+    """
+    Split the products into independent groups: two products are in the
+    same group when they share a capacity or supply constraint (directly
+    or through other products). Products without any capacity constraint
+    join the first group that has one, so every group is a valid model.
+
+    Inputs to data.py
+    -----------------
+    Data.product_list: list
+        List of products to optimize
+
+    Data.capacity_constraints: list
+        List of capacity constraints for by product combinations
+
+    Data.supply_constraints: list
+        List of supply constraints for by product combinations
+
+    Returns
+    -------
+    list
+        List of groups, each a list of products in Data.product_list order
+    """
+
+    # Union-find over the products
+    parent = {prod: prod for prod in data.product_list}
+
+    def root(prod):
+        while parent[prod] != prod:
+            prod = parent[prod]
+        return prod
+
+    for cons in data.capacity_constraints + data.supply_constraints:
+        for prod in cons[1:]:
+            parent[root(prod)] = root(cons[0])
+
+    capacitated = {root(prod) for cons in data.capacity_constraints
+                   for prod in cons}
+
+    if not capacitated:
+        return [data.product_list]
+
+    first = root(data.capacity_constraints[0][0])
+
+    groups = {}
+    for prod in data.product_list:
+        group = root(prod) if root(prod) in capacitated else first
+        groups.setdefault(group, []).append(prod)
+
+    return list(groups.values())
+
+
+def _component_inputs(products, data=Data):
+    """Data inputs of the sub-model restricted to a group of products"""
+
+    def rows_per_constraint(constraints):
+        # Rows of a constraint = distinct factories of its products
+        return [len(reduce(lambda a, b: a.union(b),
+                           [set(data.factory_names[prod]) for prod in cons]))
+                for cons in constraints]
+
+    def restrict(constraints, volume=None):
+        # Constraints of the group, with their rows of the volume vector
+        rows = np.cumsum([0] + rows_per_constraint(constraints))
+        keep = [index for index, cons in enumerate(constraints)
+                if cons[0] in products]
+        if volume is None:
+            return [constraints[index] for index in keep]
+        return np.vstack([volume[rows[index]:rows[index + 1]]
+                          for index in keep])
+
+    customer_offsets = np.cumsum(
+        [0] + [data.customer_sizes[prod] for prod in data.product_list])
+
+    inputs = {
+        'product_list': products,
+        'factory_list': data.factory_list,
+        'capacity_constraints': restrict(data.capacity_constraints),
+        'supply_constraints': restrict(data.supply_constraints),
+        'capacity_volume': restrict(data.capacity_constraints,
+                                    data.capacity_volume),
+        'demand_volume': np.vstack([
+            data.demand_volume[customer_offsets[index]:
+                               customer_offsets[index + 1]]
+            for index, prod in enumerate(data.product_list)
+            if prod in products])
+    }
+
+    # Settings of the model
+    for attr in SETTINGS:
+        inputs[attr] = getattr(data, attr)
+
+    for attr in ['factory_names', 'factory_sizes', 'customer_sizes',
+                 'inbound_cost_per_product', 'efficiency_per_product']:
+        inputs[attr] = {prod: getattr(data, attr)[prod] for prod in products}
+
+    # Outbound cost per customer, or the rates of the customers of the group
+    if getattr(data, 'outbound_rates', None) is None:
+        inputs['outbound_cost_per_product'] = {
+            prod: data.outbound_cost_per_product[prod] for prod in products}
+    else:
+        customers = np.hstack([
+            np.arange(customer_offsets[index], customer_offsets[index + 1])
+            for index, prod in enumerate(data.product_list)
+            if prod in products])
+
+        inputs['outbound_rates'] = data.outbound_rates
+        inputs['customer_rate_rows'] = data.customer_rate_rows[customers]
+        inputs['outbound_adjustment'] = None \
+            if data.outbound_adjustment is None \
+            else data.outbound_adjustment[customers]
+
+    inputs['dimF'] = sum(inputs['factory_sizes'].values())
+    inputs['dimC'] = sum(inputs['customer_sizes'].values())
+    inputs['dimFC'] = sum(inputs['factory_sizes'][prod] *
+                          inputs['customer_sizes'][prod]
+                          for prod in products)
+
+    return inputs
+
+
+def _solve_component(inputs, engine, presolve):
+    """Solve the sub-model of a group of products in a worker process"""
+
+    data = Model(**inputs)
+
+    # Outbound rates are expanded, and column generation prices the
+    # routes, through the codes of the columns
+    if getattr(data, 'outbound_rates', None) is not None or \
+            engine == 'colgen':
+        index_columns(data=data)
+
+    optimize(engine=engine, presolve=presolve, data=data)
+
+    return data.linear_program, data.presolve_summary
+
+
+def decomposed_solve(components, engine='highs', workers=None,
+                     presolve=True, data=Data):
+    """
+    Solve every group of products (see product_components) as its own
+    linear program, each in a worker process, then stitch the solutions
+    back into the variable order of the full objective vector.
+
+    Parameters
+    ----------
+    components: list
+        Groups of products from product_components
+
+    engine: str
+        Solver engine of the groups, see optimize
+
+    workers: int
+        Number of worker processes (None uses every core)
+
+    presolve: bool
+        Presolve every group, see optimize
+
+    Inputs to data.py
+    -----------------
+    The preprocessing inputs of optimize
+
+    Output to data.py
+    -----------------
+    Data.linear_program: numpy.ndarray
+        Optimal solution of the full linear program
+
+    Data.presolve_summary: dict
+        Sum of the presolve summaries of the groups (None without presolve)
+    """
+
+    # Columns of every product in the full objective vector
+    inbound_offsets = np.cumsum(
+        [0] + [data.factory_sizes[prod] for prod in data.product_list])
+    outbound_offsets = data.dimF + np.cumsum(
+        [0] + [data.factory_sizes[prod] * data.customer_sizes[prod]
+               for prod in data.product_list])
+
+    def columns(products):
+        indices = [data.product_list.index(prod) for prod in products]
+        return np.hstack(
+            [np.arange(inbound_offsets[i], inbound_offsets[i + 1])
+             for i in indices] +
+            [np.arange(outbound_offsets[i], outbound_offsets[i + 1])
+             for i in indices])
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        solutions = pool.map(
+            _solve_component,
+            [_component_inputs(products, data=data)
+             for products in components],
+            repeat(engine), repeat(presolve))
+
+        data.linear_program = np.zeros(data.dimF + data.dimFC)
+        for products, (solution, summary) in zip(components, solutions):
+            data.linear_program[columns(products)] = solution
+
+            if summary is not None:
+                data.presolve_summary = {
+                    key: value + (data.presolve_summary or {}).get(key, 0)
+                    for key, value in summary.items()}
+
+
+def optimize(warm_start=False, engine='highs', decompose=False,
+             workers=None, presolve=True, sensitivity=False, data=Data):
     """
     Method to run all the matrix/vector processing into the optimization\
-    
+
+    Parameters
+    ----------
+    warm_start: bool
+        Start from the optimal basis of the previous solve, see
+        warm_start_solve. Needs the highspy backend, it is ignored with
+        Data.solver = 'scipy'.
+
+    engine: str
+        'highs' (default) solves the linear program with HiGHS. 'network'
+        solves it as a min-cost flow (see network.network_solve) and falls
+        back to HiGHS when the constraints are not network representable.
+        'colgen' prices the routes in by column generation, from the
+        Data.colgen_routes cheapest routes of every customer, without
+        building the full constraints matrix (see
+        colgen.column_generation). Presolve and warm start do not apply.
+
+    decompose: bool
+        Solve the independent groups of products (see product_components)
+        as separate linear programs, in parallel, see decomposed_solve.
+
+    workers: int
+        Number of worker processes of the decomposition (None uses every
+        core)
+
+    presolve: bool
+        Remove the rows and columns that cannot change the optimal
+        solution before HiGHS solves the linear program, see
+        presolve.reduce_program. Needed when some route has no cost and
+        the program is solved by HiGHS (not by the min-cost flow or
+        column generation).
+
+    sensitivity: bool
+        Keep the duals, slacks and reduced costs of the solve, along with
+        the cost and bound ranging with the highspy backend (see
+        postprocessing.sensitivity_tables). The linear program is then
+        solved with HiGHS as a whole, with the 'highs' or 'network'
+        engine.
+
+    data: model.data.Model
+        Model to optimize, the module-level Data by default. Its checks
+        run at the level of Data.validation, see validation.validating,
+        and HiGHS runs through Data.solver with Data.solver_options, see
+        solvers.solve
+
     Inputs to data.py
     -----------------
     Data.objective_vector: numpy.ndarray
         Objective vector to minimize function value.
     
-    Data.constraints_matrix: numpy.ndarray
+    Data.constraints_matrix: scipy.sparse.csr_matrix
         Constraints matrix to implement demand, capacity, supply constraints.
     
     Data.constraints_vector: numpy.ndarray
@@ -719,34 +1014,119 @@ def optimize():
     
     Output to data.py
     -----------------
-    Data.linear_program: scipy.optimize.optimize.OptimizeResult
-        Result of the linear program
+    Data.linear_program: numpy.ndarray
+        Optimal solution of the linear program
+
+    Data.solve_result: solvers.SolveResult
+        Status, iterations and time of the solve (None when it is not
+        solved by HiGHS as a whole, i.e. network or decomposed)
+
+    Data.colgen_summary: dict
+        Rounds and routes of column generation, see
+        colgen.column_generation (None with the other engines or
+        decomposed)
+
+    Data.row_dual, Data.slack: numpy.ndarray
+        Dual and slack of every constraint, only with sensitivity
+        (None otherwise)
+
+    Data.reduced_cost: numpy.ndarray
+        Reduced cost of every column, only with sensitivity
+
+    Data.cost_ranging, Data.bound_ranging: numpy.ndarray or None
+        Ranging of the costs and the bounds, only with sensitivity and
+        the highspy backend, see warm_start_solve
     
     """
 
+    check(engine in ('highs', 'network', 'colgen'), f'Unknown engine {engine}')
+
     # Generating the necessary vectors and matrices
-    generate_objective_vector()
-    generate_demand_matrix()
-    generate_combination_matrices()
-    generate_capacity_matrix()
-    generate_supply_matrix()
-    generate_constraints_matrix()
-    generate_constraints_vector()
-
-    # Run Linear Program
-    lp = linprog(c=Data.objective_vector,
-                 A_ub=Data.constraints_matrix,
-                 b_ub=Data.constraints_vector,
-                 method='highs')
-
-    assert lp.status == 0, lp.message
-
-    # Get only the results and delete everything else
-    Data.linear_program = lp.x
-    del lp
-
-    assert np.all(
-        Data.linear_program >= 0), 'Optimized volume must be non-negative'
-
-    assert not np.isclose(np.sum(Data.linear_program),
-                          0), 'Optimized volume cannot be all zeros'
+    with span('generate_objective_vector') as step:
+        generate_objective_vector(data=data)
+        step.matrix(data.objective_vector)
+
+    check(not (sensitivity and decompose),
+          'Sensitivity needs the linear program as a whole, not decomposed')
+    check(not (sensitivity and engine == 'colgen'),
+          'Sensitivity needs the linear program as a whole, not column '
+          'generation')
+
+    data.presolve_summary, data.solve_result = None, None
+    data.colgen_summary = None
+    data.row_dual, data.cost_ranging, data.bound_ranging = None, None, None
+    components = product_components(data=data) if decompose else []
+
+    if len(components) > 1:
+        # Each group builds its own matrices in its worker
+        with span('decomposed_solve', groups=len(components)):
+            decomposed_solve(components, engine, workers, presolve,
+                             data=data)
+    elif engine == 'colgen':
+        column_generation(data=data)
+    else:
+        for generate, built in [
+                (generate_demand_matrix, 'demand_matrix'),
+                (generate_combination_matrices, None),
+                (generate_capacity_matrix, 'capacity_matrix'),
+                (generate_supply_matrix, 'supply_matrix'),
+                (generate_constraints_matrix, 'constraints_matrix'),
+                (generate_constraints_vector, 'constraints_vector')]:
+            with span(generate.__name__) as step:
+                generate(data=data)
+                if built is not None:
+                    step.matrix(getattr(data, built))
+
+    # Run Linear Program, the network engine falls back to HiGHS
+    solved = len(components) > 1 or engine == 'colgen'
+    if not solved and engine == 'network' and not sensitivity:
+        with span('network_solve') as step:
+            solved = network_solve(data=data)
+            step.set(solved=solved)
+
+    # Column generation and the min-cost flow leave the routes without
+    # cost out, HiGHS needs presolve to remove them
+    if not solved and validating('cheap', data):
+        check(presolve or not np.any(np.isnan(data.objective_vector)),
+              'Routes without cost are only removed with presolve')
+
+    if not solved and presolve:
+        with span('reduce_program') as step:
+            reduce_program(data=data)
+            step.matrix(data.constraints_matrix)
+
+    if not solved and (warm_start or sensitivity) and \
+            (data.solver or default_backend()) == 'highspy':
+        warm_start_solve(sensitivity, data=data)
+
+    elif not solved:
+        data.solve_result = solve(data.objective_vector,
+                                  data.constraints_matrix,
+                                  data.constraints_vector, data.solver,
+                                  data.solver_options)
+        check(data.solve_result.optimal, data.solve_result.status)
+
+        data.linear_program = data.solve_result.solution
+        if sensitivity:
+            data.row_dual = data.solve_result.row_dual
+
+    if not solved and presolve:
+        with span('expand_solution'):
+            expand_solution(data=data)
+
+    if sensitivity:
+        # From the full linear program, so that they cover the rows and
+        # columns removed by presolve as well
+        data.slack = data.constraints_vector.flatten() - \
+            data.constraints_matrix @ data.linear_program
+        data.reduced_cost = data.objective_vector - \
+            data.constraints_matrix.T @ data.row_dual
+
+    if validating('cheap', data):
+        check(not np.isclose(np.sum(data.linear_program), 0),
+              'Optimized volume cannot be all zeros')
+
+    # Up to the round-off of the solvers
+    if validating('full', data):
+        check(np.all(data.linear_program >= -1e-9),
+              'Optimized volume must be non-negative')
@@ -1,8 +1,9 @@
 from model import *
-from model.data import Data, Results
+from model.data import Data, Results, Model
+from model.sink import write_year
 
 
-def postprocess():
+def postprocess(data=Data, results=Results):
     """
     Unpack the program results into a volume vector
     and a cost vector.
@@ -14,114 +15,183 @@ def postprocess():
 
     Outputs to data.py
     ------------------
-    Results.volume: list
-        List of customers' volumes by optimization instances
-    Results.cost: list
-        List of customers' costs by optimization instances
+    Results.years: list
+        Years written to the result directory, see sink.write_year, along
+        with the volume and cost of every variable
     Results.split: int
         Index to split the above vector into inbound / outbound
+    Results.presolve: list
+        Rows and columns removed by presolve by optimization instances
+    Results.sensitivity: list
+        Whether the sensitivity tables (see sensitivity_tables) of the
+        optimization instances are in their year's file, see
+        sink.read_table
     """
-    # Unpack Volume
-    Results.volume.append(Data.linear_program[:, np.newaxis])
+    tables = sensitivity_tables(data=data) if data.row_dual is not None \
+        else None
 
-    # Unpack Cost
-    Results.cost.append(
-        (Data.linear_program * Data.objective_vector)[:, np.newaxis])
+    # Write volume, cost and sensitivity to disk, routes without cost
+    # carry no volume
+    write_year(data.year, data.linear_program, np.where(
+        data.linear_program > 0, data.linear_program * data.objective_vector,
+        0), tables, results=results)
+
+    results.presolve.append(data.presolve_summary)
+    results.sensitivity.append(tables is not None)
 
     # Collect split index, to remove Data dependencies.
     # Next step is to free up all the memory from Data.
-    Results.split = Data.dimF
+    results.split = data.dimF
+
+
+def variable_labels(data=Data):
+    """
+    Label every variable of the linear program, in the same order as the
+    objective vector: inbound (product, factory), then outbound
+    (product, factory, customer), by a gather against Data.column_index.
+
+    Inputs from data.py
+    -------------------
+    Data.column_index, Data.product_list, Data.factory_list,
+    Data.customer_names
+
+    Returns
+    -------
+    pandas.DataFrame
+        Columns 'Type' ('Inbound' or 'Outbound'), 'Product', 'Factory' and
+        'Customer' (None for inbound)
+    """
 
+    index = data.column_index
+    inbound = index['customer'] < 0
 
-def save_to_excel():
+    return pd.DataFrame({
+        'Type': np.where(inbound, 'Inbound', 'Outbound'),
+        'Product': decode(data.product_list, index['product']),
+        'Factory': decode(data.factory_list, index['factory']),
+        'Customer': np.where(inbound, None, decode(
+            np.hstack([data.customer_names[prod]
+                       for prod in data.product_list]), index['customer']))})
+
+
+def decode(names, codes):
+    """Names of integer codes, e.g. of a field of Data.column_index"""
+
+    return np.asarray(names, dtype=object)[codes]
+
+
+def constraint_labels(data=Data):
     """
-    Method to save volume and cost data to Excel file
+    Label every row of the constraints matrix, in order: demand
+    (product, customer), then capacity and supply (constraint, factory),
+    each constraint having one row per factory of its products, in the
+    order of the factory list.
 
     Inputs from data.py
     -------------------
-    Results.save_location: str (filepath)
-        Path to save output Excel file
-    Results.volume: list
-        List of customers' volume by optimization instances
-    Results.cost: list
-        List of customers' cost by optimization instances
+    Data.product_list, Data.factory_list, Data.factory_names,
+    Data.customer_names, Data.capacity_constraints, Data.supply_constraints
+
+    Returns
+    -------
+    pandas.DataFrame
+        Columns 'Type' ('Demand', 'Capacity' or 'Supply'), 'Product' and
+        'Customer' (None for capacity and supply), 'Constraint' (products
+        of the constraint joined by ' + ', None for demand) and 'Factory'
+        (None for demand)
+    """
+
+    demand = pd.DataFrame({
+        'Type': 'Demand',
+        'Product': np.hstack([[prod] * len(data.customer_names[prod])
+                              for prod in data.product_list]),
+        'Customer': np.hstack([data.customer_names[prod]
+                               for prod in data.product_list]),
+        'Constraint': None,
+        'Factory': None})
+
+    def rows(kind, constraints):
+        factories = [[fac for fac in data.factory_list
+                      if any(fac in data.factory_names[prod]
+                             for prod in cons)] for cons in constraints]
+
+        return pd.DataFrame({
+            'Type': kind, 'Product': None, 'Customer': None,
+            'Constraint': np.hstack([
+                [' + '.join(map(str, cons))] * len(facs)
+                for cons, facs in zip(constraints, factories)]),
+            'Factory': np.hstack(factories)})
+
+    return pd.concat([demand, rows('Capacity', data.capacity_constraints),
+                      rows('Supply', data.supply_constraints)],
+                     ignore_index=True)
+
+
+def sensitivity_tables(data=Data):
     """
+    Map the duals, slacks, reduced costs and ranging of the linear program
+    back to named routes and constraints. The shadow price and the volume
+    range of a constraint are in terms of its volume (demand, capacity or
+    free supply), e.g. the shadow price of a capacity row is the change of
+    the total cost for one more unit of capacity.
+
+    Inputs from data.py
+    -------------------
+    Data.linear_program, Data.objective_vector, Data.constraints_vector
+
+    Data.row_dual, Data.slack, Data.reduced_cost: numpy.ndarray
+        Sensitivity of the linear program, see optimization.optimize
+
+    Data.cost_ranging, Data.bound_ranging: numpy.ndarray or None
+        (lower, upper) columns, None without the highspy backend
+
+    Returns
+    -------
+    dict
+        'variables': variable_labels with 'Volume', 'Unit Cost',
+        'Reduced Cost', 'Cost Lower' and 'Cost Upper'
+        'constraints': constraint_labels with 'Volume', 'Slack',
+        'Shadow Price', 'Volume Lower' and 'Volume Upper'
+    """
+
+    variables = variable_labels(data=data)
+    variables['Volume'] = data.linear_program
+    variables['Unit Cost'] = data.objective_vector
+    variables['Reduced Cost'] = data.reduced_cost
+
+    constraints = constraint_labels(data=data)
+    bound_ranging = data.bound_ranging if data.bound_ranging is not None \
+        else np.full((data.row_dual.size, 2), np.nan)
+    cost_ranging = data.cost_ranging if data.cost_ranging is not None \
+        else np.full((data.linear_program.size, 2), np.nan)
+
+    variables['Cost Lower'], variables['Cost Upper'] = cost_ranging.T
+
+    # Demand rows are written as -volume, flip them back
+    sign = np.where(constraints['Type'] == 'Demand', -1, 1)
+    lower, upper = (sign[:, np.newaxis] * bound_ranging).T
+
+    constraints['Volume'] = sign * data.constraints_vector.flatten()
+    constraints['Slack'] = data.slack
+    constraints['Shadow Price'] = sign * data.row_dual
+    constraints['Volume Lower'] = np.where(sign < 0, upper, lower)
+    constraints['Volume Upper'] = np.where(sign < 0, lower, upper)
+
+    return {'variables': variables, 'constraints': constraints}
+
+
+def free_memory(data=Data):
+    """Free memory by deleting the attributes of the model that are only
+    needed for one optimization instance"""
+
+    keep = ["filepath", "inputs", "input_key", "cache_location",
+            "cache_limit", "sidecar_location",
+            "route_cost_limit", "validation", "solver", "solver_options",
+            "colgen_routes",
+            "factory_sizes", "customer_sizes", "factory_names",
+            "customer_names", "customer_provinces", "product_list",
+            "factory_list", "column_index", "timeframe", "basis"]
 
-    def quick_save(df, name): return df.to_excel(
-        writer, name, index=False, header=True, startrow=0, startcol=0)
-
-    # Generate the inbound template
-    inbound_prefix = pd.DataFrame(data=np.vstack([
-        np.hstack([Data.factory_names[prod] for prod in Data.product_list]),
-        np.hstack([[prod for elem in Data.factory_names[prod]]
-                   for prod in Data.product_list])
-    ]).T,
-        columns=['Factory', 'Product'])
-
-    # Sort by Product then Factory
-    inbound_prefix = inbound_prefix.sort_values(['Product', 'Factory'])
-
-    # Generate the outbound template
-    df = pd.read_excel(Data.filepath,
-                       sheet_name="Customer List")
-    outbound_prefix = pd.DataFrame(data=np.vstack([
-        np.repeat(df[df['Sales Product'] == prod][[
-            'Customer ID', 'Sales Product', 'Province'
-        ]].to_numpy(),
-            repeats=Data.factory_sizes[prod],
-            axis=0) for prod in Data.product_list
-    ]),
-        columns=['ID', 'Product', 'Province'])
-
-    outbound_prefix['Factory'] = np.hstack([
-        Data.factory_names[prod] * Data.customer_sizes[prod]
-        for prod in Data.product_list
-    ])
-
-    # Sort by Product then Factory
-    outbound_prefix = outbound_prefix.sort_values(['Product', 'Factory'])
-
-    # Calculate the list of years
-    Results.years = np.arange(Data.timeframe[0], Data.timeframe[1]+1)
-
-    with pd.ExcelWriter(Results.save_location) as writer:
-
-        # Inbound Cost
-        df = inbound_prefix.copy()
-        df[Results.years] = np.hstack(
-            Results.cost)[:Results.split]
-        df = df[df[Results.years].sum(axis=1) != 0]
-        quick_save(df, 'Inbound Cost Per Factory')
-
-        # Outbound Cost
-        df = outbound_prefix.copy()
-        # Concatenate with the volume per year
-        df[Results.years] = np.hstack(
-            Results.cost)[Results.split:]
-        # Remove all zeros rows
-        df = df[df[Results.years].sum(axis=1) != 0]
-        quick_save(df, 'Outbound Cost Per Customer')
-
-        # Outbound Volume
-        df = outbound_prefix.copy()
-        # Concatenate with the volume per year
-        df[Results.years] = np.hstack(
-            Results.volume)[Results.split:]
-        # Remove all zeros rows
-        df = df[df[Results.years].sum(axis=1) != 0]
-        quick_save(df, 'Outbound Volume Per Customer')
-
-
-def free_memory():
-    """Free memory by deleting some Data attributes"""
-
-    # Free up memory
-    keep = ["filepath", "factory_sizes",
-            "customer_sizes", "factory_names",
-            "product_list", "timeframe"]
-    _ = [
-        delattr(Data, attr) for attr in dir(Data)
-        if (attr[:2] != '__') and (attr not in keep)
-    ]
-    del _
-    gc.collect()
+    for attr in Model.__slots__:
+        if attr not in keep and hasattr(data, attr):
+            delattr(data, attr)
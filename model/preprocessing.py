@@ -1,26 +1,166 @@
 from model import *
-from model.data import Data
+from model.cache import cache_key, read_cache, write_cache, sidecar_array
+from model.data import Data, Model
+from model.instrument import span
+from model.validation import validating, check
 
+# Version of the parsed input store, bump it whenever load_inputs or
+# _index_by_year change what they store so that stale caches are dropped
+PARSER_VERSION = 1
+
+# Sheets whose values raw_inputs reads from the sidecar files, see
+# write_sidecars
+SIDECAR_SHEETS = ('Outbound Cost', 'Sales Volume')
+
+
+def _index_by_year(df):
+    """Move the "<year> - <name>" columns of a sheet into a (year, name)
+    column MultiIndex and the other columns into the row index"""
+
+    split = [str(col).split(' - ', 1) for col in df.columns]
+    yearly = [len(col) == 2 and col[0].isdigit() for col in split]
+
+    if not any(yearly):
+        return df
+
+    df = df.set_index(list(df.columns[~np.array(yearly)]))
+    df.columns = pd.MultiIndex.from_tuples(
+        [(int(col[0]), col[1])
+         for col, is_yearly in zip(split, yearly) if is_yearly])
+
+    return df
+
+
+def load_inputs(data=Data):
+    """
+    Parse every sheet of the input Excel file once per run.
+
+    Sheets with "<year> - <name>" columns are stored with a (year, name)
+    column MultiIndex, and their remaining columns become the row index
+    (e.g. Customer ID, Province, Sales Product), so that raw_inputs only
+    has to slice the year, product and factory it needs.
+
+    The parsed sheets are cached on disk, keyed by the content of the file
+    and PARSER_VERSION, so reruns on an unchanged file skip the Excel parse.
+
+    Inputs from data.py
+    -------------------
+    Data.filepath: str
+        Path to the input Excel file
+
+    Data.cache_location: str
+        Directory of the parsed input cache, None disables the cache
+
+    Data.cache_limit: int
+        Size limit (in bytes) of the cache directory
+
+    Data.sidecar_location: str
+        Directory of the memory-mapped sidecar files, see raw_inputs
+
+    Outputs to data.py
+    ------------------
+    Data.inputs: dict
+        {sheet name: pandas.DataFrame} of the parsed input file
+
+    Data.input_key: str
+        Key of the input file (see cache.cache_key), None without cache
+        and sidecar files
 
-def get_timeframe():
+    """
+    data.input_key = None
+    if data.cache_location is not None or data.sidecar_location is not None:
+        data.input_key = cache_key(data.filepath, PARSER_VERSION)
+
+    if data.cache_location is not None:
+        data.inputs = read_cache(data.cache_location, data.input_key)
+
+        if data.inputs is not None:
+            return
+
+    with span('excel parse'):
+        data.inputs = {
+            sheet: _index_by_year(df) for sheet, df in
+            pd.read_excel(data.filepath, sheet_name=None).items()
+        }
+
+    if data.cache_location is not None:
+        write_cache(data.cache_location, data.input_key, data.inputs,
+                    data.cache_limit)
+
+
+def get_timeframe(data=Data):
     """
     Get optimization timeframe
 
+    Inputs from data.py
+    -------------------
+    Data.inputs: dict
+        - Parsed by load_inputs
+
     Outputs to data.py
     ------------------
     Data.timeframe: list
         - Pull from "Timeframe"
 
     """
-    Data.timeframe = list(pd.read_excel(Data.filepath).iloc[0])
+    data.timeframe = list(data.inputs['Timeframe'].iloc[0])
+
+    if validating('cheap', data):
+        check(data.timeframe[1] - data.timeframe[0] >= 1,
+              'Timeframe not in ascending order')
+
+
+def _year_blocks(name, sizes, build, data=Data):
+    """
+    Blocks of an array of Data.year (1-D arrays of the sizes, in order),
+    returned by build(). With Data.sidecar_location, they are read-only
+    views of one array memory-mapped from a sidecar file (see
+    cache.sidecar_array), which build() fills once per input file and year.
+    """
 
-    assert Data.timeframe[1] - \
-        Data.timeframe[0] >= 1, 'Timeframe not in ascending order'
+    if data.sidecar_location is None or \
+            getattr(data, 'input_key', None) is None:
+        return list(build())
 
+    array = sidecar_array(data.sidecar_location,
+                          f'{data.input_key} - {data.year} - {name}', sizes,
+                          build)
 
-def raw_inputs():
+    return np.split(array, np.cumsum(sizes)[:-1])
+
+
+def write_sidecars(years, data=Data):
     """
-    Pull data from input Excel files.
+    Write the sidecar files of the outbound cost and the demand of the
+    years (see raw_inputs), then drop the values of the sheets they hold
+    from Data.inputs, keeping their row index. The models of the years,
+    and the worker processes they are sent to, then map the files rather
+    than each holding the whole "Outbound Cost" and "Sales Volume" sheets.
+
+    Inputs from data.py
+    -------------------
+    Data.inputs, Data.input_key, Data.sidecar_location
+
+    Outputs to data.py
+    ------------------
+    Data.inputs: dict
+        The parsed input file, "Outbound Cost" and "Sales Volume" without
+        their columns
+    """
+
+    for year in years:
+        raw_inputs(data=Model(inputs=data.inputs, input_key=data.input_key,
+                              sidecar_location=data.sidecar_location,
+                              validation=data.validation, year=year))
+
+    data.inputs = {sheet: df.iloc[:, :0] if sheet in SIDECAR_SHEETS else df
+                   for sheet, df in data.inputs.items()}
+
+
+def raw_inputs(data=Data):
+    """
+    Slice the data of Data.year from the parsed input Excel file
+    (see load_inputs).
 
     Below only includes a shortlist of attributes used
     and the sheet where the data comes from. For detailed
@@ -44,7 +184,16 @@ def raw_inputs():
         - Pull from "Sales Volume"
 
     Data.outbound_cost_per_product: dict
-        - Pull from "Outbound Cost"
+        - Pull from "Outbound Cost", memory-mapped from a sidecar file with
+          Data.sidecar_location (as Data.demand_volume)
+        - None when the input file has an "Outbound Rate" sheet instead,
+          see rate_inputs
+
+    Data.customer_names: dict
+        - Pull from "Outbound Cost" ("Sales Volume" with "Outbound Rate")
+
+    Data.customer_provinces: dict
+        - Pull from "Outbound Cost" ("Sales Volume" with "Outbound Rate")
 
     Data.efficiency_per_product: dict
         - Pull from "Efficiency Per Product"
@@ -60,129 +209,182 @@ def raw_inputs():
 
     """
     # Data.product_list
-    Data.product_list = pd.read_excel(
-        Data.filepath, sheet_name='Product List')['PRODUCT'].values.tolist()
+    data.product_list = data.inputs['Product List'][
+        'PRODUCT'].values.tolist()
 
     # Data.factory_list
-    Data.factory_list = pd.read_excel(
-        Data.filepath, sheet_name='Factory List')['FACTORY'].values.tolist()
-
-    # Data.factory_name/s (df temporary stores the work sheet)
-    df = pd.read_excel(Data.filepath,
-                       sheet_name='Factory Per Product',
-                       index_col=0)
-
-    Data.factory_names = {
-        prod: [fac for fac in df.columns[df.loc[prod]]
-               if str(Data.year) in fac]
-        for prod in Data.product_list
-    }
+    data.factory_list = data.inputs['Factory List'][
+        'FACTORY'].values.tolist()
+
+    # Data.factory_name/s (df temporary stores the year slice of the sheet)
+    df = data.inputs['Factory Per Product'][data.year]
 
-    del df
+    data.factory_names = {
+        prod: df.columns[df.loc[prod]].tolist()
+        for prod in data.product_list
+    }
 
     # Data.inbound_cost_per_product
-    df = pd.read_excel(Data.filepath,
-                       sheet_name='Inbound Cost Per Product',
-                       index_col=0)
+    df = data.inputs['Inbound Cost Per Product'][data.year]
 
-    Data.inbound_cost_per_product = {
-        prod: df.loc[prod][Data.factory_names[prod]].tolist()
-        for prod in Data.product_list
+    data.inbound_cost_per_product = {
+        prod: df.loc[prod][data.factory_names[prod]].tolist()
+        for prod in data.product_list
     }
 
-    del df
+    # Customers of every product: the rows of "Outbound Cost", or of
+    # "Sales Volume" when the outbound cost is given per province. The
+    # values of the year are only read to build the blocks, see
+    # write_sidecars
+    rated = 'Outbound Rate' in data.inputs
+    sheet = data.inputs['Sales Volume' if rated else 'Outbound Cost']
+    products = sheet.index.get_level_values('Sales Product')
+    rows = {prod: products == prod for prod in data.product_list}
+
+    def outbound_blocks():
+        df = sheet[data.year]
+        for prod in data.product_list:
+            yield df[rows[prod]][data.factory_names[prod]].to_numpy() \
+                .flatten('F')
+
+    # Data.outbound_cost_per_product, factory-major per product
+    data.outbound_cost_per_product = None if rated else dict(zip(
+        data.product_list,
+        _year_blocks('outbound',
+                     [np.count_nonzero(rows[prod]) *
+                      len(data.factory_names[prod])
+                      for prod in data.product_list],
+                     outbound_blocks, data=data)))
+
+    # Data.customer_names
+    customers = sheet.index.get_level_values('Customer ID')
+
+    data.customer_names = {
+        prod: customers[rows[prod]].tolist()
+        for prod in data.product_list
+    }
 
-    # Data.outbound_cost_per_product
-    df = pd.read_excel(Data.filepath, sheet_name='Outbound Cost', index_col=0)
+    # Data.customer_provinces, labels of the output file
+    provinces = sheet.index.get_level_values('Province')
 
-    Data.outbound_cost_per_product = {
-        prod: df[df['Sales Product'] ==
-                 prod][Data.factory_names[prod]].to_numpy().flatten('F')
-        for prod in Data.product_list
+    data.customer_provinces = {
+        prod: provinces[rows[prod]].tolist()
+        for prod in data.product_list
     }
 
-    # Data.demand_volume
-    df = pd.read_excel(Data.filepath, sheet_name='Sales Volume', index_col=0)
+    # Data.outbound_rates, Data.customer_rate_rows, Data.outbound_adjustment
+    data.outbound_rates = None
+    if rated:
+        rate_inputs(data=data)
+
+    # Data.demand_volume, as a single block
+    sales = data.inputs['Sales Volume']
+    sales_products = sales.index.get_level_values('Sales Product')
 
-    Data.demand_volume = np.hstack([
-        df[df['Sales Product'] == prod][df.columns[
-            2 + Data.year - Data.timeframe[0]]].to_numpy().flatten('F')
-        for prod in Data.product_list
-    ])[:, np.newaxis]
+    def demand_blocks():
+        df = sales[data.year]
+        yield np.hstack([df[sales_products == prod].to_numpy().flatten('F')
+                         for prod in data.product_list])
 
-    del df
+    data.demand_volume = _year_blocks(
+        'demand', [np.isin(sales_products, data.product_list).sum()],
+        demand_blocks, data=data)[0][:, np.newaxis]
 
     # Data.efficiency_per_product
-    df = pd.read_excel(Data.filepath,
-                       sheet_name='Efficiency Per Product',
-                       index_col=0)
+    df = data.inputs['Efficiency Per Product'][data.year]
 
-    Data.efficiency_per_product = {
-        prod: df.loc[prod][Data.factory_names[prod]].tolist()
-        for prod in Data.product_list
+    data.efficiency_per_product = {
+        prod: df.loc[prod][data.factory_names[prod]].tolist()
+        for prod in data.product_list
     }
 
-    del df
-
     # Data.capacity_constraints # Constraints has to start index from 1
-    df = pd.read_excel(Data.filepath,
-                       sheet_name='Capacity Constraints',
-                       index_col='CONSTRAINT')
+    df = data.inputs['Capacity Constraints'][data.year]
 
-    df_prod = pd.DataFrame(
-        columns=[prod for prod in df.columns
-                 if str(Data.year) in prod]).columns
-
-    Data.capacity_constraints = [
-        df_prod[df[df_prod].iloc[cons]].to_list()
+    data.capacity_constraints = [
+        df.columns[df.iloc[cons]].to_list()
         for cons in range(df.shape[0])
     ]
 
-    del df
-
     # Data.supply_constraints # Constraints has to start index from 1
-    df = pd.read_excel(Data.filepath,
-                       sheet_name='Supply Constraints',
-                       index_col='CONSTRAINT')
-
-    df_prod = pd.DataFrame(
-        columns=[prod for prod in df.columns
-                 if str(Data.year) in prod]).columns
+    df = data.inputs['Supply Constraints'][data.year]
 
-    Data.supply_constraints = [
-        df_prod[df[df_prod].iloc[cons]].to_list()
+    data.supply_constraints = [
+        df.columns[df.iloc[cons]].to_list()
         for cons in range(df.shape[0])
     ]
 
-    del df, df_prod
-
     # Data.capacity_volume
-    Data.capacity_volume = pd.read_excel(
-        Data.filepath, sheet_name='Capacity Volume',
-        index_col='CONSTRAINT')[[str(Data.year) + " - " + str(fac)
-                                for fac in Data.factory_list
-                                 ]].to_numpy().flatten()
+    data.capacity_volume = data.inputs['Capacity Volume'][data.year][
+        data.factory_list].to_numpy().flatten()
 
-    Data.capacity_volume = Data.capacity_volume[~np.isnan(Data.capacity_volume
+    data.capacity_volume = data.capacity_volume[~np.isnan(data.capacity_volume
                                                           )][:, np.newaxis]
 
-    # Revert the factory_names to simple no year names
-    Data.factory_names = {prod: [fac.strip(str(Data.year) + " - ")
-                                 for fac in Data.factory_names[prod]]
-                          for prod in Data.factory_names}
+    del df, sheet, sales
+
+
+def rate_inputs(data=Data):
+    """
+    Outbound cost given per province rather than per customer: the
+    "Outbound Rate" sheet has one row per Province and one "<year> -
+    <factory>" column per factory, and the optional "Outbound Adjustment"
+    sheet a "<year> - Adjustment" factor per Customer ID and Sales Product
+    (1 for the customers it leaves out). The outbound cost of a route is
+    the rate of the customer's province and the factory times the factor
+    of the customer, expanded by generate_objective_vector, so the linear
+    program is the same as with the "Outbound Cost" sheet.
+
+    Inputs from data.py
+    -------------------
+    Data.inputs, Data.year, Data.factory_list, Data.product_list,
+    Data.customer_names, Data.customer_provinces
+
+    Outputs to data.py
+    ------------------
+    Data.outbound_rates: numpy.ndarray
+        - Pull from "Outbound Rate", (province x factory) in the order of
+          Data.factory_list
+
+    Data.customer_rate_rows: numpy.ndarray
+        - Row of Data.outbound_rates of every customer, in demand order
+
+    Data.outbound_adjustment: numpy.ndarray
+        - Pull from "Outbound Adjustment", factor of every customer in
+          demand order (None without the sheet)
+
+    """
+
+    rates = data.inputs['Outbound Rate'][data.year][data.factory_list]
+    data.outbound_rates = rates.to_numpy(dtype=np.float64)
+
+    # Customers of all products, in demand order
+    customers = [(name, prod) for prod in data.product_list
+                 for name in data.customer_names[prod]]
+    provinces = np.hstack([data.customer_provinces[prod]
+                           for prod in data.product_list])
+
+    data.customer_rate_rows = rates.index.get_indexer(provinces)
 
-    # Revert capacity constraints
-    Data.capacity_constraints = [
-        [prod.strip(str(Data.year) + " - ") for prod in cons]
-        for cons in Data.capacity_constraints]
+    if validating('cheap', data):
+        check(np.all(data.customer_rate_rows >= 0),
+              'Every province of a customer must have an outbound rate')
 
-    # Revert supply constraints
-    Data.supply_constraints = [
-        [prod.strip(str(Data.year) + " - ") for prod in cons]
-        for cons in Data.supply_constraints]
+    data.outbound_adjustment = None
 
+    if 'Outbound Adjustment' in data.inputs:
+        df = data.inputs['Outbound Adjustment'][data.year]
+        factors = pd.Series(df['Adjustment'].to_numpy(),
+                            index=pd.MultiIndex.from_arrays([
+                                df.index.get_level_values('Customer ID'),
+                                df.index.get_level_values('Sales Product')]))
 
-def processed_inputs():
+        data.outbound_adjustment = factors.reindex(
+            pd.MultiIndex.from_tuples(customers)).fillna(1).to_numpy(
+            dtype=np.float64)
+
+
+def processed_inputs(data=Data):
     """
     Data processed from Raw Inputs
 
@@ -192,7 +394,7 @@ def processed_inputs():
         - Process from Data.factory_names
 
     Data.customer_sizes: dict
-        - Process from ...
+        - Process from Data.customer_names
 
     Data.dimF: int
         - Process from Data.factory_sizes
@@ -203,38 +405,101 @@ def processed_inputs():
     Data.dimFC: int
         - Process from Data.factory_sizes x Data.customer_sizes
 
+    Data.column_index: numpy.ndarray
+        - Process from Data.factory_names, see index_columns
+
     """
 
     # Data.factory_sizes
-    Data.factory_sizes = {
-        prod: len(Data.factory_names[prod])
-        for prod in Data.product_list
+    data.factory_sizes = {
+        prod: len(data.factory_names[prod])
+        for prod in data.product_list
     }
 
-    # Data.customer_sizes (Pending changes)
-    # Might want to do Data.customer_list and Data.customer_names
-    # as well, for the postprocessing
-
-    Data.customer_sizes = {
-        prod:
-            len(Data.outbound_cost_per_product[prod]) // Data.factory_sizes[
-                prod]
-        for prod in Data.product_list
+    # Data.customer_sizes
+    data.customer_sizes = {
+        prod: len(data.customer_names[prod])
+        for prod in data.product_list
     }
 
     # Data.dimF
-    Data.dimF = sum(Data.factory_sizes.values())
+    data.dimF = sum(data.factory_sizes.values())
 
     # Data.dimC
-    Data.dimC = sum(Data.customer_sizes.values())
+    data.dimC = sum(data.customer_sizes.values())
 
     # Data.dimFC
-    Data.dimFC = sum(
-        np.array(list(Data.factory_sizes.values())) *
-        np.array(list(Data.customer_sizes.values())))
+    data.dimFC = sum(
+        np.array(list(data.factory_sizes.values())) *
+        np.array(list(data.customer_sizes.values())))
+
+    # Data.column_index
+    index_columns(data=data)
+
+
+# Codes of the product, factory and customer of a column, see index_columns
+COLUMN_INDEX = np.dtype([('product', np.int32), ('factory', np.int32),
+                         ('customer', np.int32)])
+
+
+def index_columns(data=Data):
+    """
+    Map every column of the objective vector to the integer codes of its
+    product (position in Data.product_list), factory (position in
+    Data.factory_list) and customer (its demand row, i.e. its position in
+    the customer names of all products, -1 for inbound). The columns are
+    in the order of generate_objective_vector: inbound (product, factory),
+    then outbound (product, factory, customer).
+
+    The labels of a solution are then a gather, e.g.
+    np.array(Data.product_list)[Data.column_index['product']]
+
+    Inputs from data.py
+    -------------------
+    Data.product_list, Data.factory_list, Data.factory_names,
+    Data.factory_sizes, Data.customer_sizes
+
+    Outputs to data.py
+    ------------------
+    Data.column_index: numpy.ndarray
+        Structured array (dtype COLUMN_INDEX) with one entry per column
+    """
+
+    factories = pd.Index(data.factory_list)
+    codes = [factories.get_indexer(data.factory_names[prod])
+             for prod in data.product_list]
+
+    if validating('cheap', data):
+        check(all(np.all(code >= 0) for code in codes),
+              'Some factory per product is not in the factory list')
+
+    factory_sizes = np.array([data.factory_sizes[prod]
+                              for prod in data.product_list])
+    customer_sizes = np.array([data.customer_sizes[prod]
+                               for prod in data.product_list])
+    customer_start = np.cumsum(customer_sizes) - customer_sizes
+
+    products = np.arange(len(data.product_list))
+
+    inbound = np.empty(factory_sizes.sum(), dtype=COLUMN_INDEX)
+    inbound['product'] = np.repeat(products, factory_sizes)
+    inbound['factory'] = np.hstack(codes)
+    inbound['customer'] = -1
+
+    # Factory then customer major, within every product
+    outbound = np.empty((factory_sizes * customer_sizes).sum(),
+                        dtype=COLUMN_INDEX)
+    outbound['product'] = np.repeat(products, factory_sizes * customer_sizes)
+    outbound['factory'] = np.hstack([
+        np.repeat(code, size) for code, size in zip(codes, customer_sizes)])
+    outbound['customer'] = np.hstack([
+        np.tile(np.arange(start, start + size), len(code))
+        for code, start, size in zip(codes, customer_start, customer_sizes)])
+
+    data.column_index = np.hstack([inbound, outbound])
 
 
-def preprocess():
+def preprocess(data=Data):
     """
     Call on the raw and processed inputs, then checks if the inputs.
     are logical through a series of assert statement.
@@ -245,7 +510,7 @@ def preprocess():
 
     """
     # Retrieve the inputs
-    raw_inputs()
-    processed_inputs()
+    raw_inputs(data=data)
+    processed_inputs(data=data)
 
     # Assert logicality of inputs
@@ -0,0 +1,199 @@
+from model import *
+from model.data import Data
+from model.validation import check
+
+
+def _redundant_rows(matrix, bound):
+    """Rows that hold for any x >= 0: no positive coefficient and a
+    non-negative right hand side (empty rows included)"""
+
+    positive = matrix.multiply(matrix > 0).getnnz(axis=1) > 0
+
+    return ~positive & (bound >= 0)
+
+
+def _dominated_rows(matrix, bound):
+    """
+    Capacity rows implied by another capacity row: row i is dominated by
+    row j when every column of row i is in row j (all coefficients are 1)
+    and the capacity of row i is not smaller. Of identical rows, the first
+    one is kept.
+    """
+
+    pattern = (matrix != 0).astype(np.int64)
+    size = pattern.getnnz(axis=1)
+
+    overlap = (pattern @ pattern.T).tocoo()
+    i, j = overlap.row, overlap.col
+
+    # Column set of row i inside the column set of row j
+    subset = (i != j) & (overlap.data == size[i]) & (bound[i] >= bound[j])
+    identical = (size[i] == size[j]) & (bound[i] == bound[j])
+    select = subset & ~(identical & (i < j))
+
+    dominated = np.zeros(matrix.shape[0], dtype=bool)
+    dominated[i[select]] = True
+
+    return dominated
+
+
+def reduce_program(data=Data):
+    """
+    Remove the rows and columns of the linear program that cannot change
+    its optimal solution, before it goes to the solver:
+
+    - Routes (outbound columns) with a NaN cost or a cost above
+      Data.route_cost_limit, which can never be used.
+    - Capacity rows dominated by another capacity row.
+    - Rows that hold for any non-negative volume, e.g. the demand row of a
+      customer with zero demand, or a supply row none of whose routes are
+      left.
+    - Columns that only take up capacity or supply and cost something,
+      which are zero at the optimum, e.g. the routes of a customer with
+      zero demand, or the inbound of a supply row with no route left.
+
+    The last two rules are repeated until nothing changes. The reduced
+    linear program replaces the full one in the model, see expand_solution to
+    get the full one back.
+
+    Inputs to data.py
+    -----------------
+    Data.objective_vector: numpy.ndarray
+        Objective vector to minimize function value.
+
+    Data.constraints_matrix: scipy.sparse.csr_matrix
+        Constraints matrix to implement demand, capacity, supply constraints.
+
+    Data.constraints_vector: numpy.ndarray
+        Vector associated with the constraints matrix.
+
+    Data.dimF, Data.dimC, Data.capacity_rows: int
+        Dimensions of the blocks of the constraints matrix
+
+    Data.route_cost_limit: float
+        Routes above this outbound cost are removed
+
+    Output to data.py
+    -----------------
+    Data.objective_vector, Data.constraints_matrix, Data.constraints_vector
+        Reduced linear program
+
+    Data.presolve: dict
+        Full linear program and the rows and columns kept, used by
+        expand_solution
+
+    Data.presolve_summary: dict
+        Number of rows and columns removed ('rows', 'columns'), of which
+        unusable routes ('routes') and dominated capacity rows
+        ('dominated')
+    """
+
+    cost = data.objective_vector
+    matrix = data.constraints_matrix.tocsr()
+    bound = data.constraints_vector.flatten()
+
+    # Unusable routes, NaN compares as False
+    outbound = np.arange(cost.size) >= data.dimF
+    routes = outbound & ~(cost <= data.route_cost_limit)
+    columns = ~routes
+
+    rows = np.ones(matrix.shape[0], dtype=bool)
+    capacity = np.zeros(matrix.shape[0], dtype=bool)
+    capacity[data.dimC:data.dimC + data.capacity_rows] = True
+
+    dominated = capacity.copy()
+    dominated[capacity] = _dominated_rows(
+        matrix[capacity][:, columns], bound[capacity])
+    rows &= ~dominated
+
+    while True:
+        reduced = matrix[rows][:, columns]
+
+        redundant = np.zeros(matrix.shape[0], dtype=bool)
+        redundant[rows] = _redundant_rows(reduced, bound[rows])
+
+        # Columns without a negative coefficient in the rows left
+        negative = reduced.multiply(reduced < 0).getnnz(axis=0) > 0
+        fixed = np.zeros(cost.size, dtype=bool)
+        fixed[columns] = ~negative & (cost[columns] >= 0)
+
+        if not (np.any(redundant) or np.any(fixed)):
+            break
+
+        rows &= ~redundant
+        columns &= ~fixed
+
+    # A demand row left without any route cannot be met
+    check(np.all(reduced.getnnz(axis=1) > 0),
+          'Some customer has demand but no usable route')
+
+    data.presolve = {'objective_vector': cost, 'constraints_matrix': matrix,
+                     'constraints_vector': data.constraints_vector,
+                     'columns': np.flatnonzero(columns),
+                     'rows': np.flatnonzero(rows)}
+
+    data.presolve_summary = {'rows': int(np.sum(~rows)),
+                             'columns': int(np.sum(~columns)),
+                             'routes': int(np.sum(routes)),
+                             'dominated': int(np.sum(dominated))}
+
+    data.objective_vector = cost[columns]
+    data.constraints_matrix = reduced
+    data.constraints_vector = bound[rows][:, np.newaxis]
+
+
+def expand_solution(data=Data):
+    """
+    Expand the solution of the reduced linear program back to the full
+    one, the columns removed by reduce_program are zero.
+
+    Inputs to data.py
+    -----------------
+    Data.presolve: dict
+        Full linear program and the columns kept by reduce_program
+
+    Data.linear_program: numpy.ndarray
+        Optimal solution of the reduced linear program
+
+    Data.row_dual, Data.cost_ranging, Data.bound_ranging: numpy.ndarray
+        Sensitivity of the reduced linear program, if any
+
+    Output to data.py
+    -----------------
+    Data.objective_vector, Data.constraints_matrix, Data.constraints_vector
+        Full linear program
+
+    Data.linear_program: numpy.ndarray
+        Optimal solution of the full linear program
+
+    Data.row_dual, Data.cost_ranging, Data.bound_ranging: numpy.ndarray
+        Sensitivity of the full linear program. The rows removed are not
+        binding (dual 0) and the ranging of what was removed is NaN.
+    """
+
+    columns, rows = data.presolve['columns'], data.presolve['rows']
+    no_columns = data.presolve['objective_vector'].size
+    no_rows = data.presolve['constraints_vector'].size
+
+    solution = np.zeros(no_columns)
+    solution[columns] = data.linear_program
+
+    # Sensitivity is only there when optimize asked for it
+    if getattr(data, 'row_dual', None) is not None:
+        row_dual = np.zeros(no_rows)
+        row_dual[rows] = data.row_dual
+        data.row_dual = row_dual
+
+    for attr, index, size in [('cost_ranging', columns, no_columns),
+                              ('bound_ranging', rows, no_rows)]:
+        if getattr(data, attr, None) is not None:
+            ranging = np.full((size, 2), np.nan)
+            ranging[index] = getattr(data, attr)
+            setattr(data, attr, ranging)
+
+    data.linear_program = solution
+    data.objective_vector = data.presolve['objective_vector']
+    data.constraints_matrix = data.presolve['constraints_matrix']
+    data.constraints_vector = data.presolve['constraints_vector']
+
+    del data.presolve
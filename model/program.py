@@ -2,22 +2,171 @@ from model import *
 from model.preprocessing import *
 from model.optimization import *
 from model.postprocessing import *
+from model.export import export
+from model.instrument import span
+from model.data import Model, ModelResults, SETTINGS
+from model.sink import result_location
+from model.validation import check
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import os
 
-def execute():
-    """Execute the Optimizer from end to end"""
 
-    # Get timeframe
-    get_timeframe()
+def solve_year(warm_start=False, engine='highs', decompose=False,
+               presolve=True, sensitivity=False, data=Data, results=Results):
+    """Preprocess, optimize and postprocess data.year, then free memory"""
 
-    for Data.year in range(Data.timeframe[0], Data.timeframe[1]+1):
+    # Run program
+    with span('preprocess', year=data.year):
+        preprocess(data=data)  # preprocessing
+    with span('optimize', year=data.year):
+        optimize(warm_start, engine, decompose, presolve=presolve,
+                 sensitivity=sensitivity, data=data)  # optimization
+    with span('postprocess', year=data.year):
+        postprocess(data=data, results=results)  # postprocess
 
-        # Run program
-        preprocess()  # preprocessing
-        optimize()  # optimization
-        postprocess()  # postprocess
+    # Free up memory
+    free_memory(data=data)
 
-        # Free up memory
-        free_memory()
 
-    # Save data
-    save_to_excel()
\ No newline at end of file
+def _start_worker(filepath, timeframe, inputs, location, settings):
+    """Share the parsed input file with a worker process, once per worker,
+    along with the result directory, the settings of the model and the key
+    of the input file (which names its sidecar files). With sidecar files,
+    the input file comes without the values of the sheets they hold, see
+    preprocessing.write_sidecars"""
+
+    Data.filepath, Data.timeframe, Data.inputs = filepath, timeframe, inputs
+    Results.location = location
+
+    for attr, value in settings.items():
+        setattr(Data, attr, value)
+
+
+def _solve_in_worker(year, engine, presolve, sensitivity):
+    """Solve a single year in a worker process, which writes its volume,
+    cost and sensitivity to the result directory, and send back the rest of its
+    results along with the model attributes that export needs"""
+
+    data = Model(filepath=Data.filepath, timeframe=Data.timeframe,
+                 inputs=Data.inputs, input_key=Data.input_key, year=year,
+                 **{attr: getattr(Data, attr) for attr in SETTINGS})
+    results = ModelResults()
+    results.location = Results.location
+
+    solve_year(engine=engine, presolve=presolve, sensitivity=sensitivity,
+               data=data, results=results)
+
+    kept = {attr: getattr(data, attr) for attr in
+            ["factory_sizes", "customer_sizes", "factory_names",
+             "customer_names", "customer_provinces", "product_list",
+             "factory_list", "column_index"]}
+
+    return results.presolve[0], results.sensitivity[0], results.split, kept
+
+
+def execute(workers=1, warm_start=False, engine='highs', decompose=False,
+            presolve=True, sensitivity=False, years=None, data=Data,
+            results=Results):
+    """
+    Execute the Optimizer from end to end
+
+    Parameters
+    ----------
+    workers: int
+        Number of worker processes solving the years of the timeframe in
+        parallel (None uses every core). With 1 (default), the years are
+        solved one after the other in this process. Either way, the
+        results are collected in year order, so the output is the same.
+    warm_start: bool
+        Start each year's solve from the optimal basis of the year before
+        (see optimization.warm_start_solve). Years are then solved in
+        order, so it needs workers = 1.
+    engine: str
+        Solver engine of every year, see optimization.optimize
+    decompose: bool
+        Solve the independent product groups of every year in parallel
+        (see optimization.decomposed_solve). The worker processes then go
+        to the groups, so it needs workers = 1.
+    presolve: bool
+        Presolve every year's linear program, see optimization.optimize.
+        The rows and columns removed are reported in Results.presolve.
+    sensitivity: bool
+        Keep every year's duals, slacks, reduced costs and ranging in
+        the result directory and save them to the output file, see
+        postprocessing.sensitivity_tables
+    years: list
+        Years to solve, within the timeframe of the input file, each once
+        and in order (None solves every year of it)
+    data: model.data.Model
+        Model to run, the module-level Data by default
+    results: model.data.ModelResults
+        Where the results are collected, the module-level Results by
+        default
+
+    Every step of the run is a span of instrument.py, e.g.
+
+        with instrument.recording(memory=True) as records:
+            execute()
+
+    gives the time, memory and matrix sizes of every step.
+    """
+
+    check(not (warm_start and workers != 1),
+          'Warm start solves the years in order, it needs workers = 1')
+
+    check(not (decompose and workers != 1),
+          'Decomposition runs the groups in parallel, it needs workers = 1')
+
+    # Results of this run only
+    results.years, results.presolve, results.sensitivity = [], [], []
+
+    # Parse the input file once, then get timeframe
+    with span('load_inputs'):
+        load_inputs(data=data)
+    get_timeframe(data=data)
+
+    if years is None:
+        years = range(data.timeframe[0], data.timeframe[1]+1)
+    else:
+        years = sorted(set(years))
+        check(len(years) > 0 and data.timeframe[0] <= years[0] and
+              years[-1] <= data.timeframe[1],
+              f'Years to solve must be in the timeframe {data.timeframe}')
+
+    # The years then map the outbound cost and the demand from the sidecar
+    # files, rather than each holding (and each worker receiving) the
+    # whole sheets
+    if data.sidecar_location is not None:
+        with span('write_sidecars'):
+            write_sidecars(years, data=data)
+
+    if workers == 1:
+        for data.year in years:
+            solve_year(warm_start, engine, decompose, presolve, sensitivity,
+                       data=data, results=results)
+
+    else:
+        with ProcessPoolExecutor(
+                max_workers=min(workers or os.cpu_count(), len(years)),
+                initializer=_start_worker,
+                initargs=(data.filepath, data.timeframe, data.inputs,
+                          result_location(results),
+                          {attr: getattr(data, attr)
+                           for attr in SETTINGS + ('input_key',)})) as pool:
+
+            # map yields in year order, whatever order the years finish in
+            for year, (summary, kept_tables, results.split, kept) in zip(
+                    years, pool.map(_solve_in_worker, years, repeat(engine),
+                                    repeat(presolve), repeat(sensitivity))):
+                results.years.append(year)
+                results.presolve.append(summary)
+                results.sensitivity.append(kept_tables)
+
+        # export labels the rows with the last year's data
+        for attr, value in kept.items():
+            setattr(data, attr, value)
+
+    # Save data, in the format of the extension of Results.save_location
+    with span('export', years=len(results.years)):
+        export(data=data, results=results)
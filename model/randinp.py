@@ -1,5 +1,7 @@
 from model import *
 from model.data import Data
+from model.preprocessing import index_columns, _index_by_year
+from model.export import exporters, write_xlsx
 
 
 class RandomInputs:
@@ -19,8 +21,11 @@ class RandomInputs:
                  no_supply_constraints=5,
                  supply_constraints_range=(1, 3),
                  demand_volume_range=(1, 20),
-                 capacity_volume_range=(1000, 10_000)):
-        """Initialized Parameters to Generate Inputs"""
+                 capacity_volume_range=(1000, 10_000),
+                 seed=None):
+        """Initialized Parameters to Generate Inputs. Instances are drawn
+        from a np.random.Generator of the seed, so the instances generated
+        after RandomInputs(seed=0) are always the same."""
 
         self.no_products = no_products
         self.no_factories = no_factories
@@ -43,6 +48,8 @@ class RandomInputs:
         self.demand_volume_range = demand_volume_range
         self.capacity_volume_range = capacity_volume_range
 
+        self.rng = np.random.default_rng(seed)
+
         # Check that the inputs is valid
         assert self.factory_sizes_range[
                    1] <= self.no_factories, 'The sample size must be smaller ' \
@@ -71,99 +78,375 @@ class RandomInputs:
                                            'cannot exceed the number of ' \
                                            'products'
 
-    def generate(self):
+    def generate(self, data=Data):
         """Generate Random Pre-Processing Inputs for User Defined Parameters"""
 
-        Data.product_list = list(range(self.no_products))
-        Data.factory_list = np.arange(self.no_factories)
+        data.product_list = list(range(self.no_products))
+        data.factory_list = np.arange(self.no_factories)
 
-        Data.factory_sizes = dict(
-            zip(Data.product_list, [
-                np.random.randint(self.factory_sizes_range[0],
-                                  self.factory_sizes_range[1] + 1)
-                for _ in Data.product_list
-            ]))
+        # One draw for all the products, in the order of the draws per
+        # product, so the instances of a seed do not change
+        factory_sizes = self.rng.integers(self.factory_sizes_range[0],
+                                          self.factory_sizes_range[1] + 1,
+                                          size=self.no_products)
+        customer_sizes = self.rng.integers(self.customer_sizes_range[0],
+                                           self.customer_sizes_range[1] + 1,
+                                           size=self.no_products)
+
+        data.factory_sizes = dict(zip(data.product_list,
+                                      factory_sizes.tolist()))
+        data.customer_sizes = dict(zip(data.product_list,
+                                       customer_sizes.tolist()))
 
-        Data.customer_sizes = dict(
-            zip(Data.product_list, [
-                np.random.randint(self.customer_sizes_range[0],
-                                  self.customer_sizes_range[1] + 1)
-                for _ in Data.product_list
+        # Samples without replacement, one per product
+        data.factory_names = dict(
+            zip(data.product_list, [
+                self.rng.choice(a=data.factory_list,
+                                size=data.factory_sizes[prod],
+                                replace=False) for prod in data.product_list
             ]))
 
-        Data.factory_names = dict(
-            zip(Data.product_list, [
-                np.random.choice(a=Data.factory_list,
-                                 size=Data.factory_sizes[prod],
-                                 replace=False) for prod in Data.product_list
+        data.customer_names = dict(
+            zip(data.product_list, [
+                self.rng.choice(a=self.no_customers,
+                                size=data.customer_sizes[prod],
+                                replace=False) for prod in data.product_list
             ]))
 
-        Data.dimF = sum(Data.factory_sizes.values())
+        data.dimF = int(factory_sizes.sum())
+        data.dimC = int(customer_sizes.sum())
+        data.dimFC = int(factory_sizes @ customer_sizes)
 
-        Data.dimC = sum(Data.customer_sizes.values())
-        Data.dimFC = sum(
-            np.array(list(Data.customer_sizes.values())) *
-            np.array(list(Data.factory_sizes.values())))
+        index_columns(data=data)
 
-        Data.inbound_cost_per_product = dict(
-            zip(Data.product_list, [
-                np.random.uniform(*self.inbound_cost_range,
-                                  size=Data.factory_sizes[prod])
-                for prod in Data.product_list
-            ]))
+        def per_product(values, sizes):
+            """Values of all the products, split by product"""
 
-        Data.outbound_cost_per_product = dict(
-            zip(Data.product_list, [
-                np.random.uniform(
-                    *self.outbound_cost_range,
-                    size=Data.factory_sizes[prod] * Data.customer_sizes[prod])
-                for prod in Data.product_list
-            ]))
+            return dict(zip(data.product_list,
+                            np.split(values, np.cumsum(sizes)[:-1])))
 
-        Data.efficiency_per_product = dict(
-            zip(Data.product_list, [
-                np.random.uniform(*self.efficiency_range,
-                                  size=Data.factory_sizes[prod])
-                for prod in Data.product_list
-            ]))
+        data.inbound_cost_per_product = per_product(
+            self.rng.uniform(*self.inbound_cost_range, size=data.dimF),
+            factory_sizes)
+
+        data.outbound_cost_per_product = per_product(
+            self.rng.uniform(*self.outbound_cost_range, size=data.dimFC),
+            factory_sizes * customer_sizes)
+
+        data.efficiency_per_product = per_product(
+            self.rng.uniform(*self.efficiency_range, size=data.dimF),
+            factory_sizes)
 
-        Data.capacity_constraints = [
+        data.capacity_constraints = [
             list(cons) for cons in {
                 tuple(
                     sorted(
-                        np.random.choice(
-                            Data.product_list,
-                            size=np.random.randint(
+                        self.rng.choice(
+                            data.product_list,
+                            size=int(self.rng.integers(
                                 self.capacity_constraints_range[0],
-                                self.capacity_constraints_range[1] + 1),
+                                self.capacity_constraints_range[1] + 1)),
                             replace=False).tolist()))
                 for _ in range(self.no_capacity_constraints)
             }
         ]
 
-        Data.supply_constraints = [
+        data.supply_constraints = [
             list(cons) for cons in {
                 tuple(
                     sorted(
-                        np.random.choice(Data.product_list,
-                                         size=np.random.randint(
-                                             self.supply_constraints_range[0],
-                                             self.supply_constraints_range[1] +
-                                             1),
-                                         replace=False).tolist()))
+                        self.rng.choice(data.product_list,
+                                        size=int(self.rng.integers(
+                                            self.supply_constraints_range[0],
+                                            self.supply_constraints_range[1] +
+                                            1)),
+                                        replace=False).tolist()))
                 for _ in range(self.no_supply_constraints)
             }
         ]
 
-        Data.demand_volume = np.random.uniform(*self.demand_volume_range,
-                                               size=(Data.dimC, 1))
+        data.demand_volume = self.rng.uniform(*self.demand_volume_range,
+                                              size=(data.dimC, 1))
+
+        # A row per factory of the products of every capacity constraint
+        factories = np.zeros((self.no_products, self.no_factories),
+                             dtype=bool)
+        codes = data.column_index[:data.dimF]
+        factories[codes['product'], codes['factory']] = True
+
+        products = np.zeros((len(data.capacity_constraints),
+                             self.no_products), dtype=bool)
+        for row, cons in enumerate(data.capacity_constraints):
+            products[row, cons] = True
 
-        capacity_rows = sum([
-            len(
-                reduce(lambda a, b: a.union(b),
-                       [set(Data.factory_names[prod]) for prod in cons]))
-            for cons in Data.capacity_constraints
-        ])
+        capacity_rows = int(np.count_nonzero(
+            products.astype(int) @ factories.astype(int)))
 
-        Data.capacity_volume = np.random.uniform(
+        data.capacity_volume = self.rng.uniform(
             *self.capacity_volume_range, size=capacity_rows)[:, np.newaxis]
+
+
+class RandomWorkbook:
+    """Class to generate seeded random input workbooks, over several years,
+    with the sheets that preprocessing.raw_inputs expects"""
+
+    def __init__(self,
+                 no_products=3,
+                 no_factories=5,
+                 no_customers=100,
+                 no_years=2,
+                 start_year=2022,
+                 no_provinces=10,
+                 factory_share=0.5,
+                 inbound_cost_range=(1, 10),
+                 outbound_cost_range=(1, 100),
+                 efficiency_range=(0.8, 1),
+                 no_capacity_constraints=2,
+                 no_supply_constraints=1,
+                 demand_volume_range=(1, 100),
+                 growth_range=(0, 0.1),
+                 capacity_slack_range=(1.2, 2),
+                 outbound_rates=False,
+                 adjustment_range=None,
+                 seed=None):
+        """
+        Initialized Parameters to Generate Workbooks. The same seed always
+        gives the same workbook, e.g. 50k customers, 30 factories and 10
+        years in a few seconds:
+
+            RandomWorkbook(no_products=20, no_factories=30,
+                           no_customers=50_000, no_years=10, seed=0)
+
+        Every customer buys one product, and every product is made in at
+        least one factory (each with probability factory_share). Costs and
+        demand grow every year by a rate drawn from growth_range. The
+        capacity and supply constraints are random partitions of the
+        products, and the capacity of a factory in a constraint is
+        capacity_slack_range times the demand of the products it makes in
+        the constraint, so every year is feasible.
+
+        With outbound_rates, the outbound cost is given per province (the
+        "Outbound Rate" sheet, see preprocessing.rate_inputs) rather than
+        per customer, along with an "Outbound Adjustment" factor of every
+        customer drawn from adjustment_range, if any.
+        """
+
+        self.no_products = no_products
+        self.no_factories = no_factories
+        self.no_customers = no_customers
+
+        self.no_years = no_years
+        self.start_year = start_year
+        self.no_provinces = no_provinces
+        self.factory_share = factory_share
+
+        self.inbound_cost_range = inbound_cost_range
+        self.outbound_cost_range = outbound_cost_range
+        self.efficiency_range = efficiency_range
+
+        self.no_capacity_constraints = no_capacity_constraints
+        self.no_supply_constraints = no_supply_constraints
+
+        self.demand_volume_range = demand_volume_range
+        self.growth_range = growth_range
+        self.capacity_slack_range = capacity_slack_range
+
+        self.outbound_rates = outbound_rates
+        self.adjustment_range = adjustment_range
+
+        self.seed = seed
+
+        # Check that the inputs is valid
+        assert self.efficiency_range[
+                   1] <= 1, 'Efficiency cannot be bigger than 1'
+
+        assert self.no_years >= 2, 'Timeframe must span at least 2 years'
+
+        assert 0 < self.factory_share <= 1, 'Factory share must be in (0, 1]'
+
+        assert 0 < self.no_capacity_constraints <= self.no_products, \
+            'Number of capacity constraints must be between 1 and the ' \
+            'number of products'
+
+        assert 0 < self.no_supply_constraints <= self.no_products, \
+            'Number of supply constraints must be between 1 and the ' \
+            'number of products'
+
+    @staticmethod
+    def _names(prefix, size):
+        """Names "<prefix>0001", ... of a list, zero padded to sort"""
+
+        width = len(str(size))
+        return [f'{prefix}{i:0{width}d}' for i in range(1, size + 1)]
+
+    @staticmethod
+    def _yearly(labels, years, names, values):
+        """Sheet of label columns, then "<year> - <name>" columns of the
+        values (rows x years x names)"""
+
+        columns = [f'{year} - {name}' for year in years for name in names]
+
+        return pd.concat([
+            pd.DataFrame(labels),
+            pd.DataFrame(values.reshape(values.shape[0], -1),
+                         columns=columns)
+        ], axis=1)
+
+    def _partition(self, rng, size):
+        """Constraints (size x products) of a random partition of the
+        products into size non-empty groups"""
+
+        groups = np.arange(self.no_products) % size
+        return rng.permutation(groups)[np.newaxis, :] == \
+            np.arange(size)[:, np.newaxis]
+
+    def sheets(self):
+        """
+        Generate the sheets of the input workbook, from a new
+        np.random.Generator of the seed, so that every call returns the
+        same sheets.
+
+        Returns
+        -------
+        dict
+            {sheet name: pandas.DataFrame}, as pandas.read_excel on the
+            input Excel file
+        """
+
+        rng = np.random.default_rng(self.seed)
+
+        years = np.arange(self.start_year, self.start_year + self.no_years)
+        products = self._names('P', self.no_products)
+        factories = self._names('F', self.no_factories)
+        customers = self._names('C', self.no_customers)
+
+        # Factories of every product, at least one each
+        produces = rng.random((self.no_products, self.no_factories)) < \
+            self.factory_share
+        produces[np.arange(self.no_products),
+                 rng.integers(self.no_factories, size=self.no_products)] = True
+
+        # Customers, sorted by the product they buy
+        bought = np.sort(rng.integers(self.no_products,
+                                      size=self.no_customers))
+        customer_labels = {
+            'Customer ID': customers,
+            'Province': rng.integers(1, self.no_provinces + 1,
+                                     size=self.no_customers),
+            'Sales Product': np.array(products, dtype=object)[bought]}
+
+        # Growth factors of every year (years x rows), from 1 the first year
+        def growth(rows):
+            rates = rng.uniform(*self.growth_range, size=(self.no_years, rows))
+            rates[0] = 0
+            return np.cumprod(1 + rates, axis=0)
+
+        # Costs and efficiencies (years x products x factories), NaN where
+        # the factory does not make the product
+        inbound = rng.uniform(*self.inbound_cost_range,
+                              size=(self.no_products, self.no_factories)) * \
+            growth(self.no_products)[:, :, np.newaxis]
+        inbound[:, ~produces] = np.nan
+
+        efficiency = np.where(
+            produces, rng.uniform(*self.efficiency_range,
+                                  size=(self.no_products, self.no_factories)),
+            np.nan)
+
+        # Outbound cost (years x customers or provinces x factories)
+        rows = self.no_provinces if self.outbound_rates else self.no_customers
+        outbound = rng.uniform(*self.outbound_cost_range,
+                               size=(rows, self.no_factories)) * \
+            growth(rows)[:, :, np.newaxis]
+
+        # Demand (years x customers) and its total per product
+        demand = rng.uniform(*self.demand_volume_range,
+                             size=self.no_customers) * \
+            growth(self.no_customers)
+        product_demand = np.zeros((self.no_years, self.no_products))
+        np.add.at(product_demand.T, bought, demand.T)
+
+        # Constraints (constraints x products)
+        capacity_constraints = self._partition(rng,
+                                               self.no_capacity_constraints)
+        supply_constraints = self._partition(rng, self.no_supply_constraints)
+
+        # Capacity (years x constraints x factories): enough for a factory to
+        # make all the demand of its products in the constraint
+        made = capacity_constraints[:, :, np.newaxis] & produces
+        capacity = np.einsum('kpf,yp->ykf', made, product_demand) * \
+            rng.uniform(*self.capacity_slack_range,
+                        size=(self.no_years, self.no_capacity_constraints,
+                              self.no_factories))
+        capacity[:, ~made.any(axis=1)] = np.nan
+
+        constraint_labels = {
+            'CONSTRAINT': np.arange(1, self.no_capacity_constraints + 1)}
+
+        def per_year(values):
+            """Rows x years x ... values from years x rows x ..."""
+            return np.moveaxis(values, 0, 1)
+
+        if not self.outbound_rates:
+            outbound_sheets = {'Outbound Cost': self._yearly(
+                customer_labels, years, factories, per_year(outbound))}
+        else:
+            outbound_sheets = {'Outbound Rate': self._yearly(
+                {'Province': np.arange(1, self.no_provinces + 1)}, years,
+                factories, per_year(outbound))}
+
+            if self.adjustment_range is not None:
+                outbound_sheets['Outbound Adjustment'] = self._yearly(
+                    customer_labels, years, ['Adjustment'],
+                    rng.uniform(*self.adjustment_range,
+                                size=(self.no_customers, self.no_years)))
+
+        return {
+            'Timeframe': pd.DataFrame({'Start': [years[0]],
+                                       'End': [years[-1]]}),
+            'Factory List': pd.DataFrame({'FACTORY': factories}),
+            'Product List': pd.DataFrame({'PRODUCT': products}),
+            'Customer List': pd.DataFrame(customer_labels),
+            'Factory Per Product': self._yearly(
+                {'PRODUCT': products}, years, factories,
+                np.repeat(produces[:, np.newaxis], self.no_years, axis=1)),
+            'Sales Volume': self._yearly(
+                customer_labels, years, ['Sales Volume'], demand.T),
+            **outbound_sheets,
+            'Inbound Cost Per Product': self._yearly(
+                {'PRODUCT': products}, years, factories, per_year(inbound)),
+            'Efficiency Per Product': self._yearly(
+                {'PRODUCT': products}, years, factories,
+                np.repeat(efficiency[:, np.newaxis], self.no_years, axis=1)),
+            'Capacity Constraints': self._yearly(
+                constraint_labels, years, products,
+                np.repeat(capacity_constraints[:, np.newaxis], self.no_years,
+                          axis=1)),
+            'Capacity Volume': self._yearly(
+                constraint_labels, years, factories, per_year(capacity)),
+            'Supply Constraints': self._yearly(
+                {'CONSTRAINT': np.arange(1, self.no_supply_constraints + 1)},
+                years, products,
+                np.repeat(supply_constraints[:, np.newaxis], self.no_years,
+                          axis=1))}
+
+    def inputs(self):
+        """Sheets as parsed by preprocessing.load_inputs, to set Data.inputs
+        without writing and parsing the workbook (e.g. to benchmark the
+        solver alone on the data of an end-to-end benchmark)"""
+
+        return {sheet: _index_by_year(df)
+                for sheet, df in self.sheets().items()}
+
+    def write_workbook(self, location):
+        """Write the sheets to an input Excel file at location, to run
+        program.execute on (streamed, see export.write_xlsx)"""
+
+        write_xlsx(self.sheets().items(), location)
+
+    def write_columnar(self, location, output_format='parquet'):
+        """Write every sheet to its own file, "<location without extension>
+        - <sheet>.<output_format>", as a columnar dataset (parquet, arrow or
+        csv, see export.exporters)"""
+
+        exporters[output_format](self.sheets().items(), location)
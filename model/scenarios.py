@@ -0,0 +1,255 @@
+from model import *
+from model.data import Data
+from model.optimization import generate_objective_vector
+from model.optimization import generate_demand_matrix
+from model.optimization import generate_combination_matrices
+from model.optimization import generate_capacity_matrix
+from model.optimization import generate_supply_matrix
+from model.optimization import generate_constraints_matrix
+from model.optimization import generate_constraints_vector
+from model.postprocessing import variable_labels, constraint_labels
+from model.solvers import highspy, default_backend, highs_model, run_highs
+from model.solvers import solve
+from concurrent.futures import ProcessPoolExecutor
+
+# Linear program shared by the scenarios of a worker, see _start_worker
+_shared = {}
+
+
+def _select_columns(product, factory, data=Data):
+    """Mask of the columns of a product and/or a factory (None matches all
+    of them), by their integer codes in Data.column_index. A name not in
+    Data.product_list / Data.factory_list raises a ValueError."""
+
+    index = data.column_index
+
+    select = np.ones(len(index), dtype=bool)
+    if product is not None:
+        select &= index['product'] == list(data.product_list).index(product)
+    if factory is not None:
+        select &= index['factory'] == list(data.factory_list).index(factory)
+
+    return select
+
+
+def route_columns(product=None, factory=None, customer=None,
+                  data=Data):
+    """
+    Columns of the outbound routes of a product, a factory and/or a
+    customer (None matches all of them), to use in a scenario.
+
+    Inputs from data.py
+    -------------------
+    Data.column_index, Data.product_list, Data.factory_list,
+    Data.customer_names
+        The names are resolved to integer codes once, the columns are then
+        selected on the codes (see preprocessing.index_columns)
+
+    Returns
+    -------
+    numpy.ndarray
+        Indices of the columns in the objective vector
+    """
+
+    customers = data.column_index['customer']
+
+    select = _select_columns(product, factory, data=data) & (customers >= 0)
+    if customer is not None:
+        # Positions of the customer among the customers of all products
+        names = np.hstack([data.customer_names[prod]
+                           for prod in data.product_list])
+        select &= np.isin(customers, np.flatnonzero(names == customer))
+
+    return np.flatnonzero(select)
+
+
+def inbound_columns(product=None, factory=None, data=Data):
+    """
+    Columns of the inbound of a product and/or a factory (None matches all
+    of them), to use in a scenario. See route_columns.
+    """
+
+    return np.flatnonzero(_select_columns(product, factory, data=data) &
+                          (data.column_index['customer'] < 0))
+
+
+def capacity_rows(factory, data=Data):
+    """
+    Rows of the capacity constraints of a factory, to use in a scenario.
+
+    Inputs from data.py
+    -------------------
+    Same as postprocessing.constraint_labels
+
+    Returns
+    -------
+    numpy.ndarray
+        Indices of the rows in the constraints vector
+    """
+
+    labels = constraint_labels(data=data)
+
+    return np.flatnonzero((labels['Type'] == 'Capacity') &
+                          (labels['Factory'] == factory))
+
+
+def _shared_model(cost, matrix, bound, backend, options):
+    """Linear program shared by the scenarios, with the solver backend
+    and the HiGHS options of the model (see solvers.solve)"""
+
+    shared = {'cost': cost, 'matrix': matrix, 'bound': bound,
+              'backend': backend, 'options': options}
+
+    if backend == 'highspy':
+        # The model is passed to HiGHS once, the scenarios only change its
+        # costs and bounds and start from the basis of the one before
+        shared['highs'] = highs_model(np.nan_to_num(cost), matrix, bound,
+                                      options)
+
+    return shared
+
+
+def _start_worker(cost, matrix, bound, backend, options):
+    """Share the linear program with a worker process, once per worker"""
+
+    _shared.update(_shared_model(cost, matrix, bound, backend, options))
+
+
+def _solve_scenario(scenario, shared=_shared):
+    """Apply the deltas of a scenario to the shared linear program and
+    solve it. Returns its solvers.SolveResult"""
+
+    cost, bound = shared['cost'].copy(), shared['bound'].copy()
+
+    for columns, factor in scenario.get('objective', []):
+        cost[columns] *= factor
+    for rows, factor in scenario.get('constraints', []):
+        bound[rows] *= factor
+
+    # Routes without cost are always closed
+    upper = np.where(np.isnan(cost), 0, np.inf)
+    upper[np.asarray(scenario.get('closed', []), dtype=int)] = 0
+    cost = np.nan_to_num(cost)
+
+    if 'highs' not in shared:
+        return solve(cost, shared['matrix'], bound, shared['backend'],
+                     shared['options'], upper)
+
+    highs, columns, rows = shared['highs'], np.arange(cost.size), \
+        np.arange(bound.size)
+
+    highs.changeColsCost(cost.size, columns, cost)
+    highs.changeColsBounds(cost.size, columns, np.zeros(cost.size),
+                           np.minimum(upper, highspy.kHighsInf))
+    highs.changeRowsBounds(bound.size, rows,
+                           np.full(bound.size, -highspy.kHighsInf), bound)
+
+    return run_highs(highs, scenario=scenario.get('name'))
+
+
+def run_scenarios(scenarios, workers=None, data=Data):
+    """
+    Solve what-if variants (scenarios) of the preprocessed year.
+
+    The linear program is built once and shared with the worker processes,
+    every scenario then only changes its costs and bounds before it is
+    solved, so no input file is parsed and no matrix is rebuilt.
+
+    A scenario is a dict with the (optional) keys:
+    - 'name': name of the scenario in the table (defaults to its position)
+    - 'objective': list of (columns, factor), the cost of the columns is
+      multiplied by the factor, e.g. (route_columns(), 1.1) for +10%
+      outbound cost
+    - 'constraints': list of (rows, factor), the bound of the rows is
+      multiplied by the factor, e.g. (capacity_rows('F1'), 0.8) for -20%
+      capacity at F1
+    - 'closed': columns that cannot carry any volume, e.g.
+      np.hstack([route_columns(factory='F1'), inbound_columns(factory='F1')])
+      to close F1
+
+    Parameters
+    ----------
+    scenarios: list
+        List of scenarios, see above
+    workers: int
+        Number of worker processes (None uses every core). With 1, the
+        scenarios are solved one after the other in this process.
+
+    Inputs from data.py
+    -------------------
+    The preprocessing inputs of optimization.optimize
+
+    Data.solver, Data.solver_options
+        Solver backend and HiGHS options of the scenarios, see
+        solvers.solve
+
+    Output to data.py
+    -----------------
+    Data.scenario_status: dict
+        {scenario name: solver status}, the scenarios that are not
+        'Optimal' (e.g. infeasible) have no rows in the table
+
+    Data.scenario_results: dict
+        {scenario name: solvers.SolveResult}, with the iterations and time
+        of every solve
+
+    Returns
+    -------
+    pandas.DataFrame
+        Tidy table with one row per scenario and variable carrying volume:
+        'Scenario', 'Type', 'Product', 'Factory', 'Customer', 'Volume' and
+        'Cost' (volume times unit cost of the scenario)
+    """
+
+    # Shared constraint structure, built once
+    generate_objective_vector(data=data)
+    generate_demand_matrix(data=data)
+    generate_combination_matrices(data=data)
+    generate_capacity_matrix(data=data)
+    generate_supply_matrix(data=data)
+    generate_constraints_matrix(data=data)
+    generate_constraints_vector(data=data)
+
+    shared = (data.objective_vector, data.constraints_matrix,
+              data.constraints_vector.flatten(),
+              data.solver or default_backend(), data.solver_options)
+    names = [scenario.get('name', index)
+             for index, scenario in enumerate(scenarios)]
+
+    if workers == 1:
+        shared = _shared_model(*shared)
+        solves = [_solve_scenario(scenario, shared)
+                  for scenario in scenarios]
+
+    else:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_start_worker,
+                                 initargs=shared) as pool:
+            solves = list(pool.map(_solve_scenario, scenarios))
+
+    data.scenario_results = dict(zip(names, solves))
+    data.scenario_status = {name: result.status
+                            for name, result in zip(names, solves)}
+
+    # Unit cost of every scenario, to price its volume
+    labels, tables = variable_labels(data=data), []
+
+    for name, scenario, result in zip(names, scenarios, solves):
+        if not result.optimal:
+            continue
+        solution = result.solution
+
+        cost = data.objective_vector.copy()
+        for columns, factor in scenario.get('objective', []):
+            cost[columns] *= factor
+
+        used = solution > 0
+        table = labels[used].copy()
+        table.insert(0, 'Scenario', name)
+        table['Volume'] = solution[used]
+        table['Cost'] = solution[used] * cost[used]
+        tables.append(table)
+
+    return pd.concat(tables, ignore_index=True) if tables else \
+        pd.DataFrame(columns=['Scenario', 'Type', 'Product', 'Factory',
+                              'Customer', 'Volume', 'Cost'])
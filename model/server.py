@@ -0,0 +1,508 @@
+"""
+Local optimization job server, which keeps the preprocessed models in
+memory between requests.
+
+    python -m model.server --port 8765 --concurrency 4 --cache-size 8
+
+Every request is a JSON job, queued and solved on a pool of
+--concurrency threads, on a copy of the preprocessed model of its
+workbook and year. The models are kept in a least recently used cache
+(ModelCache) keyed by the content hash of the workbook and the year, so a
+repeated question against the same inputs skips the Excel parse and the
+preprocessing and goes straight to the solve.
+
+HTTP endpoints (JSON bodies):
+
+- POST /jobs: submit a job, e.g. {"filepath": "Inputs.xlsm",
+  "year": 2023, "engine": "colgen", "settings": {"route_cost_limit":
+  500}}, returns the job (202)
+- GET /jobs/<id>: the job, with its result once it is done
+- GET /jobs: every job, without results
+- GET /status: queue and cache statistics
+
+A job is {'id', 'status' ('queued', 'running', 'done' or 'failed'),
+'submitted', 'started', 'finished', 'result' or 'error'}, see Job.
+"""
+
+from model import *
+from model.data import Model
+from model.cache import cache_key
+from model.preprocessing import PARSER_VERSION, load_inputs, get_timeframe
+from model.preprocessing import preprocess
+from model.optimization import optimize
+from model.postprocessing import variable_labels
+from model.instrument import span
+from model.validation import check
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+import uuid
+
+# Settings a job may change, on its copy of the cached model
+JOB_SETTINGS = ('route_cost_limit', 'validation', 'solver', 'solver_options',
+                'colgen_routes')
+
+# Arguments of optimization.optimize a job may give
+JOB_OPTIONS = ('engine', 'decompose', 'presolve')
+
+# Finished jobs kept for GET /jobs/<id>, the oldest are dropped past it
+JOB_HISTORY = 1000
+
+_REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request',
+            404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+class ModelCache:
+
+    """
+    Preprocessed models kept in memory, keyed by (input key, year) where
+    the input key is the content hash of the workbook (cache.cache_key).
+    Past size models, the least recently used one is evicted. The parsed
+    workbooks are kept along with them, so another year of a cached
+    workbook is preprocessed without parsing it again.
+
+    The cache is shared by the threads of the server: a workbook is parsed
+    and preprocessed once even when several jobs ask for it at the same
+    time, and every job gets its own copy of the model (see get).
+    """
+
+    __slots__ = ('size', 'settings', 'models', 'inputs', 'hits', 'misses',
+                 '_lock', '_building')
+
+    def __init__(self, size=8, settings=None):
+        """Cache of size models, built with the settings of the model
+        (e.g. cache_location, sidecar_location)"""
+
+        self.size, self.settings = size, dict(settings or {})
+        self.models, self.inputs = OrderedDict(), OrderedDict()
+        self.hits = self.misses = 0
+        self._lock, self._building = threading.Lock(), {}
+
+    def _load(self, filepath, key):
+        """Parsed workbook of the key and its timeframe"""
+
+        with self._lock:
+            if key in self.inputs:
+                self.inputs.move_to_end(key)
+                return self.inputs[key]
+
+        data = Model(filepath=filepath, **self.settings)
+        with span('load_inputs'):
+            load_inputs(data=data)
+        get_timeframe(data=data)
+
+        with self._lock:
+            self.inputs[key] = data.inputs, data.timeframe
+            while len(self.inputs) > self.size:
+                self.inputs.popitem(last=False)
+
+        return data.inputs, data.timeframe
+
+    def get(self, filepath, year=None, **settings):
+        """
+        Copy of the preprocessed model of a workbook and year (None for
+        the first year of its timeframe), with the settings on top. The
+        arrays of the model are shared with the cached one, optimize only
+        sets new attributes on the copy.
+
+        Returns
+        -------
+        (model.data.Model, bool)
+            The model and whether it was in the cache
+        """
+
+        key = cache_key(filepath, PARSER_VERSION)
+
+        with self._lock:
+            # One lock per workbook, so that it is built once, counting
+            # the jobs that use it so the last one removes it
+            building = self._building.setdefault(key, [threading.Lock(), 0])
+            building[1] += 1
+
+        try:
+            with building[0]:
+                inputs, timeframe = self._load(filepath, key)
+                year = timeframe[0] if year is None else int(year)
+                check(timeframe[0] <= year <= timeframe[1],
+                      f'Year {year} is not in the timeframe {timeframe}')
+
+                with self._lock:
+                    cached = self.models.get((key, year))
+                    hit = cached is not None
+                    if hit:
+                        self.models.move_to_end((key, year))
+                        self.hits += 1
+
+                if not hit:
+                    cached = Model(filepath=filepath, inputs=inputs,
+                                   input_key=key, timeframe=timeframe,
+                                   year=year, **self.settings)
+                    with span('preprocess', year=year):
+                        preprocess(data=cached)
+
+                    with self._lock:
+                        self.misses += 1
+                        self.models[key, year] = cached
+                        while len(self.models) > self.size:
+                            self.models.popitem(last=False)
+        finally:
+            with self._lock:
+                building[1] -= 1
+                if building[1] == 0:
+                    del self._building[key]
+
+        copy = Model(**{attr: getattr(cached, attr)
+                        for attr in Model.__slots__ if hasattr(cached, attr)})
+        for attr, value in settings.items():
+            setattr(copy, attr, value)
+
+        return copy, hit
+
+    def statistics(self):
+        """Models, workbooks, hits and misses of the cache"""
+
+        with self._lock:
+            return {'size': self.size, 'models': len(self.models),
+                    'workbooks': len(self.inputs), 'hits': self.hits,
+                    'misses': self.misses}
+
+
+class Job:
+
+    """
+    Job of the server:
+
+    - 'id': hexadecimal id of the job
+    - 'request': the JSON request, see solve_job
+    - 'status': 'queued', 'running', 'done' or 'failed'
+    - 'submitted', 'started', 'finished': time of every step (time.time())
+    - 'result': result of solve_job once done
+    - 'error': error message once failed
+    """
+
+    __slots__ = ('id', 'request', 'status', 'submitted', 'started',
+                 'finished', 'result', 'error')
+
+    def __init__(self, request):
+        self.id, self.request, self.status = uuid.uuid4().hex, request, \
+            'queued'
+        self.submitted, self.started, self.finished = time.time(), None, None
+        self.result, self.error = None, None
+
+    def summary(self, result=True):
+        """JSON-ready dict of the job, with its result or not"""
+
+        summary = {attr: getattr(self, attr) for attr in
+                   ['id', 'status', 'submitted', 'started', 'finished']}
+
+        if self.error is not None:
+            summary['error'] = self.error
+        if result and self.result is not None:
+            summary['result'] = self.result
+
+        return summary
+
+
+def _check_request(request):
+    """Error message of an invalid job request, None if it is valid"""
+
+    if not isinstance(request, dict):
+        return 'A job must be a JSON object'
+    if not isinstance(request.get('filepath'), str):
+        return 'A job needs the "filepath" of its workbook'
+
+    unknown = set(request) - {'filepath', 'year', 'settings', 'routes',
+                              *JOB_OPTIONS}
+    if unknown:
+        return f'Unknown job keys {sorted(unknown)}'
+
+    unknown = set(request.get('settings', {})) - set(JOB_SETTINGS)
+    if unknown:
+        return f'Settings {sorted(unknown)} cannot be set by a job'
+
+    return None
+
+
+def solve_job(request, cache):
+    """
+    Solve a job on its cached model.
+
+    Parameters
+    ----------
+    request: dict
+        - 'filepath': path of the input workbook
+        - 'year': year to solve (the first of the timeframe by default)
+        - 'engine', 'decompose', 'presolve': see optimization.optimize
+        - 'settings': settings of the model among JOB_SETTINGS, e.g.
+          {"route_cost_limit": 500, "solver_options": {"threads": 1}}
+        - 'routes': return the volume and cost of every variable carrying
+          volume (True by default)
+    cache: ModelCache
+        Preprocessed models of the server
+
+    Returns
+    -------
+    dict
+        'year', 'cached' (model found in the cache), 'cost' (total cost),
+        'volume' (total outbound volume), 'status', 'iterations' and
+        'time' of the solve (None when not solved by HiGHS as a whole),
+        'colgen' (see Data.colgen_summary), 'seconds' (wall time of the
+        job) and 'routes' (records of 'Type', 'Product', 'Factory',
+        'Customer', 'Volume' and 'Cost')
+    """
+
+    start = time.perf_counter()
+
+    data, cached = cache.get(request['filepath'], request.get('year'),
+                             **request.get('settings', {}))
+    optimize(data=data, **{option: request[option]
+                           for option in JOB_OPTIONS if option in request})
+
+    used = data.linear_program > 0
+    cost = data.linear_program[used] * data.objective_vector[used]
+
+    result = {'year': data.year, 'cached': cached,
+              'cost': float(np.sum(cost)),
+              'volume': float(np.sum(data.linear_program[data.dimF:])),
+              'status': None, 'iterations': None, 'time': None,
+              'colgen': data.colgen_summary}
+
+    if data.solve_result is not None:
+        result.update(status=data.solve_result.status,
+                      iterations=int(data.solve_result.iterations),
+                      time=data.solve_result.time)
+
+    if request.get('routes', True):
+        routes = variable_labels(data=data)[used]
+        routes['Volume'], routes['Cost'] = data.linear_program[used], cost
+        result['routes'] = json.loads(routes.to_json(orient='records'))
+
+    result['seconds'] = time.perf_counter() - start
+
+    return result
+
+
+class JobServer:
+
+    """
+    Job queue of the server: jobs are solved in submission order by
+    concurrency workers, each running solve_job in a thread of the pool,
+    on the models of a shared ModelCache. The solves release the GIL
+    in HiGHS, so the threads run them side by side on the cached models,
+    which processes could not share.
+    """
+
+    __slots__ = ('concurrency', 'cache', 'jobs', 'queue', 'pool',
+                 '_workers')
+
+    def __init__(self, concurrency=2, cache_size=8, settings=None):
+        """Server of concurrency workers and a cache of cache_size models,
+        built with the settings of the model"""
+
+        self.concurrency = concurrency
+        self.cache = ModelCache(cache_size, settings)
+        self.jobs = OrderedDict()
+        self.queue, self.pool, self._workers = None, None, []
+
+    async def start(self):
+        """Start the workers, in the running event loop"""
+
+        self.queue = asyncio.Queue()
+        self.pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        self._workers = [asyncio.create_task(self._work())
+                         for _ in range(self.concurrency)]
+
+    async def stop(self):
+        """Cancel the workers and shut the thread pool down"""
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self.pool.shutdown(wait=True)
+
+    def submit(self, request):
+        """Queue a job request (see solve_job), returns its Job"""
+
+        job = Job(request)
+        self.jobs[job.id] = job
+        self.queue.put_nowait(job)
+
+        # Drop the oldest finished jobs
+        finished = [key for key, old in self.jobs.items()
+                    if old.finished is not None]
+        for key in finished[:max(len(finished) - JOB_HISTORY, 0)]:
+            del self.jobs[key]
+
+        return job
+
+    async def _work(self):
+        """Worker: solve the queued jobs one after the other"""
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            job = await self.queue.get()
+            job.status, job.started = 'running', time.time()
+
+            try:
+                job.result = await loop.run_in_executor(
+                    self.pool, solve_job, job.request, self.cache)
+                job.status = 'done'
+            except Exception as error:
+                job.status = 'failed'
+                job.error = f'{type(error).__name__}: {error}'
+            finally:
+                job.finished = time.time()
+                self.queue.task_done()
+
+    def statistics(self):
+        """Jobs per status, queue length and cache statistics"""
+
+        statuses = [job.status for job in self.jobs.values()]
+
+        return {'concurrency': self.concurrency,
+                'queued': self.queue.qsize(),
+                'jobs': {status: statuses.count(status)
+                         for status in ['queued', 'running', 'done',
+                                        'failed']},
+                'cache': self.cache.statistics()}
+
+    def route(self, method, path, body):
+        """(HTTP status, JSON-ready body) of a request"""
+
+        parts = [part for part in path.split('?')[0].split('/') if part]
+
+        if parts == ['status']:
+            if method != 'GET':
+                return 405, {'error': 'Use GET /status'}
+            return 200, self.statistics()
+
+        if parts == ['jobs'] and method == 'POST':
+            try:
+                request = json.loads(body or b'null')
+            except ValueError:
+                return 400, {'error': 'The body is not valid JSON'}
+
+            error = _check_request(request)
+            if error is not None:
+                return 400, {'error': error}
+
+            return 202, self.submit(request).summary()
+
+        if parts == ['jobs']:
+            if method != 'GET':
+                return 405, {'error': 'Use GET or POST /jobs'}
+            return 200, [job.summary(result=False)
+                         for job in self.jobs.values()]
+
+        if len(parts) == 2 and parts[0] == 'jobs':
+            if method != 'GET':
+                return 405, {'error': 'Use GET /jobs/<id>'}
+            job = self.jobs.get(parts[1])
+            if job is None:
+                return 404, {'error': f'No job {parts[1]}'}
+            return 200, job.summary()
+
+        return 404, {'error': f'No endpoint {path}'}
+
+    async def handle(self, reader, writer):
+        """Answer one HTTP request of a connection, then close it"""
+
+        try:
+            method, path, _ = (await reader.readline()).decode().split(' ', 2)
+
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode().strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            body = await reader.readexactly(
+                int(headers.get('content-length', 0)))
+            status, answer = self.route(method.upper(), path, body)
+
+        except (ValueError, asyncio.IncompleteReadError):
+            status, answer = 400, {'error': 'Malformed HTTP request'}
+
+        content = json.dumps(answer).encode()
+        writer.write(f'HTTP/1.1 {status} {_REASONS[status]}\r\n'
+                     f'Content-Type: application/json\r\n'
+                     f'Content-Length: {len(content)}\r\n'
+                     f'Connection: close\r\n\r\n'.encode() + content)
+
+        await writer.drain()
+        writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765, path=None):
+        """
+        Start the workers and listen on host:port, or on the Unix socket
+        path when it is given. Returns the asyncio.Server, e.g.
+
+            server = await job_server.serve(port=0)  # any free port
+            port = server.sockets[0].getsockname()[1]
+        """
+
+        await self.start()
+
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path)
+
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def _serve_forever(job_server, host, port, path):
+    server = await job_server.serve(host, port, path)
+
+    print(f'Serving on {path or "http://%s:%d" % (host, port)}')
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await job_server.stop()
+
+
+def main(arguments=None):
+    """Command line entry point, runs the server until interrupted"""
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix-socket', dest='path',
+                        help='Listen on a Unix socket rather than TCP')
+    parser.add_argument('--concurrency', type=int, default=2,
+                        help='Jobs solved at the same time (default 2)')
+    parser.add_argument('--cache-size', type=int, default=8,
+                        help='Preprocessed models kept in memory '
+                             '(default 8)')
+    parser.add_argument('--cache-location',
+                        help='Directory of the parsed input cache, a '
+                             'trusted one as it holds pickles (default no '
+                             'cache)')
+    parser.add_argument('--sidecar-location',
+                        help='Directory of the memory-mapped sidecar files')
+    arguments = parser.parse_args(arguments)
+
+    settings = {'sidecar_location': arguments.sidecar_location}
+    if arguments.cache_location is not None:
+        settings['cache_location'] = arguments.cache_location
+
+    try:
+        asyncio.run(_serve_forever(
+            JobServer(arguments.concurrency, arguments.cache_size, settings),
+            arguments.host, arguments.port, arguments.path))
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
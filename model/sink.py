@@ -0,0 +1,168 @@
+from model import *
+from model.data import Results
+import os
+
+
+def result_location(results=Results):
+    """
+    Directory of the per-year result files: Results.location when it is
+    set, else next to the current output file, "<save_location without
+    extension> Results"
+    """
+
+    if results.location is not None:
+        return results.location
+
+    return os.path.splitext(results.save_location)[0] + ' Results'
+
+
+def _table_entries(key, df):
+    """Arrays of a table in a .npz file, without pickles: the numeric
+    columns as they are, the others as codes into their labels (-1 for
+    missing values), see _read_table"""
+
+    entries = {f'{key} columns': np.asarray([str(name) for name in df])}
+
+    for position, (_, column) in enumerate(df.items()):
+        name = f'{key} {position}'
+        if column.dtype.kind in 'biuf':
+            entries[name] = column.to_numpy()
+        else:
+            entries[name], labels = pd.factorize(column)
+            entries[name + ' labels'] = np.asarray(labels.tolist())
+
+    return entries
+
+
+def _read_table(file, key):
+    """Table of _table_entries from an open .npz file"""
+
+    columns = {}
+    for position, name in enumerate(file[f'{key} columns'].tolist()):
+        values = file[f'{key} {position}']
+
+        if f'{key} {position} labels' in file.files:
+            labels = np.asarray(
+                file[f'{key} {position} labels'].tolist() + [None],
+                dtype=object)
+            values = labels[values]  # -1 is the None at the end
+
+        columns[name] = values
+
+    return pd.DataFrame(columns)
+
+
+def write_year(year, volume, cost, tables=None, results=Results):
+    """
+    Write the volume and the cost of a year to the result directory as
+    soon as the year is solved. Only the non-zero entries are kept, as
+    (index, value) pairs, in one file per year ("<year>.npz"). The file is
+    written to a temporary file first then renamed, so a crash leaves the
+    years before it complete on disk.
+
+    Parameters
+    ----------
+    year: int
+        Year of the optimization instance
+    volume, cost: numpy.ndarray
+        Volume and cost of every variable of the linear program
+    tables: dict
+        {name: pandas.DataFrame} of the year, e.g. the sensitivity tables
+        (see postprocessing.sensitivity_tables), stored in the same file
+        and read back by read_table
+
+    Output to data.py
+    -----------------
+    Results.years: list
+        The year is appended, in the order the years are written
+    """
+
+    location = result_location(results)
+    os.makedirs(location, exist_ok=True)
+
+    entries = {}
+    for name, column in [('volume', volume), ('cost', cost)]:
+        index = np.flatnonzero(column)
+        entries[name + ' index'], entries[name] = index, column[index]
+
+    for key, df in (tables or {}).items():
+        entries.update(_table_entries(key, df))
+
+    path = os.path.join(location, f'{year}.npz')
+    with open(path + '.tmp', 'wb') as file:
+        np.savez(file, **entries)
+    os.replace(path + '.tmp', path)
+
+    results.years.append(year)
+
+
+def read_table(year, key, results=Results):
+    """Table of a year stored by write_year, None when the year has
+    none"""
+
+    path = os.path.join(result_location(results), f'{year}.npz')
+
+    with np.load(path) as file:
+        if f'{key} columns' not in file.files:
+            return None
+        return _read_table(file, key)
+
+
+def read_years(name, start, stop, results=Results):
+    """
+    Read a quantity ('volume' or 'cost') of the variables start:stop for
+    every year in Results.years, keeping only the variables that are not
+    zero in some year.
+
+    Returns
+    -------
+    numpy.ndarray
+        Variables that are not zero in some year
+    numpy.ndarray
+        (#variables, #years) block of their values, one column per year
+    """
+
+    location = result_location(results)
+    entries = []
+
+    for year in results.years:
+        with np.load(os.path.join(location, f'{year}.npz')) as file:
+            index, value = file[name + ' index'], file[name]
+        select = (index >= start) & (index < stop)
+        entries.append((index[select], value[select]))
+
+    rows = np.unique(np.hstack([index for index, _ in entries]))
+    block = np.zeros((rows.size, len(entries)))
+
+    for column, (index, value) in enumerate(entries):
+        block[np.searchsorted(rows, index), column] = value
+
+    return rows, block
+
+
+def label_years(name, prefix, offset=0, results=Results):
+    """
+    Join a quantity of every year to the labels of its variables, for the
+    variables that are not zero in some year.
+
+    Parameters
+    ----------
+    name: str
+        'volume' or 'cost'
+    prefix: pandas.DataFrame
+        Labels of the variables, in order from the variable offset
+    offset: int
+        Variable of the first row of prefix
+
+    Returns
+    -------
+    pandas.DataFrame
+        Labels followed by one column per year
+    """
+
+    rows, block = read_years(name, offset, offset + len(prefix), results)
+
+    df = prefix.iloc[rows - offset].copy()
+    df[results.years] = block
+
+    return df
@@ -0,0 +1,217 @@
+from model import *
+from model.instrument import span
+from model.validation import check
+import time
+
+# highspy is optional, scipy's linprog is the fallback
+highspy = optional_module('highspy')
+
+# HiGHS options understood by the scipy backend, as linprog options
+_SCIPY_OPTIONS = {
+    'time_limit': 'time_limit',
+    'simplex_iteration_limit': 'maxiter',
+    'primal_feasibility_tolerance': 'primal_feasibility_tolerance',
+    'dual_feasibility_tolerance': 'dual_feasibility_tolerance',
+    'ipm_optimality_tolerance': 'ipm_optimality_tolerance'}
+
+# linprog method of the HiGHS 'solver' option
+_SCIPY_METHODS = {'choose': 'highs', 'simplex': 'highs-ds',
+                  'ipm': 'highs-ipm'}
+
+# Status of linprog, see scipy.optimize.linprog
+_SCIPY_STATUS = {0: 'Optimal', 1: 'Iteration or time limit reached',
+                 2: 'Infeasible', 3: 'Unbounded'}
+
+
+class SolveResult:
+
+    """
+    Result of a solve, whatever the backend:
+
+    - 'backend': 'highspy' or 'scipy'
+    - 'status': status of the model, 'Optimal' when solved (e.g.
+      'Infeasible' or 'Time limit reached' otherwise)
+    - 'solution': value of every column (None unless optimal)
+    - 'row_dual': dual of every row (None unless optimal)
+    - 'objective': objective value (None unless optimal)
+    - 'iterations': simplex and interior point iterations
+    - 'time': wall time of the solve, in seconds
+    """
+
+    __slots__ = ('backend', 'status', 'solution', 'row_dual', 'objective',
+                 'iterations', 'time')
+
+    def __init__(self, **attributes):
+        self.solution, self.row_dual, self.objective = None, None, None
+
+        for attr, value in attributes.items():
+            setattr(self, attr, value)
+
+    @property
+    def optimal(self):
+        return self.status == 'Optimal'
+
+    def __repr__(self):
+        return (f'SolveResult(backend={self.backend!r}, '
+                f'status={self.status!r}, objective={self.objective}, '
+                f'iterations={self.iterations}, time={self.time:.4f})')
+
+
+def default_backend():
+    """'highspy' when it is installed, else 'scipy'"""
+
+    return 'scipy' if highspy is None else 'highspy'
+
+
+def highs_model(cost, matrix, bound, options=None, upper=None):
+    """
+    HiGHS instance (highspy.Highs) holding min cost.x s.t. matrix.x <=
+    bound, 0 <= x <= upper, with the options set.
+
+    Parameters
+    ----------
+    cost: numpy.ndarray
+        Cost of every column
+    matrix: scipy.sparse matrix
+        Constraints matrix, passed to HiGHS column-wise without copying
+        it through a dense or scipy wrapper
+    bound: numpy.ndarray
+        Upper bound of every row
+    options: dict
+        HiGHS options, e.g. {'solver': 'ipm', 'threads': 4,
+        'time_limit': 60, 'primal_feasibility_tolerance': 1e-8,
+        'presolve': 'off', 'run_crossover': 'on'}, see the HiGHS
+        documentation of its options
+    upper: numpy.ndarray
+        Upper bound of every column, np.inf for none (None for no upper
+        bound at all)
+    """
+
+    check(highspy is not None, 'The highspy backend needs highspy installed')
+
+    matrix = matrix.tocsc()
+
+    lp = highspy.HighsLp()
+    lp.num_row_, lp.num_col_ = matrix.shape
+    lp.col_cost_ = cost
+    lp.col_lower_ = np.zeros(matrix.shape[1])
+    lp.col_upper_ = np.full(matrix.shape[1], highspy.kHighsInf) \
+        if upper is None else np.minimum(upper, highspy.kHighsInf)
+    lp.row_lower_ = np.full(matrix.shape[0], -highspy.kHighsInf)
+    lp.row_upper_ = np.ravel(bound)
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    lp.a_matrix_.start_ = matrix.indptr
+    lp.a_matrix_.index_ = matrix.indices
+    lp.a_matrix_.value_ = matrix.data
+
+    highs = highspy.Highs()
+    highs.setOptionValue('output_flag', False)
+
+    for name, value in (options or {}).items():
+        check(highs.setOptionValue(name, value) == highspy.HighsStatus.kOk,
+              f'Invalid HiGHS option {name} = {value!r}')
+
+    highs.passModel(lp)
+
+    return highs
+
+
+def run_highs(highs, **info):
+    """Run a HiGHS instance (see highs_model) in a 'highs' span with the
+    info, returns its SolveResult"""
+
+    with span('highs', **info) as step:
+        start = time.perf_counter()
+        highs.run()
+        elapsed = time.perf_counter() - start
+
+        status = highs.modelStatusToString(highs.getModelStatus())
+        details = highs.getInfo()
+        result = SolveResult(backend='highspy', status=status,
+                             iterations=details.simplex_iteration_count +
+                             max(details.ipm_iteration_count, 0),
+                             time=elapsed)
+        step.set(status=status, iterations=result.iterations)
+
+    # Round-off of the solver can leave values just below zero
+    if result.optimal:
+        solution = highs.getSolution()
+        result.solution = np.maximum(solution.col_value, 0)
+        result.row_dual = np.array(solution.row_dual)
+        result.objective = details.objective_function_value
+
+    return result
+
+
+def highspy_solve(cost, matrix, bound, options=None, upper=None):
+    """Solve min cost.x s.t. matrix.x <= bound, 0 <= x <= upper with
+    HiGHS directly, see highs_model"""
+
+    return run_highs(highs_model(cost, matrix, bound, options, upper))
+
+
+def scipy_solve(cost, matrix, bound, options=None, upper=None):
+    """
+    Solve min cost.x s.t. matrix.x <= bound, 0 <= x <= upper with
+    scipy.optimize.linprog, the fallback without highspy. Only the HiGHS
+    options of _SCIPY_OPTIONS, 'solver' and 'presolve' have a linprog
+    equivalent, the others (e.g. 'threads') are ignored.
+    """
+
+    options = dict(options or {})
+    method = _SCIPY_METHODS[options.pop('solver', 'choose')]
+    presolve = options.pop('presolve', 'choose') != 'off'
+
+    with span('linprog') as step:
+        start = time.perf_counter()
+        lp = linprog(c=cost, A_ub=matrix, b_ub=bound, method=method,
+                     bounds=(0, None) if upper is None else
+                     np.column_stack([np.zeros(cost.size), upper]),
+                     options={'presolve': presolve,
+                              **{_SCIPY_OPTIONS[name]: value
+                                 for name, value in options.items()
+                                 if name in _SCIPY_OPTIONS}})
+        result = SolveResult(backend='scipy',
+                             status=_SCIPY_STATUS.get(lp.status, lp.message),
+                             iterations=lp.nit,
+                             time=time.perf_counter() - start)
+        step.set(status=result.status, iterations=result.iterations)
+
+    if result.optimal:
+        result.solution = np.maximum(lp.x, 0)
+        result.row_dual = lp.ineqlin.marginals
+        result.objective = lp.fun
+
+    return result
+
+
+# Solver backends, by name of Data.solver
+backends = {'highspy': highspy_solve, 'scipy': scipy_solve}
+
+
+def solve(cost, matrix, bound, backend=None, options=None, upper=None):
+    """
+    Solve min cost.x s.t. matrix.x <= bound, 0 <= x <= upper.
+
+    Parameters
+    ----------
+    cost, matrix, bound:
+        Linear program, see highs_model
+    backend: str
+        'highspy' (HiGHS directly) or 'scipy' (scipy.optimize.linprog),
+        None for default_backend()
+    options: dict
+        HiGHS options of the solve, see highs_model and scipy_solve
+    upper: numpy.ndarray
+        Upper bound of every column, see highs_model
+
+    Returns
+    -------
+    SolveResult
+        Status, solution, duals, iterations and time of the solve
+    """
+
+    backend = backend or default_backend()
+    check(backend in backends, f'Unknown solver backend {backend!r}')
+
+    return backends[backend](cost, matrix, bound, options, upper)
@@ -0,0 +1,77 @@
+from model.data import Data
+
+# Validation levels, from no check to every check
+LEVELS = ('off', 'cheap', 'full')
+
+
+def validating(level, data=Data):
+    """
+    Whether the checks of a level run under Data.validation:
+
+    - 'off': no check at all
+    - 'cheap' (default): types, lengths and dimensions of the inputs and
+      of what is built, the values of the input vectors (costs, volumes,
+      efficiencies) and the structure of the constraints matrix, each in
+      at most O(nnz) on metadata or on arrays that are built anyway
+    - 'full': also the checks of what is right by construction (signs of
+      the matrices built, finiteness of the constraints matrix, the
+      solution being non-negative), for debugging
+
+    Parameters
+    ----------
+    level: str
+        'cheap' or 'full', level of the checks
+
+    Returns
+    -------
+    bool
+        True when the checks of the level run
+    """
+
+    check(data.validation in LEVELS,
+          f'Validation must be one of {LEVELS}, not {data.validation!r}')
+
+    return LEVELS.index(data.validation) >= LEVELS.index(level)
+
+
+def check(condition, message):
+    """Raise AssertionError(message) unless the condition holds. Unlike an
+    assert statement, it is not removed by python -O."""
+
+    if not condition:
+        raise AssertionError(message)
+
+
+def check_constraints(constraints, kind, data=Data):
+    """Checks of the capacity or supply constraints (kind), in the size of
+    the constraints, shared by the engines that build their rows"""
+
+    # Verify inputs types
+    check(isinstance(constraints, list), f'{kind} constraints must be in a '
+                                         f'list')
+
+    # Verify for the case cons = []
+    check(len(constraints) > 0,
+          f'At least one {kind.lower()} constraints must be defined')
+
+    # Verify for the case cons = [[1, 2], []] (The [] is not allowed)
+    check(all(len(cons) > 0 for cons in constraints),
+          f'{kind} constraints cannot be empty')
+
+    # Verify for the case cons = [[1, 2], [1, 2]] (the [1, 2] cannot
+    # repeat) and also that order doesn't matter ([1, 2] is equivalent
+    # to [2, 1])
+    check(len({tuple(sorted(cons)) for cons in constraints}) ==
+          len(constraints),
+          f'{kind} constraints (in any order) cannot repeat')
+
+    # Verify for the case cons = [[1, 2], [0, 0]] (the [0, 0] is not
+    # allowed)
+    check(all(len(set(cons)) == len(cons) for cons in constraints),
+          'A single product combination cannot appear more than once in one '
+          'constraints')
+
+    # Verify that the combinations are in the original product_list
+    check(set().union(*constraints).issubset(data.product_list),
+          f'{kind} combinations list not valid. '
+          f'Some products are not in the defined product list')
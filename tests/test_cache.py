@@ -0,0 +1,107 @@
+import sys  # Get the path to the "model" directory
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model import instrument, preprocessing
+from model.data import Model
+from model.cache import read_cache, write_cache
+from model.preprocessing import load_inputs
+from model.randinp import RandomWorkbook
+
+
+def parse(filepath, location):
+    """(key of the input file, whether the workbook was parsed) of a
+    load_inputs with the cache in location"""
+
+    data = Model(filepath=filepath, cache_location=location)
+
+    with instrument.recording() as records:
+        load_inputs(data=data)
+
+    return data.input_key, any(record['name'] == 'excel parse'
+                               for record in records)
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.location = os.path.join(self.directory.name, 'cache')
+        self.filepath = os.path.join(self.directory.name, 'Inputs.xlsx')
+
+        RandomWorkbook(no_customers=10, seed=0).write_workbook(self.filepath)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hit(self):
+        """The second load of a workbook comes from the cache, with the
+        same sheets"""
+
+        key, parsed = parse(self.filepath, self.location)
+        self.assertTrue(parsed)
+        self.assertEqual(os.listdir(self.location), [key + '.pkl'])
+
+        data = Model(filepath=self.filepath, cache_location=None)
+        load_inputs(data=data)
+        cached = read_cache(self.location, key)
+
+        self.assertEqual(parse(self.filepath, self.location), (key, False))
+        self.assertEqual(sorted(cached), sorted(data.inputs))
+        for sheet, df in data.inputs.items():
+            self.assertTrue(df.equals(cached[sheet]))
+
+    def test_workbook_change(self):
+        """Editing the workbook changes its key, so it is parsed again"""
+
+        key, _ = parse(self.filepath, self.location)
+
+        RandomWorkbook(no_customers=10, seed=1).write_workbook(self.filepath)
+        new_key, parsed = parse(self.filepath, self.location)
+
+        self.assertNotEqual(new_key, key)
+        self.assertTrue(parsed)
+
+    def test_parser_version(self):
+        """A new parser version does not read the entries of the old one"""
+
+        key, _ = parse(self.filepath, self.location)
+
+        with mock.patch.object(preprocessing, 'PARSER_VERSION',
+                               preprocessing.PARSER_VERSION + 1):
+            new_key, parsed = parse(self.filepath, self.location)
+
+        self.assertNotEqual(new_key, key)
+        self.assertTrue(parsed)
+
+    def test_eviction(self):
+        """Past the size limit, the least recently used entries go first,
+        and the entry just written is kept"""
+
+        entry = np.zeros(1000)
+        for age, key in enumerate(['a', 'b', 'c']):
+            write_cache(self.location, key, entry, np.inf)
+            path = os.path.join(self.location, key + '.pkl')
+            os.utime(path, (1000 + age, 1000 + age))
+
+        size = os.path.getsize(path)
+
+        # Reading 'a' makes 'b' the least recently used entry
+        self.assertIsNotNone(read_cache(self.location, 'a'))
+        write_cache(self.location, 'd', entry, 3 * size)
+
+        self.assertEqual(sorted(os.listdir(self.location)),
+                         ['a.pkl', 'c.pkl', 'd.pkl'])
+
+        # An entry larger than the limit is kept on its own
+        write_cache(self.location, 'e', entry, size // 2)
+        self.assertEqual(os.listdir(self.location), ['e.pkl'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import sys  # Get the path to the "model" directory
+import contextlib
+import io
+import os
+import subprocess
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Model, ModelResults
+from model.program import execute
+from model.randinp import RandomWorkbook
+from model.__main__ import main
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestCommandLine(unittest.TestCase):
+    def test_import(self):
+        """Importing the program prints nothing and imports neither pandas,
+        scipy nor openpyxl"""
+
+        code = ('import sys, model.program; print([name for name in '
+                '["pandas", "scipy.sparse", "scipy.optimize", "openpyxl", '
+                '"highspy"] if name in sys.modules])')
+        run = subprocess.run([sys.executable, '-c', code], cwd=ROOT,
+                             capture_output=True, text=True)
+
+        self.assertEqual(run.stdout, '[]\n')
+
+    def test_main(self):
+        """The command line gives the same output file as execute, for
+        every year or some of them"""
+
+        workbook = RandomWorkbook(no_customers=np.random.randint(5, 50),
+                                  no_years=3, no_capacity_constraints=2,
+                                  no_supply_constraints=2, seed=0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'Inputs.xlsx')
+            workbook.write_workbook(filepath)
+
+            data = Model(filepath=filepath, cache_location=None)
+            results = ModelResults()
+            results.save_location = os.path.join(directory, 'Outputs.xlsx')
+            execute(data=data, results=results)
+
+            output = os.path.join(directory, 'Command.xlsx')
+            with contextlib.redirect_stdout(io.StringIO()) as printed:
+                self.assertEqual(main([filepath, '-o', output,
+                                       '--no-cache']), 0)
+            self.assertIn('2022, 2023, 2024', printed.getvalue())
+
+            expected = pd.read_excel(results.save_location, sheet_name=None)
+            for sheet, df in pd.read_excel(output,
+                                           sheet_name=None).items():
+                pd.testing.assert_frame_equal(df, expected[sheet])
+
+            # Some years, once each, in CSV, with column generation
+            output = os.path.join(directory, 'Command.csv')
+            with contextlib.redirect_stdout(io.StringIO()) as printed:
+                main([filepath, '-o', output, '--years', '2024', '2023',
+                      '2024', '--engine', 'colgen', '--workers', '2',
+                      '--no-cache'])
+            self.assertIn('Solved 2023, 2024 in', printed.getvalue())
+
+            volume = pd.read_csv(os.path.join(
+                directory, 'Command - Outbound Volume Per Customer.csv'))
+            self.assertEqual(list(volume.columns[-2:]), ['2023', '2024'])
+            self.assertTrue(np.allclose(
+                volume[['2023', '2024']].sum(),
+                expected['Outbound Volume Per Customer'][[2023, 2024]]
+                .sum()))
+
+
+if __name__ == '__main__':
+    unittest.main()
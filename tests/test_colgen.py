@@ -0,0 +1,126 @@
+import sys  # Get the path to the "model" directory
+import unittest
+
+import numpy as np
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Model
+from model.preprocessing import preprocess
+from model.optimization import optimize
+from model.randinp import RandomInputs, RandomWorkbook
+
+
+def total_cost(data):
+    """Cost of the solution, routes without cost carry no volume"""
+
+    used = data.linear_program > 0
+    return data.objective_vector[used] @ data.linear_program[used]
+
+
+class TestColumnGeneration(unittest.TestCase):
+    def test_random_inputs(self):
+        """Column generation reaches the optimum of the full linear
+        program, on both backends, whatever the routes it starts from, and
+        reports the same instances as infeasible"""
+
+        for seed in range(50):
+            # Some random instances have inbound columns in no supply
+            # constraint, which the validation rejects (see test_rejected)
+            # but HiGHS solves all the same
+            data = Model(validation='off')
+            RandomInputs(capacity_volume_range=(20, 100),
+                         seed=seed).generate(data=data)
+            try:
+                optimize(data=data)
+                cost = total_cost(data)
+            except AssertionError as error:
+                self.assertEqual(str(error), 'Infeasible')
+                cost = None
+
+            for solver in [None, 'scipy']:
+                data = Model(solver=solver, validation='off',
+                             colgen_routes=np.random.randint(1, 4))
+                RandomInputs(capacity_volume_range=(20, 100),
+                             seed=seed).generate(data=data)
+
+                if cost is None:
+                    with self.assertRaisesRegex(AssertionError,
+                                                'Infeasible'):
+                        optimize(engine='colgen', data=data)
+                    continue
+
+                optimize(engine='colgen', data=data)
+
+                self.assertTrue(np.isclose(total_cost(data), cost))
+                self.assertTrue(np.all(data.linear_program >= 0))
+                self.assertLessEqual(data.colgen_summary['routes'],
+                                     data.colgen_summary['available'])
+
+    def test_workbook(self):
+        """Decomposed or not, column generation gives the optimal cost and
+        serves the whole demand of every customer"""
+
+        for seed in range(3):
+            workbook = RandomWorkbook(no_customers=np.random.randint(5, 200),
+                                      no_capacity_constraints=2,
+                                      no_supply_constraints=2, seed=seed)
+
+            costs = []
+            for engine, decompose in [('highs', False), ('colgen', False),
+                                      ('colgen', True)]:
+                data = Model(inputs=workbook.inputs(), year=2022,
+                             colgen_routes=1)
+                preprocess(data=data)
+                optimize(engine=engine, decompose=decompose, workers=2,
+                         data=data)
+                costs.append(total_cost(data))
+
+                served = np.bincount(
+                    data.column_index['customer'][data.dimF:],
+                    weights=data.linear_program[data.dimF:],
+                    minlength=data.dimC)
+                self.assertTrue(np.allclose(served,
+                                            data.demand_volume.flatten()))
+
+            self.assertTrue(np.allclose(costs, costs[0]))
+
+    def test_rejected(self):
+        """Column generation rejects the instances that the validation of
+        the constraints matrix rejects"""
+
+        uncovered = 0
+        for seed in range(50):
+            messages = []
+            for engine in ['highs', 'colgen']:
+                data = Model()
+                RandomInputs(capacity_volume_range=(20, 100),
+                             seed=seed).generate(data=data)
+                try:
+                    optimize(engine=engine, data=data)
+                    messages.append(None)
+                except AssertionError as error:
+                    messages.append(str(error))
+
+            if messages[0] != 'Infeasible':
+                self.assertEqual(messages[0], messages[1])
+
+            # Some product in no supply constraint
+            uncovered += messages[0] == \
+                'Constraints matrix contains columns or rows with all zeros'
+
+        self.assertGreater(uncovered, 0)
+
+    def test_infeasible(self):
+        """Demand the capacity cannot serve is reported as infeasible"""
+
+        data = Model()
+        RandomInputs(seed=3).generate(data=data)
+        data.capacity_volume = data.capacity_volume * 1e-3
+
+        with self.assertRaisesRegex(AssertionError, 'Infeasible'):
+            optimize(engine='colgen', data=data)
+
+
+if __name__ == '__main__':
+    unittest.main()
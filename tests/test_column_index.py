@@ -0,0 +1,48 @@
+import sys  # Get the path to the "model" directory
+import unittest
+
+import numpy as np
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Data
+from model.randinp import RandomInputs
+from model.optimization import generate_objective_vector
+
+
+class TestColumnIndex(unittest.TestCase):
+    def test_column_index(self):
+        """Every column of the objective vector has the cost of the
+        product, factory and customer it is mapped to"""
+
+        for _ in range(20):
+            RandomInputs().generate()
+            generate_objective_vector()
+
+            index = Data.column_index
+            self.assertEqual(index.size, Data.objective_vector.size)
+
+            factory_list = list(Data.factory_list)
+            customer_start = np.cumsum(
+                [0] + [Data.customer_sizes[prod]
+                       for prod in Data.product_list])
+
+            for column, (product, factory, customer) in enumerate(index):
+                prod = Data.product_list[product]
+                position = list(Data.factory_names[prod]).index(
+                    factory_list[factory])
+
+                if customer < 0:
+                    cost = Data.inbound_cost_per_product[prod][position]
+                else:
+                    customer -= customer_start[product]
+                    self.assertTrue(
+                        0 <= customer < Data.customer_sizes[prod])
+                    cost = Data.outbound_cost_per_product[prod][
+                        position * Data.customer_sizes[prod] + customer]
+
+                self.assertEqual(cost, Data.objective_vector[column])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import sys  # Get the path to the "model" directory
 import unittest
 
 import numpy as np
+from scipy import sparse
 from scipy.linalg import block_diag
 
 sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
@@ -157,7 +158,7 @@ class CombinationTest:
 
             mat = 0
             for prod in cons:
-                mat += Data.outbound_combination_matrices[prod]
+                mat += Data.outbound_combination_matrices[prod].toarray()
 
             cap_list.append(mat)
 
@@ -186,7 +187,7 @@ class CombinationTest:
 
             mat = 0
             for prod in cons:
-                mat += Data.inbound_combination_matrices[prod]
+                mat += Data.inbound_combination_matrices[prod].toarray()
 
             sup_list_in.append(mat)
 
@@ -202,7 +203,7 @@ class CombinationTest:
 
             mat = 0
             for prod in cons:
-                mat += Data.outbound_combination_matrices[prod]
+                mat += Data.outbound_combination_matrices[prod].toarray()
 
             sup_list_out.append(mat)
 
@@ -232,24 +233,24 @@ class TestCombinationMatrices(unittest.TestCase):
             CombinationTest.alternative_supply_matrix()
 
             # Check inbound equality
-            self.assertTrue(np.array_equal(np.vstack(list(
-                Data.inbound_combination_matrices.values())),
+            self.assertTrue(np.array_equal(sparse.vstack(list(
+                Data.inbound_combination_matrices.values())).toarray(),
                 CombinationTest.inbound_combination_matrix)
             )
 
             # Check outbound equality
-            self.assertTrue(np.array_equal(np.vstack(list(
-                Data.outbound_combination_matrices.values())),
+            self.assertTrue(np.array_equal(sparse.vstack(list(
+                Data.outbound_combination_matrices.values())).toarray(),
                 CombinationTest.outbound_combination_matrix)
             )
 
             # Check capacity equality
             self.assertTrue(np.array_equal(CombinationTest.capacity_matrix,
-                                           Data.capacity_matrix))
+                                           Data.capacity_matrix.toarray()))
 
             # Check capacity equality
             self.assertTrue(np.array_equal(CombinationTest.supply_matrix,
-                                           Data.supply_matrix))
+                                           Data.supply_matrix.toarray()))
 
             if __name__ == '__main__':
                 unittest.main()
@@ -0,0 +1,50 @@
+import sys  # Get the path to the "model" directory
+import unittest
+
+import numpy as np
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Data
+from model.randinp import RandomInputs
+from model.optimization import optimize, product_components
+
+
+class TestDecomposition(unittest.TestCase):
+    def test_product_components(self):
+        """Products sharing a constraint are in the same group"""
+
+        RandomInputs(no_products=5, no_factories=3, no_customers=5,
+                     factory_sizes_range=(3, 3),
+                     customer_sizes_range=(1, 5)).generate()
+
+        Data.capacity_constraints = [[0, 1], [3]]
+        Data.supply_constraints = [[0], [1], [2, 3], [4]]
+
+        self.assertEqual(product_components(), [[0, 1, 4], [2, 3]])
+
+    def test_decomposition(self):
+        """Compare the decomposed solve with the monolithic solve"""
+
+        for _ in range(40):
+            RandomInputs(no_products=6,
+                         no_capacity_constraints=4,
+                         capacity_constraints_range=(1, 2),
+                         no_supply_constraints=6,
+                         supply_constraints_range=(1, 2)).generate()
+
+            try:
+                optimize()
+            except AssertionError:  # Invalid random instance
+                continue
+
+            monolithic = Data.objective_vector @ Data.linear_program
+
+            optimize(decompose=True, workers=2)
+
+            self.assertTrue(np.isclose(
+                Data.objective_vector @ Data.linear_program, monolithic))
+
+
+if __name__ == '__main__':
+    unittest.main()
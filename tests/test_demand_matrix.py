@@ -117,7 +117,7 @@ class TestDemandMatrix(unittest.TestCase):
 
             self.assertTrue(
                 np.array_equal(DemandTest.alternative_demand_matrix(),
-                               Data.demand_matrix)
+                               Data.demand_matrix.toarray())
             )  # Compare the demand matrix, with an alternative method
 
 
@@ -0,0 +1,80 @@
+import sys  # Get the path to the "model" directory
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Model, ModelResults
+from model.export import export
+from model.preprocessing import index_columns
+from model.sink import write_year
+
+
+class TestExport(unittest.TestCase):
+    def test_formats(self):
+        """The streamed Excel file and the CSV files hold the same tables,
+        labelled in the order of the variables"""
+
+        for _ in range(5):
+            data = Model(product_list=['Bag', 'Bulk'])
+            data.factory_names = {
+                prod: [f'F{fac}' for fac in range(np.random.randint(1, 4))]
+                for prod in data.product_list}
+            data.customer_names = {
+                prod: [f'{prod} C{cus}'
+                       for cus in range(np.random.randint(1, 6))]
+                for prod in data.product_list}
+            data.customer_provinces = {
+                prod: np.random.randint(1, 4, len(names)).tolist()
+                for prod, names in data.customer_names.items()}
+
+            data.factory_list = ['F0', 'F1', 'F2']
+            data.factory_sizes = {prod: len(data.factory_names[prod])
+                                  for prod in data.product_list}
+            data.customer_sizes = {prod: len(data.customer_names[prod])
+                                   for prod in data.product_list}
+            index_columns(data=data)
+
+            dimF = sum(data.factory_sizes.values())
+            dimFC = len(data.column_index) - dimF
+
+            results = ModelResults()
+            results.location = tempfile.mkdtemp()
+            results.save_location = os.path.join(results.location, 'out.xlsx')
+            results.split = dimF
+
+            volume = np.random.rand(dimF + dimFC, 2) * (
+                np.random.rand(dimF + dimFC, 1) < 0.5)
+            for year, column in zip([2022, 2023], volume.T):
+                write_year(year, column, 3 * column, results=results)
+                results.sensitivity.append(False)
+
+            export(data=data, results=results)
+            export(output_format='csv', data=data, results=results)
+
+            sheets = pd.read_excel(results.save_location, sheet_name=None)
+
+            for name, df in sheets.items():
+                csv = pd.read_csv(os.path.join(results.location,
+                                               f'out - {name}.csv'))
+                # Excel keeps 15 significant digits
+                pd.testing.assert_frame_equal(df.rename(columns=str), csv)
+
+            # Last route of the last product, if it carries volume
+            df = sheets['Outbound Volume Per Customer']
+            if volume[-1].any():
+                prod = data.product_list[-1]
+                self.assertEqual(list(df.iloc[-1, :4]), [
+                    data.customer_names[prod][-1], prod,
+                    data.customer_provinces[prod][-1],
+                    data.factory_names[prod][-1]])
+                self.assertTrue(np.allclose(df.iloc[-1, 4:].astype(float),
+                                            volume[-1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import sys  # Get the path to the "model" directory
+import threading
+import unittest
+
+import numpy as np
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model import instrument
+from model.data import Data
+from model.randinp import RandomInputs
+from model.optimization import optimize
+from model.solvers import default_backend
+
+
+class TestInstrument(unittest.TestCase):
+    def test_spans(self):
+        """Nested spans report their parent, and the peak memory of a span
+        covers the spans nested in it"""
+
+        self.assertIs(instrument.span('off'), instrument._null_span)
+
+        with instrument.recording(memory=True) as records:
+            with instrument.span('outer', year=2022) as outer:
+                with instrument.span('inner') as inner:
+                    block = np.ones(10 ** 6)
+                    inner.matrix(block)
+                del block
+                outer.set(done=True)
+
+        self.assertEqual(instrument.hooks, [])
+        inner, outer = records
+
+        self.assertEqual((inner['name'], inner['parent']), ('inner', 'outer'))
+        self.assertEqual((inner['shape'], inner['nonzeros']),
+                         ((10 ** 6,), 10 ** 6))
+        self.assertEqual((outer['year'], outer['done']), (2022, True))
+        self.assertGreaterEqual(inner['peak memory'], 8 * 10 ** 6)
+        self.assertGreaterEqual(outer['peak memory'], inner['peak memory'])
+        self.assertGreaterEqual(outer['time'], inner['time'])
+
+    def test_threads(self):
+        """Spans of threads running side by side nest in the spans of their
+        own thread only"""
+
+        barrier = threading.Barrier(2)
+
+        def step(name):
+            with instrument.span(name):
+                barrier.wait()  # Both outer spans are open
+                with instrument.span(name + ' inner'):
+                    barrier.wait()
+                barrier.wait()  # Both inner spans are closed
+
+        with instrument.recording() as records:
+            threads = [threading.Thread(target=step, args=(name,))
+                       for name in ['a', 'b']]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(
+            sorted((record['name'], record['parent']) for record in records),
+            [('a', None), ('a inner', 'a'), ('b', None), ('b inner', 'b')])
+        self.assertEqual(instrument._open(), [])
+
+    def test_optimize(self):
+        """Every stage of optimize is a span"""
+
+        for _ in range(10):
+            RandomInputs(capacity_volume_range=(20, 100)).generate()
+
+            try:
+                with instrument.recording() as records:
+                    optimize()
+            except AssertionError:  # Invalid random instance
+                continue
+
+            names = [record['name'] for record in records]
+            self.assertEqual(names[:2], ['generate_objective_vector',
+                                         'generate_demand_matrix'])
+            self.assertIn({'highspy': 'highs', 'scipy': 'linprog'}[
+                default_backend()], names)
+            self.assertEqual(
+                [record['shape'] for record in records
+                 if record['name'] == 'generate_constraints_matrix'],
+                [Data.constraints_matrix.shape])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import sys  # Get the path to the "model" directory
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Model
+from model.randinp import RandomInputs
+from model.optimization import optimize
+
+
+class TestModel(unittest.TestCase):
+    def test_concurrent_models(self):
+        """Models solved side by side in threads match their serial solve"""
+
+        models = []
+        while len(models) < 8:
+            data = Model()
+            RandomInputs().generate(data=data)
+
+            try:
+                optimize(data=data)
+            except AssertionError:  # Invalid random instance
+                continue
+
+            models.append(data)
+
+        serial = [data.linear_program for data in models]
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda data: optimize(data=data), models))
+
+        for data, solution in zip(models, serial):
+            self.assertTrue(np.isclose(
+                data.objective_vector @ data.linear_program,
+                data.objective_vector @ solution))
+
+    def test_slots(self):
+        """Only the documented attributes can be set on a model"""
+
+        with self.assertRaises(AttributeError):
+            Model().misspelled_attribute = 1
+
+
+if __name__ == '__main__':
+    unittest.main()
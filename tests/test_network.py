@@ -0,0 +1,188 @@
+import sys  # Get the path to the "model" directory
+import unittest
+
+import numpy as np
+from scipy.optimize import linprog
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Data, Model
+from model.randinp import RandomInputs
+from model.network import network_solve, transportation_problem
+from model.optimization import optimize, generate_objective_vector
+from model.optimization import generate_demand_matrix
+from model.optimization import generate_combination_matrices
+from model.optimization import generate_capacity_matrix
+from model.optimization import generate_supply_matrix
+from model.optimization import generate_constraints_matrix
+from model.optimization import generate_constraints_vector
+
+
+class NetworkTest:
+    """Class for generating random network representable linear programs,
+    where every product is in at most one capacity and supply constraint"""
+
+    @classmethod
+    def generate_random_inputs(cls):
+        """Generate random Data inputs and the linear program"""
+
+        no_products = np.random.randint(1, 5)
+
+        RandomInputs(no_products=no_products,
+                     no_factories=6,
+                     no_customers=30,
+                     factory_sizes_range=(1, 6),
+                     customer_sizes_range=(1, 30),
+                     no_capacity_constraints=no_products,
+                     capacity_constraints_range=(1, 1),
+                     no_supply_constraints=3 * no_products,
+                     supply_constraints_range=(1, 1),
+                     capacity_volume_range=(10, 200)).generate()
+
+        # Factories in the same order as the factory list
+        Data.factory_names = {prod: np.sort(Data.factory_names[prod])
+                              for prod in Data.product_list}
+
+        generate_objective_vector()
+        generate_demand_matrix()
+        generate_combination_matrices()
+        generate_capacity_matrix()
+        generate_supply_matrix()
+        generate_constraints_matrix()
+        generate_constraints_vector()
+
+
+class TestNetwork(unittest.TestCase):
+    def test_network(self):
+        """Compare the min-cost flow with HiGHS on random instances"""
+
+        for _ in range(100):
+            try:
+                NetworkTest.generate_random_inputs()
+            except AssertionError:  # Some product has no supply constraint
+                continue
+
+            self.assertIsNotNone(transportation_problem())
+
+            lp = linprog(c=Data.objective_vector,
+                         A_ub=Data.constraints_matrix,
+                         b_ub=Data.constraints_vector,
+                         method='highs')
+
+            # Infeasible exactly when HiGHS says so
+            self.assertEqual(network_solve(), lp.status == 0)
+
+            if lp.status == 0:
+                self.assertTrue(np.isclose(
+                    Data.objective_vector @ Data.linear_program, lp.fun))
+                self.assertTrue(np.all(
+                    Data.constraints_matrix @ Data.linear_program <=
+                    Data.constraints_vector.flatten() + 1e-6))
+
+    def test_route_cost_limit(self):
+        """The min-cost flow leaves out the routes above the cost limit, as
+        HiGHS does after presolve"""
+
+        for seed in range(20):
+            outcomes = []
+            for engine in ['network', 'highs']:
+                data = Model()
+                RandomInputs(no_products=2,
+                             no_factories=6,
+                             no_customers=30,
+                             factory_sizes_range=(1, 6),
+                             customer_sizes_range=(1, 30),
+                             no_capacity_constraints=2,
+                             capacity_constraints_range=(1, 1),
+                             no_supply_constraints=6,
+                             supply_constraints_range=(1, 1),
+                             capacity_volume_range=(10, 200),
+                             seed=seed).generate(data=data)
+
+                cost = np.hstack([np.ravel(cost) for cost in
+                                  data.outbound_cost_per_product.values()])
+                data.route_cost_limit = np.quantile(cost, 0.8)
+
+                try:
+                    optimize(engine=engine, data=data)
+                except AssertionError as error:  # No usable route left
+                    outcomes.append(str(error))
+                    continue
+
+                outcomes.append(data.objective_vector @ data.linear_program)
+                self.assertTrue(np.all(
+                    data.linear_program[data.dimF:][
+                        data.objective_vector[data.dimF:] >
+                        data.route_cost_limit] == 0))
+
+            if isinstance(outcomes[1], str):
+                self.assertEqual(outcomes[0], outcomes[1])
+            else:
+                self.assertTrue(np.isclose(outcomes[0], outcomes[1]))
+
+    def test_routes_without_cost(self):
+        """Without presolve, the min-cost flow leaves the routes without
+        cost out, as HiGHS does with presolve"""
+
+        solved = 0
+        for seed in range(20):
+            outcomes = []
+            for engine, presolve in [('network', False), ('highs', True)]:
+                data = Model()
+                RandomInputs(no_products=2,
+                             no_factories=6,
+                             no_customers=30,
+                             factory_sizes_range=(1, 6),
+                             customer_sizes_range=(1, 30),
+                             no_capacity_constraints=2,
+                             capacity_constraints_range=(1, 1),
+                             no_supply_constraints=6,
+                             supply_constraints_range=(1, 1),
+                             capacity_volume_range=(10, 200),
+                             seed=seed).generate(data=data)
+
+                rng = np.random.default_rng(seed)
+                for cost in data.outbound_cost_per_product.values():
+                    cost[rng.random(cost.shape) < 0.1] = np.nan
+
+                try:
+                    optimize(engine=engine, presolve=presolve, data=data)
+                except AssertionError as error:  # Infeasible instance
+                    outcomes.append(str(error))
+                    continue
+
+                outcomes.append(np.nansum(data.objective_vector *
+                                          data.linear_program))
+
+            if isinstance(outcomes[1], str):
+                continue
+
+            solved += 1
+            self.assertTrue(np.isclose(outcomes[0], outcomes[1]))
+
+        self.assertGreater(solved, 0)
+
+    def test_not_network(self):
+        """A product in two supply constraints is not a network"""
+
+        RandomInputs(no_products=2, no_factories=3, no_customers=5,
+                     factory_sizes_range=(3, 3),
+                     customer_sizes_range=(1, 5),
+                     capacity_constraints_range=(1, 2),
+                     supply_constraints_range=(1, 2)).generate()
+
+        Data.capacity_constraints = [[0], [1]]
+        Data.supply_constraints = [[0], [0, 1]]
+
+        generate_objective_vector()
+        generate_demand_matrix()
+        generate_combination_matrices()
+        generate_capacity_matrix()
+        generate_supply_matrix()
+        generate_constraints_matrix()
+
+        self.assertIsNone(transportation_problem())
+
+
+if __name__ == '__main__':
+    unittest.main()
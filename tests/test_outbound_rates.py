@@ -0,0 +1,71 @@
+import sys  # Get the path to the "model" directory
+import unittest
+
+import numpy as np
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Model
+from model.preprocessing import preprocess, _index_by_year
+from model.optimization import generate_objective_vector, optimize
+from model.randinp import RandomWorkbook
+
+
+def expand(sheets):
+    """Sheets with the "Outbound Rate" and "Outbound Adjustment" sheets
+    replaced by the "Outbound Cost" sheet they stand for"""
+
+    sheets = dict(sheets)
+    rates = sheets.pop('Outbound Rate')
+    factors = sheets.pop('Outbound Adjustment')
+
+    customers = sheets['Sales Volume'][['Customer ID', 'Province',
+                                        'Sales Product']]
+    cost = customers.merge(rates, on='Province', how='left')
+
+    for column in rates.columns[1:]:
+        year = column.split(' - ')[0]
+        cost[column] *= factors[f'{year} - Adjustment']
+
+    sheets['Outbound Cost'] = cost
+
+    return sheets
+
+
+class TestOutboundRates(unittest.TestCase):
+    def test_rates(self):
+        """Outbound rates give the same linear program and solution as the
+        outbound cost they expand to"""
+
+        for seed in range(5):
+            workbook = RandomWorkbook(no_customers=np.random.randint(5, 50),
+                                      no_capacity_constraints=2,
+                                      no_supply_constraints=2,
+                                      outbound_rates=True,
+                                      adjustment_range=(0.8, 1.2), seed=seed)
+            sheets = workbook.sheets()
+
+            rated, expanded = [
+                Model(inputs={sheet: _index_by_year(df)
+                              for sheet, df in inputs.items()}, year=2023)
+                for inputs in [sheets, expand(sheets)]]
+
+            for data in [rated, expanded]:
+                preprocess(data=data)
+                generate_objective_vector(data=data)
+
+            self.assertIsNone(rated.outbound_cost_per_product)
+            self.assertTrue(np.allclose(rated.objective_vector,
+                                        expanded.objective_vector))
+
+            # Decomposed, the groups expand the rates of their customers
+            for data in [rated, expanded]:
+                optimize(decompose=True, workers=2, data=data)
+
+            self.assertTrue(np.isclose(
+                rated.objective_vector @ rated.linear_program,
+                expanded.objective_vector @ expanded.linear_program))
+
+
+if __name__ == '__main__':
+    unittest.main()
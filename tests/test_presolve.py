@@ -0,0 +1,112 @@
+import sys  # Get the path to the "model" directory
+import unittest
+
+import numpy as np
+from scipy.optimize import linprog
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Data
+from model.randinp import RandomInputs
+from model.presolve import reduce_program, expand_solution
+from model.optimization import generate_objective_vector
+from model.optimization import generate_demand_matrix
+from model.optimization import generate_combination_matrices
+from model.optimization import generate_capacity_matrix
+from model.optimization import generate_supply_matrix
+from model.optimization import generate_constraints_matrix
+from model.optimization import generate_constraints_vector
+
+
+class PresolveTest:
+    """Class for generating random linear programs with routes without
+    cost, customers without demand and a dominated capacity constraint"""
+
+    @classmethod
+    def generate_random_inputs(cls):
+        """Generate random Data inputs and the linear program"""
+
+        RandomInputs(no_products=3,
+                     no_supply_constraints=3,
+                     supply_constraints_range=(1, 2)).generate()
+
+        # Routes without cost
+        for prod in Data.product_list:
+            cost = Data.outbound_cost_per_product[prod]
+            cost[np.random.rand(*cost.shape) < 0.2] = np.nan
+
+        # Customers without demand
+        Data.demand_volume[np.random.rand(Data.dimC) < 0.2] = 0
+
+        # The capacity of product 0 is dominated by that of products 0, 1
+        Data.capacity_constraints = [[0], [0, 1], [2]]
+        rows = [len(set().union(*[Data.factory_names[prod] for prod in cons]))
+                for cons in Data.capacity_constraints]
+        Data.capacity_volume = np.vstack([
+            np.full((rows[0], 1), 1000),
+            np.random.randint(50, 200, (rows[1] + rows[2], 1))])
+
+        generate_objective_vector()
+        generate_demand_matrix()
+        generate_combination_matrices()
+        generate_capacity_matrix()
+        generate_supply_matrix()
+        generate_constraints_matrix()
+        generate_constraints_vector()
+
+
+class TestPresolve(unittest.TestCase):
+    def test_presolve(self):
+        """Compare the presolved linear program with the full one"""
+
+        for _ in range(50):
+            try:
+                PresolveTest.generate_random_inputs()
+            except AssertionError:  # Invalid random instance
+                continue
+
+            # Full linear program, routes without cost are fixed at zero
+            cost = Data.objective_vector
+            unusable = np.isnan(cost)
+            lp = linprog(c=np.nan_to_num(cost),
+                         A_ub=Data.constraints_matrix,
+                         b_ub=Data.constraints_vector,
+                         bounds=[(0, 0) if fixed else (0, None)
+                                 for fixed in unusable],
+                         method='highs')
+
+            try:
+                reduce_program()
+            except AssertionError:  # Customer with demand but no route
+                self.assertNotEqual(lp.status, 0)
+                continue
+
+            self.assertEqual(Data.presolve_summary['routes'],
+                             np.sum(unusable))
+            # Rows of product 0 are dominated (or left without route)
+            self.assertGreaterEqual(Data.presolve_summary['rows'],
+                                    Data.factory_sizes[0])
+
+            reduced = linprog(c=Data.objective_vector,
+                              A_ub=Data.constraints_matrix,
+                              b_ub=Data.constraints_vector,
+                              method='highs')
+            self.assertEqual(reduced.status == 0, lp.status == 0)
+
+            if lp.status != 0:
+                continue
+
+            Data.linear_program = reduced.x
+            expand_solution()
+
+            self.assertEqual(Data.linear_program.size, cost.size)
+            self.assertTrue(np.all(Data.linear_program[unusable] == 0))
+            self.assertTrue(np.isclose(
+                np.nansum(cost * Data.linear_program), lp.fun))
+            self.assertTrue(np.all(
+                Data.constraints_matrix @ Data.linear_program <=
+                Data.constraints_vector.flatten() + 1e-6))
+
+
+if __name__ == '__main__':
+    unittest.main()
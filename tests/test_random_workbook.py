@@ -0,0 +1,86 @@
+import sys  # Get the path to the "model" directory
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Model, ModelResults
+from model.preprocessing import load_inputs, preprocess
+from model.program import execute
+from model.randinp import RandomInputs, RandomWorkbook
+
+
+class TestRandomWorkbook(unittest.TestCase):
+    def test_seed(self):
+        """The same seed gives the same instances"""
+
+        for seed in range(5):
+            first, second = Model(), Model()
+            RandomInputs(seed=seed).generate(data=first)
+            RandomInputs(seed=seed).generate(data=second)
+
+            self.assertEqual(first.supply_constraints,
+                             second.supply_constraints)
+            self.assertTrue(np.array_equal(first.demand_volume,
+                                           second.demand_volume))
+
+            first = RandomWorkbook(seed=seed).sheets()
+            second = RandomWorkbook(seed=seed).sheets()
+
+            for sheet, df in first.items():
+                pd.testing.assert_frame_equal(df, second[sheet])
+
+    def test_workbook(self):
+        """The written workbook parses to the same inputs as the sheets,
+        and every year of it is solved"""
+
+        for seed in range(3):
+            workbook = RandomWorkbook(no_customers=np.random.randint(5, 50),
+                                      no_years=np.random.randint(2, 4),
+                                      no_capacity_constraints=2,
+                                      no_supply_constraints=2, seed=seed)
+
+            with tempfile.TemporaryDirectory() as directory:
+                data = Model()
+                data.filepath = os.path.join(directory, 'Inputs.xlsx')
+                data.cache_location = None
+                workbook.write_workbook(data.filepath)
+                load_inputs(data=data)
+
+                generated = Model()
+                generated.inputs = workbook.inputs()
+
+                for year in range(workbook.start_year,
+                                  workbook.start_year + workbook.no_years):
+                    data.year = generated.year = year
+                    preprocess(data=data)
+                    preprocess(data=generated)
+
+                    self.assertEqual(data.factory_names,
+                                     generated.factory_names)
+                    self.assertEqual(data.capacity_constraints,
+                                     generated.capacity_constraints)
+                    self.assertTrue(np.allclose(data.capacity_volume,
+                                                generated.capacity_volume))
+                    self.assertTrue(np.array_equal(data.column_index,
+                                                   generated.column_index))
+
+                results = ModelResults()
+                results.save_location = os.path.join(directory,
+                                                     'Outputs.xlsx')
+                execute(data=data, results=results)
+
+                # Every customer is served
+                volume = pd.read_excel(results.save_location,
+                                       sheet_name='Outbound Volume Per '
+                                                  'Customer')
+                self.assertEqual(volume['ID'].nunique(),
+                                 workbook.no_customers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import sys  # Get the path to the "model" directory
+import unittest
+
+import numpy as np
+from scipy.optimize import linprog
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Data
+from model.randinp import RandomInputs
+from model.postprocessing import variable_labels
+from model.scenarios import run_scenarios, route_columns, capacity_rows
+from model.scenarios import inbound_columns
+from model.solvers import highspy
+
+
+class TestScenarios(unittest.TestCase):
+    def test_scenarios(self):
+        """Compare every scenario with its own linear program"""
+
+        for _ in range(20):
+            RandomInputs(no_products=3,
+                         no_capacity_constraints=2,
+                         capacity_constraints_range=(1, 2),
+                         no_supply_constraints=3,
+                         supply_constraints_range=(1, 2),
+                         capacity_volume_range=(20, 100)).generate()
+
+            factory = Data.factory_names[0][0]
+            scenarios = [
+                {'name': 'base'},
+                {'name': 'fuel', 'objective': [(route_columns(), 1.1)]},
+                {'name': 'closed',
+                 'closed': route_columns(product=0, factory=factory)},
+                {'name': 'capacity',
+                 'constraints': [(capacity_rows(factory), 0.8)]}]
+
+            try:
+                table = run_scenarios(scenarios, workers=1)
+            except AssertionError:  # Invalid random instance
+                continue
+
+            for scenario in scenarios:
+                cost = Data.objective_vector.copy()
+                bound = Data.constraints_vector.flatten()
+                upper = np.full(cost.size, np.inf)
+
+                for columns, factor in scenario.get('objective', []):
+                    cost[columns] *= factor
+                for rows, factor in scenario.get('constraints', []):
+                    bound[rows] *= factor
+                upper[scenario.get('closed', [])] = 0
+
+                lp = linprog(c=cost, A_ub=Data.constraints_matrix,
+                             b_ub=bound,
+                             bounds=np.column_stack(
+                                 [np.zeros(cost.size), upper]),
+                             method='highs')
+
+                status = Data.scenario_status[scenario['name']]
+                self.assertEqual(status == 'Optimal', lp.status == 0)
+
+                if lp.status == 0:
+                    rows = table[table['Scenario'] == scenario['name']]
+                    self.assertTrue(np.isclose(rows['Cost'].sum(), lp.fun))
+
+    @unittest.skipIf(highspy is None, 'Needs highspy')
+    def test_backends(self):
+        """Scenarios run on the solver backend of the model, with its
+        options, to the same optimum"""
+
+        for _ in range(10):
+            RandomInputs(capacity_volume_range=(20, 100)).generate()
+            scenarios = [{'name': 'base'},
+                         {'name': 'fuel',
+                          'objective': [(route_columns(), 1.1)]}]
+
+            statuses, costs = [], []
+            try:
+                for solver, options in [('highspy', {'threads': 1}),
+                                        ('scipy', {'solver': 'simplex'})]:
+                    Data.solver, Data.solver_options = solver, options
+                    table = run_scenarios(scenarios, workers=1)
+
+                    for result in Data.scenario_results.values():
+                        self.assertEqual(result.backend, solver)
+                        self.assertGreaterEqual(result.iterations, 0)
+
+                    statuses.append(Data.scenario_status)
+                    costs.append([table.loc[table['Scenario'] == name,
+                                            'Cost'].astype(float).sum()
+                                  for name in ['base', 'fuel']])
+            except AssertionError:  # Invalid random instance
+                continue
+            finally:
+                Data.solver, Data.solver_options = None, {}
+
+            self.assertEqual(statuses[0], statuses[1])
+            self.assertTrue(np.allclose(costs[0], costs[1]))
+
+    def test_columns(self):
+        """The columns selected on the integer codes are those of the
+        labels"""
+
+        for seed in range(5):
+            RandomInputs(no_products=3, seed=seed).generate()
+            labels = variable_labels()
+            outbound = labels['Type'] == 'Outbound'
+
+            for product in Data.product_list:
+                for factory in Data.factory_list:
+                    select = (labels['Product'] == product) & \
+                        (labels['Factory'] == factory)
+                    self.assertTrue(np.array_equal(
+                        route_columns(product, factory),
+                        np.flatnonzero(select & outbound)))
+                    self.assertTrue(np.array_equal(
+                        inbound_columns(product, factory),
+                        np.flatnonzero(select & ~outbound)))
+
+            customer = labels['Customer'][outbound].iloc[-1]
+            self.assertTrue(np.array_equal(
+                route_columns(customer=customer),
+                np.flatnonzero(labels['Customer'] == customer)))
+            self.assertTrue(np.array_equal(
+                inbound_columns(), np.flatnonzero(~outbound)))
+
+
+if __name__ == '__main__':
+    unittest.main()
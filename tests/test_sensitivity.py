@@ -0,0 +1,60 @@
+import sys  # Get the path to the "model" directory
+import unittest
+
+import numpy as np
+from scipy.optimize import linprog
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Data
+from model.randinp import RandomInputs
+from model.optimization import optimize
+from model.postprocessing import sensitivity_tables
+
+
+class TestSensitivity(unittest.TestCase):
+    def test_sensitivity(self):
+        """Check the duals and the shadow prices on random instances"""
+
+        for _ in range(20):
+            RandomInputs(no_products=3,
+                         no_capacity_constraints=2,
+                         capacity_constraints_range=(1, 2),
+                         no_supply_constraints=3,
+                         supply_constraints_range=(1, 2),
+                         capacity_volume_range=(20, 100)).generate()
+
+            try:
+                optimize(sensitivity=True)
+            except AssertionError:  # Infeasible random instance
+                continue
+
+            cost, matrix = Data.objective_vector, Data.constraints_matrix
+            bound = Data.constraints_vector.flatten()
+
+            # Strong duality and complementary slackness
+            self.assertTrue(np.isclose(cost @ Data.linear_program,
+                                       bound @ Data.row_dual))
+            self.assertTrue(np.all(Data.reduced_cost > -1e-7))
+            self.assertTrue(np.allclose(Data.slack * Data.row_dual, 0,
+                                        atol=1e-6))
+
+            # More of the tightest capacity, within its range (NaN without
+            # highspy)
+            tables = sensitivity_tables()['constraints']
+            capacity = tables[tables['Type'] == 'Capacity']
+            row = capacity['Shadow Price'].idxmin()
+
+            step = np.nanmin([0.1, (capacity.loc[row, 'Volume Upper'] -
+                                    capacity.loc[row, 'Volume']) / 2])
+            bound[row] += step
+
+            lp = linprog(c=cost, A_ub=matrix, b_ub=bound, method='highs')
+
+            self.assertTrue(np.isclose(
+                lp.fun - cost @ Data.linear_program,
+                capacity.loc[row, 'Shadow Price'] * step))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import sys  # Get the path to the "model" directory
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Model
+from model.preprocessing import preprocess
+from model.optimization import optimize
+from model.randinp import RandomWorkbook
+from model.server import JobServer
+
+
+async def http(port, method, path, body=None):
+    """(status, JSON body) of an HTTP request to the server"""
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    content = b'' if body is None else json.dumps(body).encode()
+
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\n'
+                 f'Content-Length: {len(content)}\r\n\r\n'.encode() + content)
+    await writer.drain()
+
+    answer = await reader.read()
+    writer.close()
+
+    head, _, content = answer.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(content)
+
+
+async def wait(port, job):
+    """The job once it is finished"""
+
+    while True:
+        status, job = await http(port, 'GET', f'/jobs/{job["id"]}')
+        if job['status'] in ('done', 'failed'):
+            return job
+        await asyncio.sleep(0.01)
+
+
+class TestServer(unittest.TestCase):
+    def test_jobs(self):
+        """Jobs are solved to the optimal cost, the second time on the
+        cached model, and invalid requests are rejected"""
+
+        workbook = RandomWorkbook(no_customers=np.random.randint(5, 50),
+                                  no_capacity_constraints=2,
+                                  no_supply_constraints=2, seed=0)
+
+        expected = {}
+        for year in [2022, 2023]:
+            data = Model(inputs=workbook.inputs(), year=year)
+            preprocess(data=data)
+            optimize(data=data)
+            expected[year] = data.objective_vector @ data.linear_program
+
+        async def session(filepath):
+            job_server = JobServer(concurrency=2, cache_size=1,
+                                   settings={'cache_location': None})
+            server = await job_server.serve(port=0)
+            port = server.sockets[0].getsockname()[1]
+
+            try:
+                # The same question four times, then another year
+                requests = [{'filepath': filepath}] * 2 + \
+                           [{'filepath': filepath, 'year': 2022,
+                             'engine': 'colgen', 'routes': False},
+                            {'filepath': filepath, 'year': 2022,
+                             'settings': {'solver': 'scipy'}},
+                            {'filepath': filepath, 'year': 2023}]
+                jobs = []
+                for request in requests:
+                    status, job = await http(port, 'POST', '/jobs', request)
+                    self.assertEqual(status, 202)
+                    self.assertEqual(job['status'], 'queued')
+                    jobs.append(job)
+
+                jobs = [await wait(port, job) for job in jobs]
+
+                for job in jobs:
+                    self.assertEqual(job['status'], 'done')
+                    self.assertTrue(np.isclose(
+                        job['result']['cost'],
+                        expected[job['result']['year']]))
+
+                self.assertEqual(sum(job['result']['cached']
+                                     for job in jobs[:4]), 3)
+                self.assertEqual(jobs[3]['result']['status'], 'Optimal')
+                self.assertNotIn('routes', jobs[2]['result'])
+                self.assertTrue(np.isclose(
+                    sum(route['Cost'] for route in jobs[0]['result']
+                        ['routes']), expected[2022]))
+
+                # The cache holds a single model, 2023 evicted 2022
+                status, statistics = await http(port, 'GET', '/status')
+                self.assertEqual(statistics['cache']['models'], 1)
+                self.assertEqual(statistics['jobs']['done'], 5)
+
+                # No build lock is left behind once the jobs are done
+                self.assertEqual(job_server.cache._building, {})
+
+                # Invalid jobs
+                status, job = await http(port, 'POST', '/jobs',
+                                         {'filepath': filepath,
+                                          'year': 2030})
+                job = await wait(port, job)
+                self.assertEqual(job['status'], 'failed')
+                self.assertIn('timeframe', job['error'])
+
+                for body in [[], {'year': 2022},
+                             {'filepath': filepath,
+                              'settings': {'cache_location': None}}]:
+                    status, answer = await http(port, 'POST', '/jobs', body)
+                    self.assertEqual(status, 400)
+
+                status, _ = await http(port, 'GET', '/jobs/unknown')
+                self.assertEqual(status, 404)
+
+                status, listed = await http(port, 'GET', '/jobs')
+                self.assertEqual(len(listed), 6)
+                self.assertNotIn('result', listed[0])
+
+            finally:
+                server.close()
+                await server.wait_closed()
+                await job_server.stop()
+
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'Inputs.xlsx')
+            workbook.write_workbook(filepath)
+            asyncio.run(session(filepath))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import sys  # Get the path to the "model" directory
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Model, ModelResults
+from model.program import execute
+from model.preprocessing import preprocess
+from model.optimization import generate_objective_vector
+from model.randinp import RandomWorkbook
+
+
+class TestSidecar(unittest.TestCase):
+    def test_sidecar(self):
+        """Memory-mapped outbound cost and demand give the same objective
+        vector and demand as the in-memory ones, and are written once"""
+
+        for seed in range(3):
+            inputs = RandomWorkbook(no_customers=np.random.randint(5, 50),
+                                    seed=seed).inputs()
+
+            with tempfile.TemporaryDirectory() as directory:
+                models = [Model(inputs=inputs, input_key=str(seed),
+                                year=2022, sidecar_location=location)
+                          for location in [None, directory, directory]]
+
+                written = None
+                for data in models:
+                    preprocess(data=data)
+                    generate_objective_vector(data=data)
+
+                    if data.sidecar_location is not None:
+                        files = {name: os.stat(os.path.join(directory,
+                                                            name)).st_mtime_ns
+                                 for name in os.listdir(directory)}
+                        self.assertEqual(sorted(files),
+                                         [f'{seed} - 2022 - demand.npy',
+                                          f'{seed} - 2022 - outbound.npy'])
+                        self.assertEqual(files, written or files)
+                        written = files
+
+                        self.assertIsInstance(data.demand_volume.base,
+                                              np.memmap)
+                        self.assertFalse(data.demand_volume.flags.writeable)
+
+                for data in models[1:]:
+                    self.assertTrue(np.array_equal(
+                        data.objective_vector, models[0].objective_vector))
+                    self.assertTrue(np.array_equal(
+                        data.demand_volume, models[0].demand_volume))
+
+                # Close the memory-mapped files before the directory goes
+                del models, data
+
+    def test_execute(self):
+        """With sidecar files, a run gives the same output, and its model
+        and workers keep only the row index of the sheets they hold"""
+
+        workbook = RandomWorkbook(no_customers=np.random.randint(5, 50),
+                                  no_years=3, seed=0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'Inputs.xlsx')
+            workbook.write_workbook(filepath)
+
+            outputs = []
+            for location, workers in [(None, 1),
+                                      (os.path.join(directory, 'Sidecar'), 2),
+                                      (os.path.join(directory, 'Sidecar'), 1)]:
+                data = Model(filepath=filepath, cache_location=None,
+                             sidecar_location=location)
+                results = ModelResults()
+                results.save_location = os.path.join(
+                    directory, f'Outputs {len(outputs)}.xlsx')
+                execute(workers, data=data, results=results)
+
+                outputs.append(pd.read_excel(results.save_location,
+                                             sheet_name=None))
+                self.assertEqual(
+                    [data.inputs[sheet].shape[1] == 0
+                     for sheet in ['Outbound Cost', 'Sales Volume']],
+                    [location is not None] * 2)
+
+            for output in outputs[1:]:
+                for sheet, df in output.items():
+                    pd.testing.assert_frame_equal(df, outputs[0][sheet])
+
+
+if __name__ == '__main__':
+    unittest.main()
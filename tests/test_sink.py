@@ -0,0 +1,93 @@
+import sys  # Get the path to the "model" directory
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Data, ModelResults
+from model.randinp import RandomInputs
+from model.optimization import optimize
+from model.postprocessing import sensitivity_tables
+from model.sink import result_location, write_year, label_years, read_table
+
+
+class TestSink(unittest.TestCase):
+    def test_label_years(self):
+        """Reading the sparse years matches stacking the dense ones"""
+
+        for _ in range(20):
+            results = ModelResults()
+            results.location = tempfile.mkdtemp()
+
+            size, offset = np.random.randint(1, 100), np.random.randint(10)
+            years = list(range(2022, 2022 + np.random.randint(1, 6)))
+
+            # Sparse random volumes, with rows that are zero every year
+            volume = np.random.rand(offset + size, len(years)) * (
+                np.random.rand(offset + size, 1) < 0.5)
+            for year, column in zip(years, volume.T):
+                write_year(year, column, 2 * column, results=results)
+
+            prefix = pd.DataFrame({'Label': np.arange(size)})
+            df = label_years('volume', prefix, offset, results=results)
+
+            keep = volume[offset:].sum(axis=1) != 0
+            self.assertEqual(results.years, years)
+            self.assertTrue(np.array_equal(df['Label'],
+                                           np.flatnonzero(keep)))
+            self.assertTrue(np.array_equal(df[years].to_numpy(),
+                                           volume[offset:][keep]))
+
+    def test_result_location(self):
+        """The default result directory follows the output file, and an
+        explicit one is kept"""
+
+        with tempfile.TemporaryDirectory() as directory:
+            results = ModelResults()
+            for name in ['A', 'B']:
+                results.save_location = os.path.join(directory,
+                                                      name + '.xlsx')
+                write_year(2022, np.ones(3), np.ones(3), results=results)
+
+                self.assertEqual(result_location(results),
+                                 os.path.join(directory, name + ' Results'))
+                self.assertTrue(os.path.isfile(os.path.join(
+                    directory, name + ' Results', '2022.npz')))
+            self.assertIsNone(results.location)
+
+            results.location = os.path.join(directory, 'Kept')
+            self.assertEqual(result_location(results), results.location)
+
+    def test_read_table(self):
+        """The sensitivity tables come back from the year file as they
+        were written, labels and missing values included"""
+
+        for seed in range(5):
+            RandomInputs(capacity_volume_range=(50, 100), seed=seed).generate()
+            try:
+                optimize(sensitivity=True)
+            except AssertionError:  # Infeasible random instance
+                continue
+
+            tables = sensitivity_tables(data=Data)
+            with tempfile.TemporaryDirectory() as directory:
+                results = ModelResults()
+                results.location = directory
+                write_year(2022, Data.linear_program, Data.linear_program,
+                           tables, results=results)
+                write_year(2023, Data.linear_program, Data.linear_program,
+                           results=results)
+
+                for key, df in tables.items():
+                    pd.testing.assert_frame_equal(
+                        read_table(2022, key, results=results), df,
+                        check_dtype=False)
+                    self.assertIsNone(read_table(2023, key, results=results))
+
+
+if __name__ == '__main__':
+    unittest.main()
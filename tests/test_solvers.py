@@ -0,0 +1,157 @@
+import sys  # Get the path to the "model" directory
+import unittest
+
+import numpy as np
+from scipy import sparse
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model import instrument
+from model.data import Data, Model
+from model.randinp import RandomInputs
+from model.optimization import optimize, warm_start_solve
+from model.solvers import solve, highspy
+
+
+@unittest.skipIf(highspy is None, 'Needs highspy')
+class TestSolvers(unittest.TestCase):
+    def test_backends(self):
+        """Both backends reach the same optimum, whatever the options"""
+
+        for _ in range(20):
+            RandomInputs(capacity_volume_range=(20, 100)).generate()
+
+            objectives = []
+            try:
+                for solver, options in [
+                        ('scipy', {}), ('highspy', {}),
+                        ('highspy', {'solver': 'ipm', 'threads': 1}),
+                        ('scipy', {'solver': 'simplex', 'threads': 1,
+                                   'primal_feasibility_tolerance': 1e-9})]:
+                    Data.solver, Data.solver_options = solver, options
+                    optimize(presolve=False)
+
+                    self.assertEqual(Data.solve_result.backend, solver)
+                    self.assertGreaterEqual(Data.solve_result.time, 0)
+                    self.assertTrue(np.all(Data.linear_program >= 0))
+                    objectives.append(Data.solve_result.objective)
+            except AssertionError:  # Invalid random instance
+                continue
+            finally:
+                Data.solver, Data.solver_options = None, {}
+
+            self.assertTrue(np.allclose(objectives, objectives[0]))
+            self.assertTrue(np.isclose(
+                Data.objective_vector @ Data.linear_program, objectives[0]))
+
+    def test_warm_start(self):
+        """Warm start and sensitivity keep the backend of the model"""
+
+        for _ in range(10):
+            RandomInputs(capacity_volume_range=(20, 100)).generate()
+
+            try:
+                optimize()
+            except AssertionError:  # Invalid random instance
+                continue
+
+            try:
+                for solver in ['scipy', 'highspy']:
+                    Data.solver, Data.solver_options = solver, {'threads': 1}
+                    for warm_start, sensitivity in [(True, False),
+                                                    (False, True)]:
+                        optimize(warm_start, sensitivity=sensitivity)
+                        self.assertEqual(Data.solve_result.backend, solver)
+                        # Ranging needs the highspy backend
+                        self.assertEqual(Data.cost_ranging is not None,
+                                         sensitivity and solver == 'highspy')
+            finally:
+                Data.solver, Data.solver_options = None, {}
+
+    @staticmethod
+    def _warm_starts(data):
+        """Solve the model twice with warm_start_solve, the second time from
+        the basis of the first. Returns the iterations and the warm start
+        flag of both solves"""
+
+        solves = []
+        for _ in range(2):
+            with instrument.recording() as records:
+                warm_start_solve(data=data)
+            record, = [record for record in records
+                       if record['name'] == 'highs']
+            solves.append((record['iterations'], record['warm_start']))
+
+            # Perturbed costs for the second solve
+            data.objective_vector = data.objective_vector * \
+                np.random.uniform(0.99, 1.01, data.objective_vector.size)
+
+        return solves
+
+    def _instance(self, seed):
+        """Model of a feasible random instance, with its matrices built"""
+
+        data = Model(solver='highspy')
+        RandomInputs(capacity_volume_range=(50, 100),
+                     seed=seed).generate(data=data)
+        optimize(presolve=False, data=data)
+        data.basis = None
+
+        return data
+
+    def test_warm_start_basis(self):
+        """With the same non-zero pattern, the second solve starts from the
+        basis of the first and needs fewer iterations"""
+
+        for seed in [0, 1, 6, 7]:
+            data = self._instance(seed)
+            (cold, cold_flag), (warm, warm_flag) = self._warm_starts(data)
+
+            self.assertEqual((cold_flag, warm_flag), (False, True))
+            self.assertLess(warm, cold)
+
+    def test_cold_start(self):
+        """With another non-zero pattern, the second solve starts cold and
+        still reaches the optimum"""
+
+        for seed in [0, 1, 6, 7]:
+            data = self._instance(seed)
+            warm_start_solve(data=data)
+
+            # A route no longer counts against its capacity row
+            matrix = data.constraints_matrix.tocsr(copy=True)
+            capacity = matrix[data.dimC:data.dimC + data.capacity_rows]
+            row = data.dimC + np.flatnonzero(np.diff(capacity.indptr))[0]
+            matrix.data[matrix.indptr[row]] = 0
+            matrix.eliminate_zeros()
+            data.constraints_matrix = matrix
+
+            with instrument.recording() as records:
+                warm_start_solve(data=data)
+            self.assertEqual([record['warm_start'] for record in records
+                              if record['name'] == 'highs'], [False])
+
+            expected = solve(data.objective_vector, matrix,
+                             data.constraints_vector, 'scipy')
+            self.assertTrue(np.isclose(
+                data.objective_vector @ data.linear_program,
+                expected.objective))
+
+    def test_status(self):
+        """Infeasible programs and invalid options are reported"""
+
+        # x >= 1 and x <= 0
+        matrix = sparse.csr_matrix([[-1.0], [1.0]])
+        bound = np.array([-1.0, 0.0])
+
+        for backend in ['highspy', 'scipy']:
+            result = solve(np.ones(1), matrix, bound, backend)
+            self.assertEqual(result.status, 'Infeasible')
+            self.assertIsNone(result.solution)
+
+        with self.assertRaises(AssertionError):
+            solve(np.ones(1), matrix, bound, 'highspy', {'threads': 'all'})
+
+
+if __name__ == '__main__':
+    unittest.main()
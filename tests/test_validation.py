@@ -0,0 +1,72 @@
+import sys  # Get the path to the "model" directory
+import subprocess
+import unittest
+
+sys.path.append("C:\\Users\\monty.minh\\Documents\\Optimizer")
+
+from model.data import Data
+from model.randinp import RandomInputs
+from model.optimization import generate_objective_vector
+from model.optimization import generate_demand_matrix
+from model.optimization import generate_combination_matrices
+from model.optimization import generate_capacity_matrix
+from model.optimization import generate_supply_matrix
+from model.optimization import generate_constraints_matrix
+from model.optimization import generate_constraints_vector
+
+
+def build(validation):
+    """Build the linear program of Data at a validation level, returns
+    the message of the failed check (None if none failed)"""
+
+    Data.validation = validation
+
+    try:
+        for generate in [generate_objective_vector, generate_demand_matrix,
+                         generate_combination_matrices,
+                         generate_capacity_matrix, generate_supply_matrix,
+                         generate_constraints_matrix,
+                         generate_constraints_vector]:
+            generate()
+    except AssertionError as error:
+        return str(error)
+    finally:
+        Data.validation = 'cheap'
+
+
+class TestValidation(unittest.TestCase):
+    def test_levels(self):
+        """Cheap checks reject the same random instances as full checks,
+        e.g. products in no supply constraint"""
+
+        for _ in range(100):
+            RandomInputs(no_supply_constraints=2).generate()
+
+            cheap, full = build('cheap'), build('full')
+            self.assertEqual(cheap, full)
+
+            # Off builds the linear program without any check
+            self.assertIsNone(build('off'))
+
+    def test_input_values(self):
+        """Invalid input values are caught unless validation is off"""
+
+        RandomInputs().generate()
+        Data.demand_volume[0] = -1
+
+        self.assertIsNone(build('off'))
+        self.assertEqual(build('cheap'), 'Demand volume cannot be negative')
+
+    def test_optimized(self):
+        """Checks are not removed by python -O"""
+
+        code = ('from model.data import Data; from model.validation import '
+                'check; check(False, "kept")')
+        run = subprocess.run([sys.executable, '-O', '-c', code],
+                             capture_output=True, text=True)
+
+        self.assertIn('AssertionError: kept', run.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()